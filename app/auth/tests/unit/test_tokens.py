@@ -0,0 +1,65 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from jose import JWTError, jwk, jwt
+
+from app.auth.tokens import TokenKeys, TokenVerifier, get_token_keys
+
+
+def make_verifier() -> TokenVerifier:
+    key = jwk.construct("secret", "HS256")
+    return TokenVerifier(TokenKeys("HS256", key, key))
+
+
+def test_verify_caches_valid_tokens():
+    verifier = make_verifier()
+    token = jwt.encode({"sub": "user@example.com", "exp": int(time.time()) + 60}, "secret", algorithm="HS256")
+
+    with patch("app.auth.tokens.jwt.decode", wraps=jwt.decode) as decode:
+        assert verifier.verify(token)["sub"] == "user@example.com"
+        assert verifier.verify(token)["sub"] == "user@example.com"
+
+    decode.assert_called_once()
+
+
+def test_verify_rejects_invalid_tokens():
+    verifier = make_verifier()
+    forged = jwt.encode({"sub": "user@example.com"}, "other-secret", algorithm="HS256")
+    expired = jwt.encode({"sub": "user@example.com", "exp": int(time.time()) - 1}, "secret", algorithm="HS256")
+
+    for token in (forged, expired, "not-a-token"):
+        with pytest.raises(JWTError):
+            verifier.verify(token)
+
+
+def test_get_token_keys_reports_missing_configuration(monkeypatch):
+    get_token_keys.cache_clear()
+    monkeypatch.delenv("TOKEN_ALGORITHM", raising=False)
+    with pytest.raises(ValueError, match="TOKEN_ALGORITHM"):
+        get_token_keys()
+
+    monkeypatch.setenv("TOKEN_ALGORITHM", "RS256")
+    monkeypatch.delenv("TOKEN_PRIVATE_KEY", raising=False)
+    monkeypatch.delenv("TOKEN_PUBLIC_KEY", raising=False)
+    with pytest.raises(ValueError, match="TOKEN_PRIVATE_KEY or TOKEN_PUBLIC_KEY"):
+        get_token_keys()
+    get_token_keys.cache_clear()
+
+
+def test_get_token_keys_derives_the_public_key(monkeypatch):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    private_pem = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()).decode()
+    monkeypatch.setenv("TOKEN_ALGORITHM", "ES256")
+    monkeypatch.setenv("TOKEN_PRIVATE_KEY", private_pem)
+    monkeypatch.delenv("TOKEN_PUBLIC_KEY", raising=False)
+    get_token_keys.cache_clear()
+
+    keys = get_token_keys()
+    token = jwt.encode({"sub": "user@example.com"}, keys.signing_key, algorithm="ES256")
+
+    assert TokenVerifier(keys).verify(token)["sub"] == "user@example.com"
+    get_token_keys.cache_clear()
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from jose import jwk, jwt, JWTError
+from jose.constants import ALGORITHMS
+from jose.backends.base import Key
+
+from app.tools.cache import TTLCache
+from app.tools.config import Config
+
+# Longest time a verified token is kept, whatever its expiration.
+MAX_TOKEN_CACHE_SECONDS = 3600
+SIGNING_ALGORITHMS = ALGORITHMS.HMAC | ALGORITHMS.RSA_DS | ALGORITHMS.EC_DS
+
+
+def _read_key(value: Optional[str]) -> Optional[str]:
+    # Keys can be given inline (PEM) or as a path to a PEM file.
+    if value and os.path.isfile(value):
+        with open(value, encoding="utf-8") as file:
+            return file.read()
+    return value
+
+
+@dataclass(frozen=True)
+class TokenKeys:
+    algorithm: str
+    signing_key: Optional[Key]
+    verification_key: Key
+
+
+@lru_cache
+def get_token_keys() -> TokenKeys:
+    """
+    Load the JWT keys once.
+
+    HMAC algorithms (HS*) use TOKEN_SECRET_KEY for both signing and verification. Asymmetric
+    algorithms (RS*, ES*) sign with TOKEN_PRIVATE_KEY and verify with TOKEN_PUBLIC_KEY, so
+    services that only verify tokens do not need the private key. When only the private key is set,
+    the public key is derived from it.
+
+    Raises:
+        ValueError: If the algorithm is missing or unsupported, or its keys are not configured.
+    """
+    algorithm = Config.TOKEN_ALGORITHM()
+    if not algorithm:
+        raise ValueError("TOKEN_ALGORITHM must be set, e.g. HS256, RS256 or ES256")
+    if algorithm not in SIGNING_ALGORITHMS:
+        raise ValueError(f"Unsupported TOKEN_ALGORITHM: {algorithm}")
+
+    if algorithm in ALGORITHMS.HMAC:
+        secret = Config.TOKEN_SECRET_KEY()
+        if not secret:
+            raise ValueError(f"TOKEN_SECRET_KEY must be set for {algorithm}")
+        key = jwk.construct(secret, algorithm)
+        return TokenKeys(algorithm, key, key)
+
+    private_key = _read_key(Config.TOKEN_PRIVATE_KEY())
+    public_key = _read_key(Config.TOKEN_PUBLIC_KEY())
+    if not private_key and not public_key:
+        raise ValueError(f"TOKEN_PRIVATE_KEY or TOKEN_PUBLIC_KEY must be set for {algorithm}")
+    signing_key = jwk.construct(private_key, algorithm) if private_key else None
+    verification_key = jwk.construct(public_key, algorithm) if public_key else signing_key.public_key()
+    return TokenKeys(algorithm, signing_key, verification_key)
+
+
+class TokenVerifier:
+    def __init__(self, keys: TokenKeys, max_size: int = 10000) -> None:
+        """
+        Verifies JWTs and remembers the verified claims until the token expires.
+
+        Tokens are cached by their SHA-256 digest, so the raw bearer tokens are not kept in memory.
+
+        Args:
+            keys (TokenKeys): The preloaded key material.
+            max_size (int): Maximum number of verified tokens kept.
+        """
+        self._keys = keys
+        self._cache = TTLCache(max_size=max_size, ttl=MAX_TOKEN_CACHE_SECONDS)
+
+    def verify(self, token: str) -> dict:
+        """
+        Get the claims of a valid token.
+
+        Raises:
+            JWTError: If the token is invalid or expired.
+        """
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self._cache.get(digest)
+        if claims is not None:
+            return claims
+
+        claims = jwt.decode(token, self._keys.verification_key, algorithms=[self._keys.algorithm])
+        expires_in = claims["exp"] - time.time() if "exp" in claims else MAX_TOKEN_CACHE_SECONDS
+        if expires_in > 0:
+            self._cache.set(digest, claims, ttl=min(expires_in, MAX_TOKEN_CACHE_SECONDS))
+        return claims
+
+
+@lru_cache
+def get_token_verifier() -> TokenVerifier:
+    return TokenVerifier(get_token_keys(), max_size=int(Config.TOKEN_CACHE_MAX_SIZE()))
+
+
+def encode_token(claims: dict) -> str:
+    keys = get_token_keys()
+    if keys.signing_key is None:
+        raise JWTError("No signing key is configured")
+    return jwt.encode(claims, keys.signing_key, algorithm=keys.algorithm)
@@ -1,21 +1,92 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
 
 from passlib.context import CryptContext
-from jose import jwt
 
+from app.auth.tokens import encode_token
 from app.tools.config import Config
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(Config.BCRYPT_ROUNDS())
+
+# Hashes created with another cost are flagged by needs_update, so they are rehashed on the next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class PasswordHasherBusyError(Exception):
+    pass
 
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    def __init__(self, executor: Executor, max_pending: int) -> None:
+        """
+        Runs bcrypt hashing and verification on a dedicated executor, off the event loop.
+
+        Args:
+            executor (Executor): The thread or process pool running the bcrypt calls.
+            max_pending (int): Maximum number of calls running or queued. Further calls fail fast
+                               with PasswordHasherBusyError instead of piling up.
+        """
+        self._executor = executor
+        self._max_pending = max_pending
+        self._pending = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password against its hash.
+
+        Returns:
+            Tuple[bool, Optional[str]]: Whether the password matches, and a new hash when the stored one
+                                        was created with another bcrypt cost.
+        """
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    async def _run(self, function, *args):
+        if self._pending >= self._max_pending:
+            raise PasswordHasherBusyError
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+@lru_cache
+def get_password_hasher() -> PasswordHasher:
+    workers = int(Config.PASSWORD_HASH_WORKERS())
+    if Config.PASSWORD_HASH_EXECUTOR() == "process":
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+    return PasswordHasher(executor, max_pending=int(Config.PASSWORD_HASH_MAX_PENDING()))
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -24,5 +95,5 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
         expire = datetime.utcnow() + timedelta(minutes=int(Config.ACCESS_TOKEN_TTL_MINUTES()))
     to_encode.update({"exp": expire})
     # TODO google create secret manager client and add secret key there
-    encoded_jwt = jwt.encode(to_encode, Config.TOKEN_SECRET_KEY(), algorithm=Config.TOKEN_ALGORITHM())
+    encoded_jwt = encode_token(to_encode)
     return encoded_jwt
@@ -0,0 +1,44 @@
+"""
+Bulk import movies from an NDJSON file into the movies collection.
+
+Usage:
+    python -m app.cli.import_movies catalog.ndjson [--batch-size 500] [--max-concurrency 4]
+"""
+import argparse
+import asyncio
+import sys
+from typing import AsyncIterator
+
+from app.clients.factory import get_document_db
+from app.repositories.movies.repository import MovieRepository
+from app.services.movies.bulk_import import MovieImporter
+from app.tools.config import Config
+from app.tools.logger import APPLogger
+
+
+async def read_lines(path: str) -> AsyncIterator[str]:
+    with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as file:
+        for line in file:
+            yield line
+
+
+async def main(args: argparse.Namespace) -> int:
+    logger = APPLogger()
+    document_db = get_document_db(logger, Config.MOVIES_COLLECTION_NAME())
+    importer = MovieImporter(MovieRepository(document_db), logger, batch_size=args.batch_size,
+                             max_concurrency=args.max_concurrency)
+    report = await importer.run(read_lines(args.path))
+    print(report.json(indent=2))
+    return 1 if report.failed else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk import movies from an NDJSON file.")
+    parser.add_argument("path", help="NDJSON file with one movie per line, or - to read from stdin")
+    parser.add_argument("--batch-size", type=int, default=int(Config.IMPORT_BATCH_SIZE()))
+    parser.add_argument("--max-concurrency", type=int, default=int(Config.IMPORT_MAX_CONCURRENCY()))
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
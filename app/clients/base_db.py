@@ -1,25 +1,42 @@
 from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
 
 
 class IDocumentDB(ABC):
     @abstractmethod
-    async def get_document(self, path: str):
+    async def get_document(self, path: str, field_paths: Optional[List[str]] = None):
         pass
 
     @abstractmethod
-    async def get_document_by_title(self, path: str):
+    async def get_documents(self, paths: List[str], field_paths: Optional[List[str]] = None):
+        pass
+
+    @abstractmethod
+    async def get_document_by_title(self, path: str, field_paths: Optional[List[str]] = None):
         pass
 
     @abstractmethod
     async def create_document(self, path: str, document: dict):
         pass
 
+    @abstractmethod
+    async def set_documents(self, documents: Dict[str, dict]):
+        pass
+
+    @abstractmethod
+    async def update_document(self, path: str, fields: dict):
+        pass
+
     @abstractmethod
     async def delete_document(self, path: str):
         pass
 
     @abstractmethod
-    async def get_all_documents(self):
+    async def get_all_documents(self, page_size: int = 10):
+        pass
+
+    @abstractmethod
+    async def get_documents_after(self, field_path: str, value, page_size: int = 10):
         pass
 
     @abstractmethod
@@ -27,5 +44,6 @@ class IDocumentDB(ABC):
         pass
 
     @abstractmethod
-    async def get_paginated_documents(self, page_size: int = 10, start_after: str = None):
+    async def get_paginated_documents(self, page_size: int = 10, start_after: str = None,
+                                      order_by: Optional[str] = None, field_paths: Optional[List[str]] = None):
         pass
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict
 
@@ -8,5 +9,17 @@ class IMessageService(ABC):
         pass
 
     @abstractmethod
-    def publish(self, message: Dict[str, Any]) -> None:
+    async def publish(self, message: Dict[str, Any], ordering_key: str = "") -> str:
+        pass
+
+    @abstractmethod
+    def publish_nowait(self, message: Dict[str, Any], ordering_key: str = "") -> asyncio.Future:
+        pass
+
+    @abstractmethod
+    async def flush(self) -> None:
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
         pass
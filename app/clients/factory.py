@@ -0,0 +1,35 @@
+from functools import lru_cache
+from typing import Optional
+
+from app.clients.base_db import IDocumentDB
+from app.clients.base_message_service import IMessageService
+from app.tools.base_logger import ILogger
+from app.tools.config import Config
+
+
+@lru_cache
+def get_document_db(logger: ILogger, collection_name: str, backend: Optional[str] = None) -> IDocumentDB:
+    """
+    Get the document database client for a collection. The backend defaults to DB_BACKEND, and its
+    modules are only imported when it is used.
+    """
+    if (backend or Config.DB_BACKEND()) == "memory":
+        from app.clients.memory.memory_db import get_memory_db_client
+        return get_memory_db_client(collection_name)
+
+    from app.clients.firestore.firestore import get_firestore_client
+    return get_firestore_client(logger, collection_name)
+
+
+@lru_cache
+def get_message_service(logger: ILogger, backend: Optional[str] = None) -> IMessageService:
+    """
+    Get the message service. The backend defaults to MESSAGE_BACKEND, and its modules are only
+    imported when it is used.
+    """
+    if (backend or Config.MESSAGE_BACKEND()) == "memory":
+        from app.clients.memory.message_service import get_memory_message_service
+        return get_memory_message_service()
+
+    from app.clients.pub_sub.pub_sub import get_pub_sub_client
+    return get_pub_sub_client(logger)
@@ -1,16 +1,32 @@
-from typing import Optional, AsyncIterator, List, Tuple
+import asyncio
+import functools
+import time
+from typing import Optional, AsyncIterator, Awaitable, Callable, Dict, List, Tuple, TypeVar
 from functools import lru_cache
 from pathlib import Path
 
-from google.cloud.exceptions import Conflict
+from google.api_core import exceptions as api_exceptions
+from google.cloud.exceptions import Conflict, NotFound
 from google.cloud.firestore_v1 import (
     AsyncClient,
     DocumentSnapshot,
 )
 
 from app.clients.base_db import IDocumentDB
+from app.clients.page_token import decode_page_token, encode_page_token, require_page_token_secret
+from app.tools.config import Config
 from app.tools.tools import get_project_id
 from app.tools.base_logger import ILogger, LogLevel
+from app.tools.metrics import REGISTRY
+from app.tools.resilience import (
+    RESILIENCE_ERRORS,
+    CircuitBreaker,
+    DeadlineExceededError,
+    LatencyWindow,
+    backoff_delay,
+    time_remaining,
+)
+from app.tools.tracing import current_span, tracer
 
 from .errors import (
     DocumentAlreadyExistsError,
@@ -20,26 +36,230 @@ from .errors import (
     DocumentWriteError,
 )
 
+# Maximum number of documents requested in a single BatchGetDocuments RPC.
+BATCH_GET_CHUNK_SIZE = 100
+# Maximum number of writes Firestore accepts in a single commit.
+BATCH_WRITE_MAX_SIZE = 500
+# A hedged read is sent when the first one is slower than this percentile of the recent reads.
+HEDGE_QUANTILE = 0.95
+# Errors worth another attempt: the call may succeed on another backend or a bit later.
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    api_exceptions.Aborted,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.TooManyRequests,
+)
+
+T = TypeVar("T")
+
+FIRESTORE_LATENCY = REGISTRY.histogram("firestore_operation_duration_seconds",
+                                       "Time spent in FirestoreClient methods.", ["operation"])
+FIRESTORE_ERRORS = REGISTRY.counter("firestore_operation_errors_total", "Failed FirestoreClient calls.",
+                                    ["operation"])
+FIRESTORE_READS = REGISTRY.counter("firestore_documents_read_total", "Documents read from Firestore.",
+                                   ["operation"])
+FIRESTORE_WRITES = REGISTRY.counter("firestore_documents_written_total",
+                                    "Documents created, updated or deleted in Firestore.", ["operation"])
+FIRESTORE_RETRIES = REGISTRY.counter("firestore_retries_total", "Firestore calls retried after a transient error.",
+                                     ["operation"])
+FIRESTORE_HEDGES = REGISTRY.counter("firestore_hedged_reads_total",
+                                    "Second reads sent because the first one was slow.", ["operation"])
+
+
+def parse_operation_timeouts(value: str) -> Dict[str, float]:
+    """
+    Parse per-operation timeouts such as "get_document=1,set_documents=30".
+    """
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        operation, _, timeout = item.partition("=")
+        timeouts[operation.strip()] = float(timeout)
+    return timeouts
+
+
+async def _collect(stream: AsyncIterator[T], limit: Optional[int] = None) -> List[T]:
+    items = []
+    async for item in stream:
+        items.append(item)
+        if limit is not None and len(items) >= limit:
+            break
+    return items
+
+
+def _instrumented(operation: str):
+    """
+    Record the latency and failures of a FirestoreClient coroutine method, in a span of the current trace.
+    """
+    latency = FIRESTORE_LATENCY.labels(operation)
+    errors = FIRESTORE_ERRORS.labels(operation)
+    span_name = f"FirestoreClient.{operation}"
+
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            with tracer.start_as_current_span(span_name) as span:
+                span.set_attribute("db.system", "firestore")
+                span.set_attribute("db.collection.name", self._collection_name)
+                try:
+                    return await method(self, *args, **kwargs)
+                except DocumentNotFoundError:
+                    span.set_status("OK")
+                    span.set_attribute("db.document.found", False)
+                    raise
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    latency.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
 
 class FirestoreClient(IDocumentDB):
-    def __init__(self, collection_name: str, logger: ILogger, project_id: str | None = None) -> None:
+    def __init__(self, collection_name: str, logger: ILogger, project_id: str | None = None,
+                 page_token_secret: str | None = None) -> None:
         """
         Initializes a new FirestoreClient instance.
 
+        Every Firestore call gets a timeout, bounded by the deadline of the request being served. Calls
+        failing with a transient error are retried with jittered exponential backoff when they are
+        idempotent, single-document reads can be hedged with a second read when the first one is slower
+        than usual, and a circuit breaker fails calls fast while Firestore keeps failing. The client
+        library's own retries are disabled so that these limits hold.
+
         Args:
             collection_name (str): Name of the Firestore collection.
             project_id (str | None): GCP ID where the Firestore database is located.
+            page_token_secret (str | None): Key used to sign pagination tokens. Defaults to PAGE_TOKEN_SECRET.
+
+        Raises:
+            ValueError: If no pagination token secret is configured.
         """
         self._collection_name = collection_name
         self.logger = logger
+        self._page_token_secret = require_page_token_secret(
+            page_token_secret if page_token_secret is not None else Config.PAGE_TOKEN_SECRET())
+        self._timeout = float(Config.FIRESTORE_TIMEOUT_SECONDS())
+        self._operation_timeouts = parse_operation_timeouts(Config.FIRESTORE_OPERATION_TIMEOUTS())
+        self._max_attempts = int(Config.FIRESTORE_MAX_ATTEMPTS())
+        self._retry_base_delay = float(Config.FIRESTORE_RETRY_BASE_DELAY_SECONDS())
+        self._retry_max_delay = float(Config.FIRESTORE_RETRY_MAX_DELAY_SECONDS())
+        self._hedging_enabled = Config.FIRESTORE_HEDGE_ENABLED().lower() == "true"
+        self._hedge_min_delay = float(Config.FIRESTORE_HEDGE_MIN_DELAY_SECONDS())
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self.circuit_breaker = CircuitBreaker(f"firestore:{collection_name}",
+                                              failure_threshold=int(Config.FIRESTORE_CIRCUIT_FAILURE_THRESHOLD()),
+                                              reset_timeout=float(Config.FIRESTORE_CIRCUIT_RESET_SECONDS()))
         self._db = AsyncClient(project=project_id or get_project_id())
 
-    async def get_document(self, path: str) -> DocumentSnapshot:
+    async def _call(self, operation: str, rpc: Callable[[float], Awaitable[T]], idempotent: bool = True,
+                    hedged: bool = False) -> T:
+        """
+        Make a Firestore call with a timeout, retries, hedging and the circuit breaker.
+
+        Args:
+            operation (str): The operation name, for the timeouts, latencies and metrics.
+            rpc (Callable[[float], Awaitable[T]]): Starts the call, given its timeout in seconds. It is called
+                                                   again for each attempt and hedged read.
+            idempotent (bool): Whether the call can be retried after an attempt that may have been applied.
+            hedged (bool): Whether a second read may be sent when the first one is slow.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            DeadlineExceededError: If the request deadline expired before the call could be made.
+            Exception: The error of the last attempt.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            timeout = self._timeout_for(operation)
+            self.circuit_breaker.before_call()
+            started = time.perf_counter()
+            try:
+                if hedged and self._hedging_enabled:
+                    result = await self._hedge(operation, rpc, timeout)
+                else:
+                    result = await asyncio.wait_for(rpc(timeout), timeout)
+            except TRANSIENT_ERRORS as e:
+                self.circuit_breaker.record_failure()
+                delay = backoff_delay(attempt, self._retry_base_delay, self._retry_max_delay)
+                remaining = time_remaining()
+                if not idempotent or attempt >= self._max_attempts or (remaining is not None and remaining <= delay):
+                    raise
+                self.logger.log(LogLevel.WARNING, "Retrying Firestore %s in %.2fs after attempt %s failed. Error: %s",
+                                operation, delay, attempt, e)
+                FIRESTORE_RETRIES.labels(operation).inc()
+                current_span().set_attribute("db.retries", attempt)
+                await asyncio.sleep(delay)
+                continue
+            except Exception:
+                # Firestore answered (e.g. not found or already exists): it is up.
+                self.circuit_breaker.record_success()
+                raise
+            except asyncio.CancelledError:
+                # The caller went away; says nothing about Firestore
+                self.circuit_breaker.record_cancelled()
+                raise
+            self.circuit_breaker.record_success()
+            self._latency_window(operation).observe(time.perf_counter() - started)
+            return result
+
+    async def _hedge(self, operation: str, rpc: Callable[[float], Awaitable[T]], timeout: float) -> T:
+        """
+        Send a read and, if it has not answered after the usual (p95) latency, a second one. The first
+        successful answer is returned and the other read is cancelled.
+        """
+        started = time.monotonic()
+        quantile = self._latency_window(operation).quantile(HEDGE_QUANTILE)
+        pending = {asyncio.ensure_future(rpc(timeout))}
+        try:
+            if quantile is not None:
+                done, _ = await asyncio.wait(pending, timeout=min(timeout, max(quantile, self._hedge_min_delay)))
+                if not done:
+                    FIRESTORE_HEDGES.labels(operation).inc()
+                    current_span().set_attribute("db.hedged", True)
+                    pending.add(asyncio.ensure_future(rpc(timeout - (time.monotonic() - started))))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=timeout - (time.monotonic() - started),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _timeout_for(self, operation: str) -> float:
+        timeout = self._operation_timeouts.get(operation, self._timeout)
+        remaining = time_remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceededError(f"Request deadline expired before Firestore {operation}")
+            timeout = min(timeout, remaining)
+        return timeout
+
+    def _latency_window(self, operation: str) -> LatencyWindow:
+        window = self._latencies.get(operation)
+        if window is None:
+            window = self._latencies[operation] = LatencyWindow()
+        return window
+
+    @_instrumented("get_document")
+    async def get_document(self, path: str, field_paths: Optional[List[str]] = None) -> DocumentSnapshot:
         """
         Get a single document from Firestore by its path.
 
         Args:
             path (str): The document path relative to the collection.
+            field_paths (List[str], optional): Fields to return. All fields are returned by default.
 
         Returns:
             DocumentSnapshot: The Firestore document snapshot.
@@ -47,36 +267,102 @@ class FirestoreClient(IDocumentDB):
         Raises:
             DocumentReadError: If an error occurs while fetching the document.
             DocumentNotFoundError: If the document does not exist.
+            CircuitOpenError: If the circuit breaker is open.
+            DeadlineExceededError: If the request deadline expired before the call could be made.
         """
         document_path = str(Path(self._collection_name) / Path(path))
         try:
-            document = await self._db.document(document_path).get()
+            reference = self._db.document(document_path)
+            document = await self._call("get_document", lambda timeout: reference.get(
+                field_paths=field_paths, retry=None, timeout=timeout), hedged=True)
+        except RESILIENCE_ERRORS:
+            raise
         except Exception as e:
-            self.logger.log(LogLevel.ERROR, f"Failed to get document on path: {path}")
+            self.logger.log(LogLevel.ERROR, "Failed to get document on path: %s", path)
             raise DocumentReadError from e
+        FIRESTORE_READS.labels("get_document").inc()
         if not document.exists:
             raise DocumentNotFoundError
         return document
 
-    async def get_document_by_title(self, title: str) -> Optional[DocumentSnapshot]:
+    @_instrumented("get_documents")
+    async def get_documents(self, paths: List[str],
+                            field_paths: Optional[List[str]] = None) -> List[Optional[DocumentSnapshot]]:
+        """
+        Get many documents from Firestore with batched reads.
+
+        Large inputs are split in chunks of BATCH_GET_CHUNK_SIZE documents that are fetched concurrently.
+
+        Args:
+            paths (List[str]): The document paths relative to the collection.
+            field_paths (List[str], optional): Fields to return. All fields are returned by default.
+
+        Returns:
+            List[Optional[DocumentSnapshot]]: One entry per requested path, in the same order.
+                                              Missing documents are returned as None.
+
+        Raises:
+            DocumentReadError: If an error occurs while fetching the documents.
+            CircuitOpenError: If the circuit breaker is open.
+            DeadlineExceededError: If the request deadline expired before the call could be made.
+        """
+        unique_paths = list(dict.fromkeys(paths))
+        chunks = [unique_paths[i:i + BATCH_GET_CHUNK_SIZE] for i in range(0, len(unique_paths), BATCH_GET_CHUNK_SIZE)]
+        try:
+            results = await asyncio.gather(*[
+                self._call("get_documents", functools.partial(self._get_documents_chunk, chunk, field_paths))
+                for chunk in chunks
+            ])
+        except RESILIENCE_ERRORS:
+            raise
+        except Exception as e:
+            self.logger.log(LogLevel.ERROR, "Failed to get %s documents. Error: %s", len(unique_paths), e)
+            raise DocumentReadError from e
+
+        FIRESTORE_READS.labels("get_documents").inc(len(unique_paths))
+        current_span().set_attribute("db.documents.count", len(unique_paths))
+        documents: Dict[str, DocumentSnapshot] = {}
+        for result in results:
+            documents.update(result)
+        return [documents.get(path) for path in paths]
+
+    async def _get_documents_chunk(self, paths: List[str], field_paths: Optional[List[str]],
+                                   timeout: float) -> Dict[str, DocumentSnapshot]:
+        references = {str(Path(self._collection_name) / Path(path)): path for path in paths}
+        documents = {}
+        async for document in self._db.get_all([self._db.document(ref) for ref in references], field_paths,
+                                               retry=None, timeout=timeout):
+            if document.exists:
+                documents[references[document.reference.path]] = document
+        return documents
+
+    @_instrumented("get_document_by_title")
+    async def get_document_by_title(self, title: str,
+                                    field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
         """
         Get a single document by its Title attribute.
 
         Args:
             title (str): The title of the document to find.
+            field_paths (List[str], optional): Fields to return. All fields are returned by default.
 
         Returns:
             Optional[DocumentSnapshot]: The first document matching the title or None.
         """
         try:
             query = self._db.collection(self._collection_name).where("Title", "==", value=title).limit(1)
-            async for document in query.stream():
-                return document
+            if field_paths:
+                query = query.select(field_paths)
+            # Queries are billed at least one read, whether or not they match.
+            FIRESTORE_READS.labels("get_document_by_title").inc()
+            documents = await self._call("get_document_by_title", lambda timeout: _collect(
+                query.stream(retry=None, timeout=timeout), limit=1), hedged=True)
         except Exception as e:
-            self.logger.log(LogLevel.ERROR, f"Failed to get document by title: {title}")
+            self.logger.log(LogLevel.ERROR, "Failed to get document by title: %s", title)
             raise e
-        return None
+        return documents[0] if documents else None
 
+    @_instrumented("create_document")
     async def create_document(self, path: str, document: dict) -> DocumentSnapshot:
         """
         Creates a new document in Firestore.
@@ -94,15 +380,77 @@ class FirestoreClient(IDocumentDB):
         """
         document_path = str(Path(self._collection_name) / Path(path))
         try:
-            await self._db.document(document_path).create(document)
-            return await self._db.document(document_path).get()
+            reference = self._db.document(document_path)
+            # Not retried: an attempt that timed out may have created the document.
+            await self._call("create_document", lambda timeout: reference.create(document, retry=None, timeout=timeout),
+                             idempotent=False)
+            FIRESTORE_WRITES.labels("create_document").inc()
+            created = await self._call("get_document", lambda timeout: reference.get(retry=None, timeout=timeout))
+            FIRESTORE_READS.labels("create_document").inc()
+            return created
         except Conflict:
-            self.logger.log(LogLevel.ERROR, f"The document already exists at the path {path}")
+            self.logger.log(LogLevel.ERROR, "The document already exists at the path %s", path)
             raise DocumentAlreadyExistsError
+        except RESILIENCE_ERRORS:
+            raise
         except Exception:
-            self.logger.log(LogLevel.ERROR, f"Failed to create the document {document}")
+            self.logger.log(LogLevel.ERROR, "Failed to create the document %s", document)
             raise DocumentWriteError
 
+    @_instrumented("set_documents")
+    async def set_documents(self, documents: Dict[str, dict]) -> None:
+        """
+        Creates or overwrites many documents with batched writes.
+
+        Writes are committed in batches of at most BATCH_WRITE_MAX_SIZE documents. Each batch is atomic.
+
+        Args:
+            documents (Dict[str, dict]): The document data keyed by path relative to the collection.
+
+        Raises:
+            DocumentWriteError: If an error occurs while committing a batch.
+        """
+        items = list(documents.items())
+        for start in range(0, len(items), BATCH_WRITE_MAX_SIZE):
+            batch = self._db.batch()
+            for path, document in items[start:start + BATCH_WRITE_MAX_SIZE]:
+                batch.set(self._db.document(str(Path(self._collection_name) / Path(path))), document)
+            try:
+                await self._call("set_documents", lambda timeout: batch.commit(retry=None, timeout=timeout))
+                FIRESTORE_WRITES.labels("set_documents").inc(len(batch))
+            except RESILIENCE_ERRORS:
+                raise
+            except Exception as e:
+                self.logger.log(LogLevel.ERROR, "Failed to commit a batch of %s documents. Error: %s", len(batch), e)
+                raise DocumentWriteError from e
+
+    @_instrumented("update_document")
+    async def update_document(self, path: str, fields: dict) -> None:
+        """
+        Updates some fields of an existing document, leaving the other fields untouched.
+
+        Args:
+            path (str): The document path relative to the collection.
+            fields (dict): The new field values, keyed by field path.
+
+        Raises:
+            DocumentNotFoundError: If the document does not exist.
+            DocumentWriteError: If an error occurs while updating the document.
+        """
+        document_path = str(Path(self._collection_name) / Path(path))
+        try:
+            reference = self._db.document(document_path)
+            await self._call("update_document", lambda timeout: reference.update(fields, retry=None, timeout=timeout))
+            FIRESTORE_WRITES.labels("update_document").inc()
+        except NotFound:
+            raise DocumentNotFoundError
+        except RESILIENCE_ERRORS:
+            raise
+        except Exception as e:
+            self.logger.log(LogLevel.ERROR, "Failed to update the document at the path %s. Error: %s", path, e)
+            raise DocumentWriteError from e
+
+    @_instrumented("delete_document")
     async def delete_document(self, path: str) -> None:
         """
         Deletes a document from Firestore.
@@ -117,9 +465,13 @@ class FirestoreClient(IDocumentDB):
 
         document_path = str(Path(self._collection_name) / Path(path))
         try:
-            await self._db.document(document_path).delete()
+            reference = self._db.document(document_path)
+            await self._call("delete_document", lambda timeout: reference.delete(retry=None, timeout=timeout))
+            FIRESTORE_WRITES.labels("delete_document").inc()
+        except RESILIENCE_ERRORS:
+            raise
         except Exception as e:
-            self.logger.log(LogLevel.ERROR, f"Failed to get the document. Error: {e}")
+            self.logger.log(LogLevel.ERROR, "Failed to get the document. Error: %s", e)
             raise DocumentDeleteError
 
     async def get_all_documents(self, page_size: int = 10) -> AsyncIterator[DocumentSnapshot]:
@@ -132,28 +484,59 @@ class FirestoreClient(IDocumentDB):
         Yields:
             DocumentSnapshot: Each document in the collection.
         """
-        try:
-            coll_ref = self._db.collection(self._collection_name)
+        query = self._db.collection(self._collection_name).order_by("__name__")
+        async for doc in self._iter_pages("get_all_documents", query, page_size):
+            yield doc
+
+    async def get_documents_after(self, field_path: str, value,
+                                  page_size: int = 10) -> AsyncIterator[DocumentSnapshot]:
+        """
+        Get the documents whose field is greater than a value, ordered by that field.
 
+        Args:
+            field_path (str): The field to filter and order on; it needs a single-field index.
+            value: The value the field must be greater than.
+            page_size (int, optional): Number of documents per page.
+
+        Yields:
+            DocumentSnapshot: Each matching document.
+        """
+        query = (self._db.collection(self._collection_name).where(field_path, ">", value=value)
+                 .order_by(field_path).order_by("__name__"))
+        async for doc in self._iter_pages("get_documents_after", query, page_size):
+            yield doc
+
+    async def _iter_pages(self, operation: str, query, page_size: int) -> AsyncIterator[DocumentSnapshot]:
+        latency = FIRESTORE_LATENCY.labels(operation)
+        reads = FIRESTORE_READS.labels(operation)
+        try:
             cursor = None
             while True:
-                query = coll_ref.order_by("__name__").limit(page_size)
+                page = query.limit(page_size)
                 if cursor:
-                    query = query.start_after(cursor)
-
-                docs = []
-                async for doc in query.stream():
+                    page = page.start_after(cursor)
+
+                # Pages are timed while they are fetched, not while the caller consumes them.
+                with tracer.start_as_current_span(f"FirestoreClient.{operation}") as span, latency.time():
+                    span.set_attribute("db.system", "firestore")
+                    span.set_attribute("db.page_size", page_size)
+                    docs = await self._call(operation, lambda timeout: _collect(page.stream(retry=None,
+                                                                                            timeout=timeout)))
+                    span.set_attribute("db.documents.count", len(docs))
+                reads.inc(max(len(docs), 1))
+                for doc in docs:
                     yield doc
-                    docs.append(doc)
 
                 if len(docs) < page_size:
                     break
 
                 cursor = docs[-1]
         except Exception as e:
-            self.logger.log(LogLevel.ERROR, f"Failed to get documents. Error {e}")
+            FIRESTORE_ERRORS.labels(operation).inc()
+            self.logger.log(LogLevel.ERROR, "Failed to get documents. Error %s", e)
             raise e
 
+    @_instrumented("is_collection_empty")
     async def is_collection_empty(self) -> bool:
         """
         Checks if the Firestore collection is empty.
@@ -163,44 +546,64 @@ class FirestoreClient(IDocumentDB):
         """
         try:
             query = self._db.collection(self._collection_name).limit(1)
-            results = query.stream()
-
-            async for _ in results:
-                return False
-            return True
+            FIRESTORE_READS.labels("is_collection_empty").inc()
+            documents = await self._call("is_collection_empty",
+                                         lambda timeout: _collect(query.stream(retry=None, timeout=timeout)))
+            return not documents
         except Exception as e:
-            self.logger.log(LogLevel.ERROR, f"Failed to query the DB. Error: {e}")
+            self.logger.log(LogLevel.ERROR, "Failed to query the DB. Error: %s", e)
             raise e
 
-    async def get_paginated_documents(self, page_size: int = 10, start_after: str = None) -> Tuple[
-        List[DocumentSnapshot], Optional[str]]:
+    @_instrumented("get_paginated_documents")
+    async def get_paginated_documents(self, page_size: int = 10, start_after: str = None,
+                                      order_by: Optional[str] = None,
+                                      field_paths: Optional[List[str]] = None) -> Tuple[List[DocumentSnapshot],
+                                                                                        Optional[str]]:
         """
-    Get a paginated list of documents from the Firestore collection, ordered by document ID.
+        Get a paginated list of documents from the Firestore collection.
 
-    This method get a group of documents up to the specified page size, starting after
-    a given document ID. It returns the documents with a token
-    for the next page, which can be used to continue pagination.
+        Documents are ordered by `order_by` (if given) and then by document ID. The returned token is
+        opaque and signed: it carries the cursor values of the last document, so the next page is
+        fetched with a single query and no extra document read.
 
-    Args:
-        page_size (int): The maximum number of documents to return.
-        start_after (str, optional): The document ID to start the pagination after.
+        Args:
+            page_size (int): The maximum number of documents to return.
+            start_after (str, optional): The token returned with the previous page.
+            order_by (str, optional): Field to order the documents by, before the document ID.
+            field_paths (List[str], optional): Fields to return, selected by the query. The ordering field
+                                               is selected as well, for the page token.
 
-    Returns:
-        Tuple[List[DocumentSnapshot], Optional[str]]: A tuple containing the list of DocumentSnapshots
-                                                      and an optional ID of the last document. This ID
-                                                      can be used as the `start_after` argument in a
-                                                      next call to paginate through the next set
-                                                      of documents.
-    """
-        query = self._db.collection(self._collection_name).order_by("__name__").limit(page_size)
+        Returns:
+            Tuple[List[DocumentSnapshot], Optional[str]]: A tuple containing the list of DocumentSnapshots
+                                                          and the token of the next page, or None when
+                                                          there are no more documents.
+
+        Raises:
+            InvalidPageTokenError: If `start_after` is not a valid token for this ordering.
+        """
+        fields = [order_by, "__name__"] if order_by and order_by != "__name__" else ["__name__"]
+        query = self._db.collection(self._collection_name)
+        for field in fields:
+            query = query.order_by(field)
+        query = query.limit(page_size)
+        if field_paths:
+            query = query.select(list(dict.fromkeys(field_paths + fields[:-1])))
         if start_after:
-            last_doc = await self._db.collection(self._collection_name).document(start_after).get()
-            if last_doc.exists:
-                query = query.start_after(last_doc)
-        docs = []
-        async for doc in query.stream():
-            docs.append(doc)
-        next_page_token = docs[-1].id if docs else None
+            values = decode_page_token(start_after, fields, self._page_token_secret)
+            query = query.start_after(dict(zip(fields, values)))
+
+        docs = await self._call("get_paginated_documents",
+                                lambda timeout: _collect(query.stream(retry=None, timeout=timeout)))
+        FIRESTORE_READS.labels("get_paginated_documents").inc(max(len(docs), 1))
+        span = current_span()
+        span.set_attribute("db.page_size", page_size)
+        span.set_attribute("db.documents.count", len(docs))
+
+        next_page_token = None
+        if len(docs) == page_size:
+            last = docs[-1]
+            values = [last.id if field == "__name__" else last.get(field) for field in fields]
+            next_page_token = encode_page_token(fields, values, self._page_token_secret)
         return docs, next_page_token
 
 
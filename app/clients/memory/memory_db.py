@@ -0,0 +1,267 @@
+import bisect
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.clients.base_db import IDocumentDB
+from app.clients.page_token import decode_page_token, encode_page_token, require_page_token_secret
+from app.clients.firestore.errors import DocumentAlreadyExistsError, DocumentNotFoundError
+from app.tools.config import Config
+
+
+def _copy(value: Any) -> Any:
+    # Documents only hold JSON-like data, so this is a much cheaper deepcopy.
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # Values of different types are ordered like Firestore does: null, booleans, numbers, timestamps, then strings.
+    if value is None:
+        return 0, 0
+    if isinstance(value, bool):
+        return 1, value
+    if isinstance(value, (int, float)):
+        return 2, value
+    if isinstance(value, datetime):
+        return 3, value
+    if isinstance(value, str):
+        return 4, value
+    return 5, str(value)
+
+
+class MemoryDocumentSnapshot:
+    def __init__(self, document_id: str, data: Optional[dict], create_time: Optional[datetime] = None,
+                 update_time: Optional[datetime] = None) -> None:
+        """
+        Read-only view of a stored document, exposing the subset of the Firestore DocumentSnapshot API
+        used by the repositories.
+        """
+        self.id = document_id
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        return _copy(self._data)
+
+    def get(self, field_path: str) -> Any:
+        return _copy(self._data.get(field_path)) if self._data is not None else None
+
+
+def _project(document: Optional[MemoryDocumentSnapshot],
+             field_paths: Optional[List[str]]) -> Optional[MemoryDocumentSnapshot]:
+    if document is None or field_paths is None:
+        return document
+    return MemoryDocumentSnapshot(document.id, {field: document._data[field] for field in field_paths
+                                                if field in document._data},
+                                  document.create_time, document.update_time)
+
+
+class InMemoryDocumentDB(IDocumentDB):
+    def __init__(self, collection_name: str, page_token_secret: str | None = None) -> None:
+        """
+        Initializes an in-process document store implementing the IDocumentDB interface.
+
+        Document IDs are kept in a sorted list for cursor pagination, Titles in a hash index for exact
+        lookups, and sorted (value, ID) indexes are built on first use for every other ordering field.
+
+        Args:
+            collection_name (str): Name of the collection, for parity with the Firestore client.
+            page_token_secret (str | None): Key used to sign pagination tokens. Defaults to PAGE_TOKEN_SECRET.
+
+        Raises:
+            ValueError: If no pagination token secret is configured.
+        """
+        self._collection_name = collection_name
+        self._page_token_secret = require_page_token_secret(
+            page_token_secret if page_token_secret is not None else Config.PAGE_TOKEN_SECRET())
+        self._documents: Dict[str, MemoryDocumentSnapshot] = {}
+        self._sorted_ids: List[str] = []
+        self._title_index: Dict[Any, Set[str]] = {}
+        self._order_indexes: Dict[str, List[Tuple]] = {}
+
+    async def get_document(self, path: str, field_paths: Optional[List[str]] = None) -> MemoryDocumentSnapshot:
+        """
+        Get a single document by its path, optionally with only some of its fields.
+
+        Raises:
+            DocumentNotFoundError: If the document does not exist.
+        """
+        document = self._documents.get(path)
+        if document is None:
+            raise DocumentNotFoundError
+        return _project(document, field_paths)
+
+    async def get_documents(self, paths: List[str],
+                            field_paths: Optional[List[str]] = None) -> List[Optional[MemoryDocumentSnapshot]]:
+        """
+        Get many documents, in the requested order. Missing documents are returned as None.
+        """
+        return [_project(self._documents.get(path), field_paths) for path in paths]
+
+    async def get_document_by_title(self, title: str,
+                                    field_paths: Optional[List[str]] = None) -> Optional[MemoryDocumentSnapshot]:
+        """
+        Get the document with the lowest ID among the ones matching the title, or None.
+        """
+        ids = self._title_index.get(title)
+        return _project(self._documents[min(ids)], field_paths) if ids else None
+
+    async def create_document(self, path: str, document: dict) -> MemoryDocumentSnapshot:
+        """
+        Creates a new document.
+
+        Raises:
+            DocumentAlreadyExistsError: If a document already exists at the specified path.
+        """
+        if path in self._documents:
+            raise DocumentAlreadyExistsError
+        return self._write(path, document)
+
+    async def set_documents(self, documents: Dict[str, dict]) -> None:
+        """
+        Creates or overwrites many documents.
+        """
+        for path, document in documents.items():
+            self._write(path, document)
+
+    async def update_document(self, path: str, fields: dict) -> None:
+        """
+        Updates some top-level fields of an existing document, leaving the other fields untouched.
+
+        Raises:
+            DocumentNotFoundError: If the document does not exist.
+        """
+        document = self._documents.get(path)
+        if document is None:
+            raise DocumentNotFoundError
+        self._write(path, {**document._data, **fields})
+
+    async def delete_document(self, path: str) -> None:
+        """
+        Deletes a document.
+
+        Raises:
+            DocumentNotFoundError: If the document does not exist.
+        """
+        document = self._documents.pop(path, None)
+        if document is None:
+            raise DocumentNotFoundError
+        self._unindex(document)
+        del self._sorted_ids[bisect.bisect_left(self._sorted_ids, path)]
+
+    async def get_all_documents(self, page_size: int = 10) -> AsyncIterator[MemoryDocumentSnapshot]:
+        """
+        Get all documents, ordered by ID. Writes made while iterating are seen as they would be
+        with a paginated Firestore scan.
+        """
+        position = 0
+        while True:
+            page = self._sorted_ids[position:position + page_size]
+            for document_id in page:
+                document = self._documents.get(document_id)
+                if document is not None:
+                    yield document
+            if len(page) < page_size:
+                break
+            position = bisect.bisect_right(self._sorted_ids, page[-1])
+
+    async def get_documents_after(self, field_path: str, value: Any,
+                                  page_size: int = 10) -> AsyncIterator[MemoryDocumentSnapshot]:
+        """
+        Get the documents whose field is greater than `value`, ordered by that field. Like a Firestore
+        inequality filter, only values of the same type are compared.
+        """
+        after = _sort_key(value)
+        index = self._order_index(field_path)
+        position = bisect.bisect_left(index, (after,))
+        while True:
+            page = index[position:position + page_size]
+            for key, document_id in page:
+                document = self._documents.get(document_id)
+                if document is not None and key[0] == after[0] and key > after:
+                    yield document
+            if len(page) < page_size:
+                break
+            position = bisect.bisect_right(index, page[-1])
+
+    async def is_collection_empty(self) -> bool:
+        return not self._documents
+
+    async def get_paginated_documents(self, page_size: int = 10, start_after: str = None,
+                                      order_by: Optional[str] = None,
+                                      field_paths: Optional[List[str]] = None) -> Tuple[List[MemoryDocumentSnapshot],
+                                                                                        Optional[str]]:
+        """
+        Get a page of documents ordered by `order_by` (if given) and then by ID, with the same opaque
+        page tokens as the Firestore client.
+        """
+        fields = [order_by, "__name__"] if order_by and order_by != "__name__" else ["__name__"]
+        cursor = decode_page_token(start_after, fields, self._page_token_secret) if start_after else None
+
+        if order_by is None or order_by == "__name__":
+            start = bisect.bisect_right(self._sorted_ids, cursor[0]) if cursor else 0
+            ids = self._sorted_ids[start:start + page_size]
+        else:
+            index = self._order_index(order_by)
+            start = bisect.bisect_right(index, (_sort_key(cursor[0]), cursor[1])) if cursor else 0
+            ids = [entry[1] for entry in index[start:start + page_size]]
+
+        docs = [self._documents[document_id] for document_id in ids]
+        next_page_token = None
+        if len(docs) == page_size:
+            last = docs[-1]
+            values = [last.id if field == "__name__" else last.get(field) for field in fields]
+            next_page_token = encode_page_token(fields, values, self._page_token_secret)
+        return [_project(doc, field_paths) for doc in docs], next_page_token
+
+    def _write(self, path: str, document: dict) -> MemoryDocumentSnapshot:
+        now = datetime.now(timezone.utc)
+        previous = self._documents.get(path)
+        if previous is None:
+            bisect.insort(self._sorted_ids, path)
+        else:
+            self._unindex(previous)
+        snapshot = MemoryDocumentSnapshot(path, _copy(document), previous.create_time if previous else now, now)
+        self._documents[path] = snapshot
+        self._index(snapshot)
+        return snapshot
+
+    def _index(self, document: MemoryDocumentSnapshot) -> None:
+        if "Title" in document._data:
+            self._title_index.setdefault(document._data["Title"], set()).add(document.id)
+        for field, index in self._order_indexes.items():
+            if field in document._data:
+                bisect.insort(index, (_sort_key(document._data[field]), document.id))
+
+    def _unindex(self, document: MemoryDocumentSnapshot) -> None:
+        if "Title" in document._data:
+            ids = self._title_index.get(document._data["Title"])
+            ids.discard(document.id)
+            if not ids:
+                del self._title_index[document._data["Title"]]
+        for field, index in self._order_indexes.items():
+            if field in document._data:
+                del index[bisect.bisect_left(index, (_sort_key(document._data[field]), document.id))]
+
+    def _order_index(self, field: str) -> List[Tuple]:
+        # Like Firestore, documents without the ordering field are left out of the results.
+        index = self._order_indexes.get(field)
+        if index is None:
+            index = sorted((_sort_key(document._data[field]), document.id)
+                           for document in self._documents.values() if field in document._data)
+            self._order_indexes[field] = index
+        return index
+
+
+@lru_cache
+def get_memory_db_client(collection_name: str = "movies") -> InMemoryDocumentDB:
+    return InMemoryDocumentDB(collection_name=collection_name)
@@ -0,0 +1,44 @@
+import asyncio
+import itertools
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from app.clients.base_message_service import IMessageService
+from app.tools.config import Config
+
+
+class InMemoryMessageService(IMessageService):
+    def __init__(self, topic_name: str) -> None:
+        """
+        Initializes an in-process message service implementing the IMessageService interface.
+
+        Published messages are kept in memory, in publish order, instead of being sent to Pub/Sub. Meant for
+        local development, CI and load tests together with the memory database backend.
+
+        Args:
+            topic_name (str): Name of the topic, for parity with the Pub/Sub client.
+        """
+        self.topic_name = topic_name
+        self.messages: List[Tuple[Dict[str, Any], str]] = []
+        self._message_ids = itertools.count(1)
+
+    def get_topic_path(self) -> str:
+        return f"memory/topics/{self.topic_name}"
+
+    async def publish(self, message: Dict[str, Any], ordering_key: str = "") -> str:
+        self.messages.append((message, ordering_key))
+        return str(next(self._message_ids))
+
+    def publish_nowait(self, message: Dict[str, Any], ordering_key: str = "") -> asyncio.Future:
+        return asyncio.ensure_future(self.publish(message, ordering_key))
+
+    async def flush(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+@lru_cache
+def get_memory_message_service() -> InMemoryMessageService:
+    return InMemoryMessageService(Config.PUB_SUB_TOPIC_NAME())
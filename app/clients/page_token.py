@@ -0,0 +1,77 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from typing import Any, List
+
+
+class InvalidPageTokenError(ValueError):
+    pass
+
+
+def require_page_token_secret(secret: str | None) -> str:
+    """
+    Check that a key for signing pagination tokens is configured.
+
+    Raises:
+        ValueError: If the secret is missing or empty.
+    """
+    if not secret:
+        raise ValueError("PAGE_TOKEN_SECRET must be set to sign pagination tokens")
+    return secret
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str, secret: str) -> str:
+    return _b64encode(hmac.new(secret.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest()[:16])
+
+
+def encode_page_token(order_by: List[str], values: List[Any], secret: str) -> str:
+    """
+    Build an opaque, signed pagination token.
+
+    Args:
+        order_by (List[str]): The fields the query is ordered by, the document name last.
+        values (List[Any]): The values of those fields in the last document of the page.
+        secret (str): Key used to sign the token.
+
+    Returns:
+        str: The token to pass as `start_after` to get the next page.
+    """
+    payload = _b64encode(json.dumps({"o": order_by, "v": values}, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload, secret)}"
+
+
+def decode_page_token(token: str, order_by: List[str], secret: str) -> List[Any]:
+    """
+    Verify a pagination token and get the cursor values it carries.
+
+    Args:
+        token (str): The token returned with the previous page.
+        order_by (List[str]): The fields the current query is ordered by.
+        secret (str): Key the token was signed with.
+
+    Returns:
+        List[Any]: The cursor values, in the same order as `order_by`.
+
+    Raises:
+        InvalidPageTokenError: If the token is malformed, was tampered with or belongs to another ordering.
+    """
+    payload, _, signature = token.partition(".")
+    if not signature or not hmac.compare_digest(signature, _sign(payload, secret)):
+        raise InvalidPageTokenError("Invalid page token")
+    try:
+        cursor = json.loads(_b64decode(payload))
+    except (ValueError, binascii.Error):
+        raise InvalidPageTokenError("Invalid page token")
+    if cursor.get("o") != order_by or len(cursor.get("v", [])) != len(order_by):
+        raise InvalidPageTokenError("The page token was issued for a different ordering")
+    return cursor["v"]
@@ -1,5 +1,7 @@
+import asyncio
 import json
-from typing import Any, Dict
+import time
+from typing import Any, Dict, Set
 from functools import lru_cache
 
 from google.cloud import pubsub_v1
@@ -9,28 +11,142 @@ from app.tools.tools import get_project_id
 from app.tools.base_logger import ILogger, LogLevel
 from app.tools.config import Config
 from app.clients.base_message_service import IMessageService
+from app.tools.metrics import REGISTRY
+from app.tools.tracing import current_span, traced
+
+_encoder = json.JSONEncoder(separators=(",", ":"))
+
+PUBLISH_LATENCY = REGISTRY.histogram("pubsub_publish_duration_seconds",
+                                     "Time from publish to server acknowledgement, flow control included.")
+PUBLISH_FAILURES = REGISTRY.counter("pubsub_publish_failures_total", "Messages the server failed to accept.")
+
+
+class _FlowControl:
+    def __init__(self, max_messages: int, max_bytes: int) -> None:
+        """
+        Limits the messages and bytes waiting to be acknowledged, making publishers wait instead of blocking
+        the event loop. A single message larger than the byte limit is still let through when nothing else
+        is in flight.
+        """
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.messages = 0
+        self.bytes = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size: int) -> None:
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.messages == 0
+                or (self.messages < self.max_messages and self.bytes + size <= self.max_bytes)
+            )
+            self.messages += 1
+            self.bytes += size
+
+    async def release(self, size: int) -> None:
+        async with self._condition:
+            self.messages -= 1
+            self.bytes -= size
+            self._condition.notify_all()
 
 
 class PubSubClient(IMessageService):
     def __init__(self, logger: ILogger):
         self.project_id = get_project_id()
         self.topic_name = Config.PUB_SUB_TOPIC_NAME()
-        self.publisher = pubsub_v1.PublisherClient()
+        self.enable_ordering = Config.PUB_SUB_ENABLE_ORDERING().lower() == "true"
+        self.publisher = pubsub_v1.PublisherClient(
+            batch_settings=pubsub_v1.types.BatchSettings(
+                max_messages=int(Config.PUB_SUB_BATCH_MAX_MESSAGES()),
+                max_bytes=int(Config.PUB_SUB_BATCH_MAX_BYTES()),
+                max_latency=float(Config.PUB_SUB_BATCH_MAX_LATENCY_SECONDS()),
+            ),
+            publisher_options=pubsub_v1.types.PublisherOptions(enable_message_ordering=self.enable_ordering),
+        )
         self.logger = logger
+        self._flow_control = _FlowControl(
+            max_messages=int(Config.PUB_SUB_FLOW_CONTROL_MAX_MESSAGES()),
+            max_bytes=int(Config.PUB_SUB_FLOW_CONTROL_MAX_BYTES()),
+        )
+        self._pending: Set[asyncio.Future] = set()
 
     def get_topic_path(self) -> str:
         """Generate the full topic path."""
         return self.publisher.topic_path(self.project_id, self.topic_name)
 
-    def publish(self, message: Dict[str, Any]) -> None:
-        """Publish a message to a Pub/Sub topic."""
+    @traced()
+    async def publish(self, message: Dict[str, Any], ordering_key: str = "") -> str:
+        """
+        Publish a message to the Pub/Sub topic without blocking the event loop.
+
+        The message is handed to the client library, which sends it in a batch with other messages,
+        and the coroutine resumes when the server acknowledges it. Publishers wait while the flow
+        control limits are reached.
+
+        Args:
+            message (Dict[str, Any]): The message, serialized as JSON.
+            ordering_key (str): Messages with the same key are delivered in publish order.
+                                Requires PUB_SUB_ENABLE_ORDERING.
+
+        Returns:
+            str: The ID the server assigned to the message.
+
+        Raises:
+            GoogleAPICallError: If the message could not be published.
+        """
         topic_path = self.get_topic_path()
-        message_bytes = json.dumps(message).encode("utf-8")
+        message_bytes = _encoder.encode(message).encode("utf-8")
+        ordering_key = ordering_key if self.enable_ordering else ""
+        span = current_span()
+        span.set_attribute("messaging.system", "gcp_pubsub")
+        span.set_attribute("messaging.destination.name", self.topic_name)
+        span.set_attribute("messaging.message.body.size", len(message_bytes))
+
+        started = time.perf_counter()
+        await self._flow_control.acquire(len(message_bytes))
         try:
-            future = self.publisher.publish(topic_path, message_bytes)
-            future.result()
-        except GoogleAPICallError as e:
-            self.logger.log(LogLevel.ERROR, f"Failed to publish message to topic {self.topic_name}")
+            future = self.publisher.publish(topic_path, message_bytes, ordering_key=ordering_key)
+            message_id = await asyncio.wrap_future(future)
+            PUBLISH_LATENCY.labels().observe(time.perf_counter() - started)
+            span.set_attribute("messaging.message.id", message_id)
+            return message_id
+        except GoogleAPICallError:
+            PUBLISH_FAILURES.labels().inc()
+            self.logger.log(LogLevel.ERROR, "Failed to publish message to topic %s", self.topic_name)
+            if ordering_key:
+                # The library pauses a key after a failure until it is explicitly resumed.
+                self.publisher.resume_publish(topic_path, ordering_key)
+            raise
+        finally:
+            await self._flow_control.release(len(message_bytes))
+
+    def publish_nowait(self, message: Dict[str, Any], ordering_key: str = "") -> asyncio.Future:
+        """
+        Schedule a message to be published and return immediately.
+
+        Returns:
+            asyncio.Future: Resolves with the message ID. Failures are logged, so it does not need to be awaited.
+        """
+        task = asyncio.ensure_future(self.publish(message, ordering_key))
+        self._pending.add(task)
+        task.add_done_callback(self._on_published)
+        return task
+
+    async def flush(self) -> None:
+        """Wait until every message scheduled with publish_nowait is acknowledged or failed."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Flush the pending messages and stop the publisher, sending the open batches."""
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(None, self.publisher.stop)
+
+    def _on_published(self, task: asyncio.Future) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None and \
+                not isinstance(task.exception(), GoogleAPICallError):
+            self.logger.log(LogLevel.ERROR, "Failed to publish message: %s", task.exception())
 
 
 @lru_cache
@@ -0,0 +1,124 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+from app.clients.firestore.errors import DocumentReadError
+from app.clients.firestore.firestore import FirestoreClient
+from app.tools.resilience import CircuitOpenError, DeadlineExceededError, deadline
+
+
+def make_client(monkeypatch, **settings) -> FirestoreClient:
+    settings = {"PAGE_TOKEN_SECRET": "page-secret", "FIRESTORE_RETRY_BASE_DELAY_SECONDS": "0.001", **settings}
+    for name, value in settings.items():
+        monkeypatch.setenv(name, value)
+    with patch("app.clients.firestore.firestore.get_project_id", return_value="project"), \
+            patch("app.clients.firestore.firestore.AsyncClient"):
+        return FirestoreClient("movies", MagicMock())
+
+
+def failing(*results):
+    """
+    An rpc returning (or raising) the given results in turn, and recording the timeouts it was called with.
+    """
+    results = list(results)
+    timeouts = []
+
+    async def rpc(timeout):
+        timeouts.append(timeout)
+        result = results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    rpc.timeouts = timeouts
+    return rpc
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(monkeypatch):
+    client = make_client(monkeypatch)
+    rpc = failing(api_exceptions.ServiceUnavailable("unavailable"), asyncio.TimeoutError(), "document")
+
+    assert await client._call("get_document", rpc) == "document"
+    assert len(rpc.timeouts) == 3
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_after_the_last_attempt(monkeypatch):
+    client = make_client(monkeypatch, FIRESTORE_MAX_ATTEMPTS="2")
+    rpc = failing(api_exceptions.ServiceUnavailable("1"), api_exceptions.ServiceUnavailable("2"), "document")
+
+    with pytest.raises(api_exceptions.ServiceUnavailable, match="2"):
+        await client._call("get_document", rpc)
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_and_permanent_errors_are_not_retried(monkeypatch):
+    client = make_client(monkeypatch)
+
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        await client._call("create_document", failing(api_exceptions.ServiceUnavailable("unavailable"), None),
+                           idempotent=False)
+    with pytest.raises(api_exceptions.PermissionDenied):
+        await client._call("get_document", failing(api_exceptions.PermissionDenied("denied"), None))
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_bounded_by_the_request_deadline(monkeypatch):
+    client = make_client(monkeypatch, FIRESTORE_TIMEOUT_SECONDS="5", FIRESTORE_OPERATION_TIMEOUTS="set_documents=30")
+    rpc = failing(None, None)
+
+    await client._call("set_documents", rpc)
+    with deadline(1):
+        await client._call("set_documents", rpc)
+
+    assert rpc.timeouts[0] == 30
+    assert rpc.timeouts[1] <= 1
+    with deadline(0.001):
+        await asyncio.sleep(0.002)
+        with pytest.raises(DeadlineExceededError):
+            await client._call("get_document", failing(None))
+
+
+@pytest.mark.asyncio
+async def test_slow_reads_are_hedged(monkeypatch):
+    client = make_client(monkeypatch, FIRESTORE_HEDGE_ENABLED="true", FIRESTORE_HEDGE_MIN_DELAY_SECONDS="0.01")
+    for _ in range(50):
+        client._latency_window("get_document").observe(0.001)
+    calls = []
+
+    async def rpc(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+            return "slow"
+        return "hedged"
+
+    assert await asyncio.wait_for(client._call("get_document", rpc, hedged=True), timeout=1) == "hedged"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast(monkeypatch):
+    client = make_client(monkeypatch, FIRESTORE_MAX_ATTEMPTS="1", FIRESTORE_CIRCUIT_FAILURE_THRESHOLD="2")
+    for _ in range(2):
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            await client._call("get_document", failing(api_exceptions.ServiceUnavailable("unavailable")))
+
+    rpc = failing("document")
+    with pytest.raises(CircuitOpenError):
+        await client._call("get_document", rpc)
+    assert rpc.timeouts == []
+
+
+@pytest.mark.asyncio
+async def test_reads_failed_fast_are_not_reported_as_read_errors(monkeypatch):
+    client = make_client(monkeypatch, FIRESTORE_MAX_ATTEMPTS="1", FIRESTORE_CIRCUIT_FAILURE_THRESHOLD="1")
+    client._db.document.return_value.get.side_effect = api_exceptions.ServiceUnavailable("unavailable")
+
+    with pytest.raises(DocumentReadError):
+        await client.get_document("tt1")
+    with pytest.raises(CircuitOpenError):
+        await client.get_document("tt1")
@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.clients.firestore.errors import DocumentAlreadyExistsError, DocumentNotFoundError
+from app.clients.memory.memory_db import InMemoryDocumentDB
+
+
+async def make_db(count: int = 5) -> InMemoryDocumentDB:
+    db = InMemoryDocumentDB("movies", page_token_secret="secret")
+    await db.set_documents({f"tt{i}": {"Title": f"Movie {i % 2}", "Year": str(2000 - i)} for i in range(count)})
+    return db
+
+
+@pytest.mark.asyncio
+async def test_create_get_and_delete_document():
+    db = InMemoryDocumentDB("movies", page_token_secret="secret")
+    assert await db.is_collection_empty()
+
+    created = await db.create_document("tt1", {"Title": "Alien", "Ratings": [{"Source": "IMDb"}]})
+    created.to_dict()["Ratings"][0]["Source"] = "changed"
+
+    assert (await db.get_document("tt1")).to_dict()["Ratings"][0]["Source"] == "IMDb", "Snapshots must be copies."
+    with pytest.raises(DocumentAlreadyExistsError):
+        await db.create_document("tt1", {"Title": "Alien"})
+
+    await db.delete_document("tt1")
+    with pytest.raises(DocumentNotFoundError):
+        await db.get_document("tt1")
+    assert await db.get_document_by_title("Alien") is None
+
+
+@pytest.mark.asyncio
+async def test_update_document_only_changes_the_given_fields():
+    db = await make_db()
+
+    await db.update_document("tt0", {"Title": "Renamed"})
+
+    assert (await db.get_document("tt0")).to_dict() == {"Title": "Renamed", "Year": "2000"}
+    assert (await db.get_document_by_title("Renamed")).id == "tt0"
+    with pytest.raises(DocumentNotFoundError):
+        await db.update_document("tt404", {"Title": "Missing"})
+
+
+@pytest.mark.asyncio
+async def test_get_document_by_title_uses_the_title_index():
+    db = await make_db()
+    await db.set_documents({"tt0": {"Title": "Renamed", "Year": "2000"}})
+
+    assert (await db.get_document_by_title("Movie 0")).id == "tt2"
+    assert (await db.get_document_by_title("Renamed")).id == "tt0"
+
+
+@pytest.mark.asyncio
+async def test_get_documents_preserves_order_and_projects_fields():
+    db = await make_db()
+
+    documents = await db.get_documents(["tt3", "tt404", "tt1"], field_paths=["Year"])
+
+    assert [document.to_dict() if document else None for document in documents] == [
+        {"Year": "1997"}, None, {"Year": "1999"}
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("order_by, expected", [
+    (None, ["tt0", "tt1", "tt2", "tt3", "tt4"]),
+    ("Year", ["tt4", "tt3", "tt2", "tt1", "tt0"]),
+])
+async def test_get_paginated_documents(order_by, expected):
+    db = await make_db()
+
+    ids, token = [], None
+    while True:
+        docs, token = await db.get_paginated_documents(page_size=2, start_after=token, order_by=order_by)
+        ids += [doc.id for doc in docs]
+        if token is None:
+            break
+
+    assert ids == expected
+
+
+@pytest.mark.asyncio
+async def test_get_paginated_documents_projects_fields_and_keeps_paging():
+    db = await make_db()
+
+    docs, token = await db.get_paginated_documents(page_size=2, order_by="Year", field_paths=["Title"])
+    next_docs, _ = await db.get_paginated_documents(page_size=2, start_after=token, order_by="Year",
+                                                    field_paths=["Title"])
+
+    assert [doc.to_dict() for doc in docs] == [{"Title": "Movie 0"}, {"Title": "Movie 1"}]
+    assert [doc.id for doc in next_docs] == ["tt2", "tt1"]
+
+
+@pytest.mark.asyncio
+async def test_get_all_documents_pages_through_the_collection():
+    db = await make_db(7)
+
+    ids = [document.id async for document in db.get_all_documents(page_size=3)]
+
+    assert ids == [f"tt{i}" for i in range(7)]
+
+
+@pytest.mark.asyncio
+async def test_get_documents_after_filters_and_orders_on_the_field():
+    db = InMemoryDocumentDB("movies", page_token_secret="secret")
+    await db.set_documents({
+        "tt1": {"_updated_at": datetime(2024, 1, 3, tzinfo=timezone.utc)},
+        "tt2": {"_updated_at": datetime(2024, 1, 1, tzinfo=timezone.utc)},
+        "tt3": {"_updated_at": datetime(2024, 1, 2, tzinfo=timezone.utc)},
+        "tt4": {"_updated_at": "2024-01-04"},
+        "tt5": {"Title": "Never written with the field"},
+    })
+    await db.set_documents({"tt2": {"_updated_at": datetime(2024, 1, 4, tzinfo=timezone.utc)}})
+
+    ids = [document.id async for document in
+           db.get_documents_after("_updated_at", datetime(2024, 1, 1, tzinfo=timezone.utc), page_size=1)]
+
+    assert ids == ["tt3", "tt1", "tt2"]
+
+
+def test_client_requires_a_page_token_secret(monkeypatch):
+    monkeypatch.delenv("PAGE_TOKEN_SECRET", raising=False)
+    monkeypatch.setenv("TOKEN_SECRET_KEY", "jwt-secret")
+
+    with pytest.raises(ValueError):
+        InMemoryDocumentDB("movies")
@@ -0,0 +1,24 @@
+import pytest
+
+from app.clients.factory import get_message_service
+from app.clients.memory.message_service import InMemoryMessageService
+
+
+@pytest.mark.asyncio
+async def test_publish_keeps_messages_in_order():
+    service = InMemoryMessageService("topic")
+
+    first = await service.publish({"Status": "Empty"})
+    second = await service.publish_nowait({"Status": "Full"}, ordering_key="movies")
+
+    assert (first, second) == ("1", "2")
+    assert service.messages == [({"Status": "Empty"}, ""), ({"Status": "Full"}, "movies")]
+
+
+def test_memory_database_backend_defaults_to_memory_messages(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "memory")
+    monkeypatch.delenv("MESSAGE_BACKEND", raising=False)
+    get_message_service.cache_clear()
+
+    assert isinstance(get_message_service(None), InMemoryMessageService)
+    get_message_service.cache_clear()
@@ -0,0 +1,29 @@
+import pytest
+
+from app.clients.page_token import InvalidPageTokenError, decode_page_token, encode_page_token
+
+
+def test_page_token_round_trip():
+    token = encode_page_token(["Year", "__name__"], ["1983", "tt0086250"], "secret")
+
+    assert decode_page_token(token, ["Year", "__name__"], "secret") == ["1983", "tt0086250"]
+
+
+def test_page_token_rejects_tampering():
+    token = encode_page_token(["__name__"], ["tt0086250"], "secret")
+    payload, signature = token.split(".")
+    forged = encode_page_token(["__name__"], ["tt9999999"], "other").split(".")[0]
+
+    with pytest.raises(InvalidPageTokenError):
+        decode_page_token(f"{forged}.{signature}", ["__name__"], "secret")
+    with pytest.raises(InvalidPageTokenError):
+        decode_page_token(token, ["__name__"], "another-secret")
+    with pytest.raises(InvalidPageTokenError):
+        decode_page_token("tt0086250", ["__name__"], "secret")
+
+
+def test_page_token_rejects_other_ordering():
+    token = encode_page_token(["__name__"], ["tt0086250"], "secret")
+
+    with pytest.raises(InvalidPageTokenError):
+        decode_page_token(token, ["Title", "__name__"], "secret")
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.clients.pub_sub.pub_sub import PubSubClient
+
+
+def make_client(monkeypatch, **settings) -> PubSubClient:
+    for name, value in settings.items():
+        monkeypatch.setenv(name, value)
+    with patch("app.clients.pub_sub.pub_sub.get_project_id", return_value="project"), \
+            patch("app.clients.pub_sub.pub_sub.pubsub_v1.PublisherClient"):
+        return PubSubClient(MagicMock())
+
+
+def resolve_later(future: Future, message_id: str) -> None:
+    threading.Timer(0.01, future.set_result, [message_id]).start()
+
+
+@pytest.mark.asyncio
+async def test_publish_resolves_without_blocking(monkeypatch):
+    client = make_client(monkeypatch)
+
+    def publish(topic, data, ordering_key=""):
+        future = Future()
+        resolve_later(future, "id-1")
+        return future
+
+    client.publisher.publish.side_effect = publish
+
+    message_id = await client.publish({"Status": "Empty"})
+
+    assert message_id == "id-1"
+    client.publisher.publish.assert_called_once()
+    assert client.publisher.publish.call_args.args[1] == b'{"Status":"Empty"}'
+
+
+@pytest.mark.asyncio
+async def test_flow_control_limits_messages_in_flight(monkeypatch):
+    client = make_client(monkeypatch, PUB_SUB_FLOW_CONTROL_MAX_MESSAGES="2")
+    futures = []
+    client.publisher.publish.side_effect = lambda *args, **kwargs: futures.append(Future()) or futures[-1]
+
+    tasks = [client.publish_nowait({"n": n}) for n in range(3)]
+    await asyncio.sleep(0.01)
+    assert len(futures) == 2, "The third message should wait for flow control."
+
+    futures[0].set_result("id-0")
+    await asyncio.sleep(0.01)
+    for future in futures[1:]:
+        future.set_result("id")
+    await client.flush()
+
+    assert [task.result() for task in tasks] == ["id-0", "id", "id"]
@@ -0,0 +1,256 @@
+import asyncio
+from functools import cached_property
+from typing import Optional, Set
+
+from app.auth.tokens import get_token_verifier
+from app.auth.utils import PasswordHasher, get_password_hasher
+from app.clients.base_db import IDocumentDB
+from app.clients.base_message_service import IMessageService
+from app.clients.factory import get_document_db, get_message_service
+from app.indexes.catalog import MovieCatalog
+from app.indexes.facets import FacetIndex
+from app.indexes.inverted import InvertedIndex
+from app.indexes.prefix import TitlePrefixIndex
+from app.indexes.store import CompactMovieStore
+from app.repositories.movies.batched_repository import BatchedMovieRepository
+from app.repositories.movies.cached_repository import CachedMovieRepository
+from app.repositories.movies.indexed_repository import IndexedMovieRepository
+from app.repositories.movies.repository import IMovieRepository, MovieRepository
+from app.repositories.users.repository import UserRepository
+from app.services.movies.bulk_import import MovieImporter
+from app.services.movies.encoder import MovieEncoder
+from app.services.movies.service import MovieService
+from app.services.users.service import UserService
+from app.tools.base_logger import ILogger, LogLevel
+from app.tools.jobs import JobRunner
+from app.tools.metrics import monitor_event_loop_lag
+from app.tools.settings import Settings
+from app.tools.tracing import create_span_exporter, tracer
+
+
+class Container:
+    def __init__(self, settings: Settings) -> None:
+        """
+        Builds the application components on first use and owns their lifecycle.
+
+        Nothing is constructed when the container is created: the logger, the database and message
+        clients (and the google.cloud modules behind them) are only created when a request or a
+        startup step needs them, so importing the application stays cheap and forking servers
+        create their clients in each worker.
+
+        Args:
+            settings (Settings): The resolved application settings.
+        """
+        self.settings = settings
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    @cached_property
+    def logger(self) -> ILogger:
+        from app.tools.logger import APPLogger
+        return APPLogger()
+
+    @cached_property
+    def movies_db(self) -> IDocumentDB:
+        return get_document_db(self.logger, self.settings.movies_collection_name, self.settings.db_backend)
+
+    @cached_property
+    def users_db(self) -> IDocumentDB:
+        return get_document_db(self.logger, self.settings.users_collection_name, self.settings.db_backend)
+
+    @cached_property
+    def message_service(self) -> IMessageService:
+        return get_message_service(self.logger, self.settings.message_backend)
+
+    @cached_property
+    def title_index(self) -> TitlePrefixIndex:
+        return TitlePrefixIndex()
+
+    @cached_property
+    def search_index(self) -> InvertedIndex:
+        return InvertedIndex()
+
+    @cached_property
+    def facet_index(self) -> FacetIndex:
+        return FacetIndex()
+
+    @cached_property
+    def movie_store(self) -> Optional[CompactMovieStore]:
+        return CompactMovieStore() if self.settings.movie_store_enabled else None
+
+    @cached_property
+    def movie_catalog(self) -> Optional[MovieCatalog]:
+        if not self.settings.catalog_snapshot_path:
+            return None
+        return MovieCatalog(self.settings.catalog_snapshot_path, max_age=self.settings.catalog_snapshot_max_age_seconds)
+
+    @cached_property
+    def batched_movie_repository(self) -> BatchedMovieRepository:
+        return BatchedMovieRepository(MovieRepository(self.movies_db),
+                                      max_batch_size=self.settings.movies_batch_max_size,
+                                      window=self.settings.movies_batch_window_seconds)
+
+    @cached_property
+    def cached_movie_repository(self) -> CachedMovieRepository:
+        settings = self.settings
+        repository: IMovieRepository = MovieRepository(self.movies_db)
+        if settings.movies_batching_enabled:
+            repository = self.batched_movie_repository
+        return CachedMovieRepository(
+            repository,
+            logger=self.logger,
+            max_size=settings.movies_cache_max_size,
+            ttl=settings.movies_cache_ttl_seconds,
+            negative_ttl=settings.movies_cache_negative_ttl_seconds,
+            stale_ttl=settings.movies_cache_stale_seconds,
+            refresh_timeout=settings.movies_cache_refresh_timeout_seconds,
+            shared_cache_path=settings.movies_shared_cache_path or None,
+            shared_cache_size=settings.movies_shared_cache_size_mb * 1024 * 1024,
+            shared_cache_slot_size=settings.movies_shared_cache_slot_bytes,
+        )
+
+    @cached_property
+    def movie_repository(self) -> IndexedMovieRepository:
+        settings = self.settings
+        repository: IMovieRepository = MovieRepository(self.movies_db)
+        if settings.movies_cache_enabled:
+            repository = self.cached_movie_repository
+        elif settings.movies_batching_enabled:
+            repository = self.batched_movie_repository
+        indexes = [self.title_index, self.search_index, self.facet_index]
+        if self.movie_store is not None:
+            indexes.append(self.movie_store)
+        return IndexedMovieRepository(repository, indexes, self.logger, catalog=self.movie_catalog)
+
+    @cached_property
+    def movie_service(self) -> MovieService:
+        return MovieService(self.movie_repository, self.message_service, self.logger,
+                            title_index=self.title_index, search_index=self.search_index,
+                            facet_index=self.facet_index, movie_store=self.movie_store)
+
+    @cached_property
+    def movie_encoder(self) -> MovieEncoder:
+        return MovieEncoder(max_size=self.settings.encoded_movies_cache_size)
+
+    @cached_property
+    def movie_importer(self) -> MovieImporter:
+        return MovieImporter(self.movie_repository, self.logger, batch_size=self.settings.import_batch_size,
+                             max_concurrency=self.settings.import_max_concurrency)
+
+    @cached_property
+    def job_runner(self) -> JobRunner:
+        settings = self.settings
+        return JobRunner(self.logger, max_workers=settings.job_max_workers, max_attempts=settings.job_max_attempts,
+                         retry_base_delay=settings.job_retry_base_delay_seconds,
+                         result_ttl=settings.job_result_ttl_seconds)
+
+    @cached_property
+    def password_hasher(self) -> PasswordHasher:
+        return get_password_hasher()
+
+    @cached_property
+    def user_service(self) -> UserService:
+        return UserService(UserRepository(self.users_db), self.logger, self.password_hasher)
+
+    async def startup(self) -> None:
+        """
+        Validate the token keys, configure tracing, start building (then reconciling) the movie indexes and
+        sampling the event loop lag in the background and, when enabled, warm up the database and message
+        clients.
+
+        Raises:
+            ValueError: If the token or tracing settings are invalid.
+        """
+        get_token_verifier()
+        if self.settings.trace_sample_rate > 0:
+            tracer.configure(self.settings.trace_sample_rate,
+                             create_span_exporter(self.settings.trace_exporter, self.settings.trace_file_path,
+                                                  self.settings.trace_max_spans))
+        self._run_in_background(self._build_indexes())
+        if self.settings.event_loop_lag_interval_seconds > 0:
+            self._run_in_background(monitor_event_loop_lag(self.settings.event_loop_lag_interval_seconds))
+        if self.settings.warm_up_enabled:
+            await self.warm_up()
+
+    async def warm_up(self) -> None:
+        """
+        Create the services and clients and open the database connection with one cheap read, so the
+        first request does not pay for it. Failures are logged, the clients connect again on first use.
+        """
+        try:
+            self.movie_service, self.movie_importer, self.user_service
+            self.message_service.get_topic_path()
+            await asyncio.wait_for(self.movies_db.is_collection_empty(),
+                                   timeout=self.settings.warm_up_timeout_seconds)
+        except Exception as e:
+            self.logger.log(LogLevel.WARNING, "Connection warm-up failed. Error: %s", e)
+
+    async def shutdown(self) -> None:
+        """
+        Stop the background work, save the movie catalog and release the clients that were created.
+        """
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        if "movie_repository" in self.__dict__ and self.movie_catalog is not None:
+            await self._save_catalog()
+            self.movie_catalog.close()
+        if "job_runner" in self.__dict__:
+            await self.job_runner.shutdown()
+        if "batched_movie_repository" in self.__dict__:
+            await self.batched_movie_repository.shutdown()
+        if "cached_movie_repository" in self.__dict__:
+            self.cached_movie_repository.close()
+        if "message_service" in self.__dict__:
+            await self.message_service.close()
+        if "password_hasher" in self.__dict__:
+            self.password_hasher.shutdown()
+        tracer.shutdown()
+
+    async def _build_indexes(self) -> None:
+        # Built after startup so the instance can serve requests while the collection is scanned
+        try:
+            await self.movie_repository.build_indexes(page_size=self.settings.index_build_page_size)
+        except Exception:
+            return  # Already logged; the search endpoints keep answering 503
+        catalog = self.movie_catalog
+        if catalog is not None and catalog.snapshot is not None and self.settings.catalog_snapshot_interval_seconds > 0:
+            self._run_in_background(self._refresh_catalog())
+        await self._reconcile_facets()
+
+    async def _reconcile_facets(self) -> None:
+        # Other instances' writes only reach the counters of this one through these periodic recounts
+        interval = self.settings.stats_reconcile_interval_seconds
+        while interval > 0:
+            await asyncio.sleep(interval)
+            try:
+                await self.movie_repository.reconcile_facets(self.facet_index,
+                                                             page_size=self.settings.index_build_page_size)
+            except Exception as e:
+                self.logger.log(LogLevel.ERROR, "Failed to reconcile movie facets. Error: %s", e)
+
+    async def _refresh_catalog(self) -> None:
+        # Other instances' writes are read from the database since the last refresh, and the catalog saved
+        interval = self.settings.catalog_snapshot_interval_seconds
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.movie_repository.catch_up_catalog(page_size=self.settings.index_build_page_size)
+            except Exception as e:
+                self.logger.log(LogLevel.ERROR, "Failed to catch up the movie catalog. Error: %s", e)
+                continue
+            await self._save_catalog()
+
+    async def _save_catalog(self) -> None:
+        if self.movie_catalog.snapshot is None:
+            return  # Neither loaded nor built yet: it does not hold the whole collection
+        try:
+            await self.movie_repository.save_catalog()
+        except Exception as e:
+            self.logger.log(LogLevel.ERROR, "Failed to save the movie catalog. Error: %s", e)
+
+    def _run_in_background(self, coroutine) -> asyncio.Task:
+        task = asyncio.ensure_future(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
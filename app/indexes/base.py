@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+
+class IMovieIndex(ABC):
+    @abstractmethod
+    def add(self, movie: dict):
+        pass
+
+    @abstractmethod
+    def remove(self, movie_id: str):
+        pass
+
+    def add_many(self, movies: Iterable[dict]):
+        for movie in movies:
+            self.add(movie)
@@ -0,0 +1,280 @@
+import asyncio
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import orjson
+
+from app.indexes.base import IMovieIndex
+
+_MAGIC = b"MOVCAT01"
+# Magic, watermark (seconds since the epoch), number of movies, offset of the ID index
+_HEADER = struct.Struct("<8sdQQ")
+# Offset of the record, length of the movie ID, length of the record (the ID then the JSON data)
+_ENTRY = struct.Struct("<QHI")
+
+
+class CatalogSnapshot:
+    def __init__(self, path: str) -> None:
+        """
+        Opens a catalog snapshot file, mapped in memory: records are only read when a movie is looked up
+        or iterated, so opening takes the same time whatever the size of the catalog.
+
+        The file holds a header, one record per movie (its ID followed by its JSON data) in ID order, and
+        an index of fixed-size entries pointing at the records, searched by bisection.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not a complete catalog snapshot.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{path} is not a catalog snapshot")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.watermark, self._count, self._index_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or self._index_offset + self._count * _ENTRY.size != size:
+            self._map.close()
+            raise ValueError(f"{path} is not a complete catalog snapshot")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[dict]:
+        return (orjson.loads(data) for _, data in self.records())
+
+    def get(self, movie_id: str) -> Optional[dict]:
+        key = movie_id.encode()
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset, id_length, length = self._entry(middle)
+            found = self._map[offset:offset + id_length]
+            if found == key:
+                return orjson.loads(self._map[offset + id_length:offset + length])
+            if found < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def records(self) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Iterate over the encoded movies in ID order, as (ID, JSON data) pairs.
+        """
+        for position in range(self._count):
+            offset, id_length, length = self._entry(position)
+            yield self._map[offset:offset + id_length], self._map[offset + id_length:offset + length]
+
+    def close(self) -> None:
+        self._map.close()
+
+    def _entry(self, position: int) -> Tuple[int, int, int]:
+        return _ENTRY.unpack_from(self._map, self._index_offset + position * _ENTRY.size)
+
+
+class SnapshotWriter:
+    def __init__(self, path: str, watermark: float) -> None:
+        """
+        Writes a catalog snapshot, one movie at a time in increasing ID order, to a temporary file that
+        replaces the snapshot at `path` on commit. Processes still reading the previous file keep their copy.
+
+        Args:
+            path (str): The snapshot file.
+            watermark (float): Time, in seconds since the epoch, up to which the snapshot holds every write.
+        """
+        self.path = path
+        self.watermark = watermark
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, self._temporary = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory)
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(bytes(_HEADER.size))
+        self._offset = _HEADER.size
+        self._index = bytearray()
+        self._count = 0
+        self._last: Optional[bytes] = None
+
+    def add(self, movie: dict) -> None:
+        movie_id = movie.get("imdbID")
+        if movie_id:
+            self.add_record(movie_id.encode(), orjson.dumps(movie))
+
+    def add_many(self, movies: Iterable[dict]) -> None:
+        for movie in movies:
+            self.add(movie)
+
+    def add_record(self, movie_id: bytes, data: bytes) -> None:
+        """
+        Raises:
+            ValueError: If the movie ID is not greater than the previous one.
+        """
+        if self._last is not None and movie_id <= self._last:
+            raise ValueError(f"Catalog snapshot records must be written in increasing ID order, "
+                             f"got {movie_id!r} after {self._last!r}")
+        self._file.write(movie_id)
+        self._file.write(data)
+        self._index += _ENTRY.pack(self._offset, len(movie_id), len(movie_id) + len(data))
+        self._offset += len(movie_id) + len(data)
+        self._count += 1
+        self._last = movie_id
+
+    def commit(self) -> CatalogSnapshot:
+        """
+        Write the index and the header, flush the file to disk and move it in place.
+
+        Returns:
+            CatalogSnapshot: The new snapshot, opened.
+        """
+        try:
+            self._file.write(self._index)
+            self._file.seek(0)
+            self._file.write(_HEADER.pack(_MAGIC, self.watermark, self._count, self._offset))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self._temporary, self.path)
+        except BaseException:
+            self.abort()
+            raise
+        return CatalogSnapshot(self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.remove(self._temporary)
+        except FileNotFoundError:
+            pass
+
+
+def _write_snapshot(path: str, records: Iterable[Tuple[bytes, bytes]], watermark: float) -> CatalogSnapshot:
+    writer = SnapshotWriter(path, watermark)
+    try:
+        for movie_id, data in records:
+            writer.add_record(movie_id, data)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.commit()
+
+
+def _merge(snapshot: Optional[CatalogSnapshot], changes: Dict[str, Optional[dict]]) -> Iterator[Tuple[bytes, bytes]]:
+    # The changes are encoded right away: the records may be consumed in another thread while they change
+    changed = {movie_id.encode() for movie_id in changes}
+    updated = sorted((movie_id.encode(), orjson.dumps(movie)) for movie_id, movie in changes.items()
+                     if movie is not None)
+    kept = ((movie_id, data) for movie_id, data in (snapshot.records() if snapshot else ())
+            if movie_id not in changed)
+    return heapq.merge(kept, updated)
+
+
+class MovieCatalog(IMovieIndex):
+    def __init__(self, path: str, max_age: float) -> None:
+        """
+        Initializes a copy of the whole movie catalog kept on local disk, from which a new instance builds
+        its indexes instead of scanning the collection, then reads only the movies written since the copy
+        was saved.
+
+        The catalog is the last snapshot file, memory-mapped, plus the movies written or deleted since
+        then, held in memory until the next save merges them into a new snapshot.
+
+        Args:
+            path (str): The snapshot file.
+            max_age (float): Seconds after which a snapshot is too old to be loaded; the collection is then
+                             scanned again, which also drops the movies deleted by other instances.
+        """
+        self.path = path
+        self.max_age = max_age
+        self.snapshot: Optional[CatalogSnapshot] = None
+        # Time, in seconds since the epoch, up to which the catalog holds every write
+        self.watermark: Optional[float] = None
+        # Movies written since the snapshot, None for the deleted ones
+        self._changes: Dict[str, Optional[dict]] = {}
+
+    def __iter__(self) -> Iterator[dict]:
+        return (orjson.loads(data) for _, data in _merge(self.snapshot, self._changes))
+
+    def add(self, movie: dict) -> None:
+        movie_id = movie.get("imdbID")
+        if movie_id:
+            self._changes[movie_id] = movie
+
+    def remove(self, movie_id: str) -> None:
+        self._changes[movie_id] = None
+
+    def get(self, movie_id: str) -> Optional[dict]:
+        if movie_id in self._changes:
+            return self._changes[movie_id]
+        return self.snapshot.get(movie_id) if self.snapshot else None
+
+    def load(self) -> bool:
+        """
+        Open the snapshot file, unless it is missing or too old.
+
+        Returns:
+            bool: True if the snapshot was loaded.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not a complete catalog snapshot.
+        """
+        try:
+            snapshot = CatalogSnapshot(self.path)
+        except FileNotFoundError:
+            return False
+        if time.time() - snapshot.watermark > self.max_age:
+            snapshot.close()
+            return False
+        self._replace(snapshot)
+        self.watermark = snapshot.watermark
+        return True
+
+    def writer(self, watermark: float) -> SnapshotWriter:
+        """
+        Start a snapshot written from a scan of the collection, to be installed once the scan is done.
+        """
+        return SnapshotWriter(self.path, watermark)
+
+    async def install(self, writer: SnapshotWriter) -> None:
+        """
+        Commit a snapshot written from a scan of the collection and make it the catalog. Movies written
+        during the scan are kept in memory, as the scan may have read an older version of them.
+        """
+        self._replace(await asyncio.to_thread(writer.commit))
+        self.watermark = writer.watermark
+
+    async def save(self) -> int:
+        """
+        Merge the changes into a new snapshot file, written in a thread, then forget the changes it holds.
+
+        Returns:
+            int: The number of movies in the new snapshot.
+
+        Raises:
+            ValueError: If no snapshot was loaded or built, as the catalog then lacks most movies.
+        """
+        if self.snapshot is None:
+            raise ValueError("The movie catalog was neither loaded nor built")
+        changes = dict(self._changes)
+        snapshot = await asyncio.to_thread(_write_snapshot, self.path, _merge(self.snapshot, changes),
+                                           self.watermark)
+        self._replace(snapshot)
+        for movie_id, movie in changes.items():
+            # Unless written again while the snapshot was written
+            if movie_id in self._changes and self._changes[movie_id] is movie:
+                del self._changes[movie_id]
+        return len(snapshot)
+
+    def close(self) -> None:
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def _replace(self, snapshot: CatalogSnapshot) -> None:
+        previous, self.snapshot = self.snapshot, snapshot
+        if previous is not None:
+            previous.close()
@@ -0,0 +1,110 @@
+import sys
+from collections import Counter
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from app.indexes.base import IMovieIndex
+
+# Movie fields counted by value. Genre holds a comma-separated list and counts once per genre.
+FACET_FIELDS = ("Genre", "Type", "Year", "Rated")
+_MULTI_VALUED = {"Genre"}
+# Placeholder OMDb uses for unknown values; such values are not counted.
+_UNKNOWN = "N/A"
+
+
+def _facet_values(field: str, value) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    values = str(value).split(",") if field in _MULTI_VALUED else [str(value)]
+    # Interned: the same few hundred values are shared by every movie
+    return tuple(dict.fromkeys(sys.intern(item.strip()) for item in values
+                               if item.strip() and item.strip() != _UNKNOWN))
+
+
+class FacetIndex(IMovieIndex):
+    def __init__(self, fields: Tuple[str, ...] = FACET_FIELDS) -> None:
+        """
+        Initializes in-memory counters of the movies per value of a few fields (genre, type, year, rating).
+
+        Every write adjusts the counters of the movie's old and new values, so the totals are read
+        without touching the database. The values of each movie are kept to undo its previous counts
+        on updates and deletes.
+
+        Args:
+            fields (Tuple[str, ...]): The movie fields to count.
+        """
+        self._fields = fields
+        self._movies: Dict[str, Tuple[Tuple[str, ...], ...]] = {}
+        self._counts: Dict[str, Counter] = {field: Counter() for field in fields}
+        self._stats: Optional[dict] = None
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+    def movie_ids(self) -> Set[str]:
+        return set(self._movies)
+
+    def add(self, movie: dict) -> None:
+        """
+        Count a movie, replacing its previous counts if it was already counted.
+        """
+        movie_id = movie.get("imdbID")
+        if not movie_id:
+            return
+        self.remove(movie_id)
+        values = tuple(_facet_values(field, movie.get(field)) for field in self._fields)
+        self._movies[movie_id] = values
+        for field, field_values in zip(self._fields, values):
+            self._counts[field].update(field_values)
+        self._stats = None
+
+    def remove(self, movie_id: str) -> None:
+        values = self._movies.pop(movie_id, None)
+        if values is None:
+            return
+        for field, field_values in zip(self._fields, values):
+            counts = self._counts[field]
+            for value in field_values:
+                counts[value] -= 1
+                if not counts[value]:
+                    del counts[value]
+        self._stats = None
+
+    def stats(self) -> dict:
+        """
+        Get the number of movies and, per field, the number of movies per value, most common first.
+        The result is computed once after each write and shared between readers, so it must not be changed.
+        """
+        if self._stats is None:
+            self._stats = {
+                "total": len(self._movies),
+                "facets": {field: dict(counts.most_common()) for field, counts in self._counts.items()},
+            }
+        return self._stats
+
+    def reconcile(self, scanned: "FacetIndex", keep: Iterable[str]) -> int:
+        """
+        Replace the counters with the ones of a fresh scan of the collection.
+
+        Args:
+            scanned (FacetIndex): An index built from a scan of the collection.
+            keep (Iterable[str]): IDs written while the collection was scanned; their current counts are
+                                  newer than the scanned ones and are kept.
+
+        Returns:
+            int: The number of movies whose counts differed from the scan.
+        """
+        for movie_id in keep:
+            if movie_id in self._movies:
+                scanned._movies[movie_id] = self._movies[movie_id]
+            else:
+                scanned._movies.pop(movie_id, None)
+        drift = sum(1 for movie_id, values in scanned._movies.items() if self._movies.get(movie_id) != values)
+        drift += sum(1 for movie_id in self._movies if movie_id not in scanned._movies)
+
+        self._movies = scanned._movies
+        self._counts = {field: Counter() for field in self._fields}
+        for values in self._movies.values():
+            for field, field_values in zip(self._fields, values):
+                self._counts[field].update(field_values)
+        self._stats = None
+        return drift
@@ -0,0 +1,142 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from app.indexes.base import IMovieIndex
+from app.indexes.text import tokenize
+
+# Weight of a term occurrence in each indexed field.
+FIELD_BOOSTS = {
+    "Title": 3.0,
+    "Actors": 2.0,
+    "Director": 2.0,
+    "Writer": 1.5,
+    "Genre": 1.5,
+    "Plot": 1.0,
+}
+# Maximum number of results returned by a single search.
+MAX_RESULTS = 100
+
+STOP_WORDS = frozenset(
+    "a about an and are as at be by for from in into is it movie movies of on or the to with".split()
+)
+
+_YEAR = re.compile(r"\d{4}")
+
+
+def _parse_year(value: Optional[str]) -> Optional[int]:
+    match = _YEAR.search(value or "")
+    return int(match.group()) if match else None
+
+
+class InvertedIndex(IMovieIndex):
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        """
+        Initializes an in-memory inverted index over the text fields of the movies, ranked with BM25.
+
+        Term frequencies are weighted by FIELD_BOOSTS before BM25 saturation, so a match in the title
+        counts more than a match in the plot.
+
+        Args:
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._lengths: Dict[str, float] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._filters: Dict[str, Tuple[Optional[str], Optional[int]]] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, movie: dict) -> None:
+        """
+        Index a movie, replacing its previous entry if it was already indexed.
+        """
+        movie_id = movie.get("imdbID")
+        if not movie_id:
+            return
+        if movie_id in self._lengths:
+            self.remove(movie_id)
+
+        frequencies = Counter()
+        for field, boost in FIELD_BOOSTS.items():
+            for term in tokenize(movie.get(field) or ""):
+                frequencies[term] += boost
+        length = sum(frequencies.values())
+
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[movie_id] = frequency
+        self._terms[movie_id] = list(frequencies)
+        self._lengths[movie_id] = length
+        self._filters[movie_id] = ((movie.get("Type") or "").lower() or None, _parse_year(movie.get("Year")))
+        self._total_length += length
+
+    def remove(self, movie_id: str) -> None:
+        terms = self._terms.pop(movie_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[movie_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(movie_id)
+        del self._filters[movie_id]
+
+    def search(self, query: str, movie_type: Optional[str] = None, year_from: Optional[int] = None,
+               year_to: Optional[int] = None, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Get the movies that best match a free-text query.
+
+        Args:
+            query (str): The words to look for in the title, people, genre and plot.
+            movie_type (str, optional): Only return movies of this Type (movie, series, episode).
+            year_from (int, optional): Only return movies released this year or later.
+            year_to (int, optional): Only return movies released this year or earlier.
+            limit (int): Maximum number of results, up to MAX_RESULTS.
+
+        Returns:
+            List[Tuple[str, float]]: The movie IDs and their scores, best match first.
+        """
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term not in STOP_WORDS]
+        if not terms or not self._lengths:
+            return []
+
+        count = len(self._lengths)
+        average_length = self._total_length / count or 1
+        movie_type = movie_type.lower() if movie_type else None
+        scores: Dict[str, float] = {}
+        rejected = set()
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for movie_id, frequency in postings.items():
+                if movie_id in rejected:
+                    continue
+                if movie_id not in scores and not self._matches(movie_id, movie_type, year_from, year_to):
+                    rejected.add(movie_id)
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[movie_id] / average_length)
+                scores[movie_id] = scores.get(movie_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        limit = min(limit, MAX_RESULTS)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+    def _matches(self, movie_id: str, movie_type: Optional[str], year_from: Optional[int],
+                 year_to: Optional[int]) -> bool:
+        indexed_type, year = self._filters[movie_id]
+        if movie_type is not None and indexed_type != movie_type:
+            return False
+        if year_from is not None and (year is None or year < year_from):
+            return False
+        if year_to is not None and (year is None or year > year_to):
+            return False
+        return True
@@ -0,0 +1,140 @@
+import bisect
+import heapq
+import itertools
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.indexes.base import IMovieIndex
+from app.indexes.text import normalize, parse_number
+
+# Maximum number of suggestions returned by a single query.
+MAX_SUGGESTIONS = 20
+# Prefix ranges larger than this are ranked once and cached until the next write.
+SCAN_LIMIT = 2048
+# Removed entries are purged once they outnumber the live ones (and at least this many are dead).
+COMPACT_MIN_DEAD = 1024
+# Recently added entries are kept in a small sorted list and merged into the main one past this size.
+MERGE_PENDING_SIZE = 4096
+
+
+class _IndexedTitle(NamedTuple):
+    title: str
+    year: Optional[str]
+    votes: float
+    version: int
+    key_count: int
+
+
+class TitlePrefixIndex(IMovieIndex):
+    def __init__(self) -> None:
+        """
+        Initializes an in-memory prefix index over movie titles.
+
+        Titles are normalized (case-folded, accents stripped) and indexed at the start of every word,
+        so "godf" matches "The Godfather". Keys live in a sorted list searched with bisect, and the
+        matches are ranked by imdbVotes. New keys go to a small pending list that is merged into the
+        main list in one pass once it grows, and removing a movie only drops its version, leaving its
+        entries as tombstones that queries skip and compaction purges. Writes never shift the main list.
+        """
+        self._entries: List[Tuple[str, str, int]] = []
+        self._pending: List[Tuple[str, str, int]] = []
+        self._pending_sorted = True
+        self._dead = 0
+        self._versions = itertools.count()
+        self._movies: Dict[str, _IndexedTitle] = {}
+        self._top_cache: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+    def add(self, movie: dict) -> None:
+        """
+        Index a movie, replacing its previous entry if it was already indexed.
+        """
+        movie_id = movie.get("imdbID")
+        title = movie.get("Title")
+        if not movie_id or not title:
+            return
+        if movie_id in self._movies:
+            self.remove(movie_id)
+
+        words = normalize(title).split()
+        version = next(self._versions)
+        self._movies[movie_id] = _IndexedTitle(title, movie.get("Year"), parse_number(movie.get("imdbVotes")),
+                                               version, len(words))
+        entries = [(" ".join(words[position:]), movie_id, version) for position in range(len(words))]
+        if self._pending_sorted and len(self._pending) < MERGE_PENDING_SIZE:
+            for entry in entries:
+                bisect.insort(self._pending, entry)
+        else:
+            # Bulk loads are appended and sorted once before the next query, so they stay linear.
+            self._pending.extend(entries)
+            self._pending_sorted = False
+        self._top_cache.clear()
+
+    def remove(self, movie_id: str) -> None:
+        movie = self._movies.pop(movie_id, None)
+        if movie is None:
+            return
+        self._dead += movie.key_count
+        self._top_cache.clear()
+        if self._dead >= COMPACT_MIN_DEAD and self._dead * 2 > len(self._entries) + len(self._pending):
+            self._compact()
+
+    def suggest(self, query: str, limit: int = 10) -> List[dict]:
+        """
+        Get the most voted movies with a title word starting with the query.
+
+        Args:
+            query (str): The text typed so far.
+            limit (int): Maximum number of suggestions, up to MAX_SUGGESTIONS.
+
+        Returns:
+            List[dict]: The imdbID, Title and Year of the matching movies, most voted first.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+
+        top = self._top_cache.get(prefix)
+        if top is None:
+            self._ensure_sorted()
+            candidates = set()
+            scanned = 0
+            for entries in (self._entries, self._pending):
+                low = bisect.bisect_left(entries, (prefix,))
+                high = bisect.bisect_left(entries, (prefix + "\U0010ffff",))
+                candidates.update(movie_id for _, movie_id, version in entries[low:high]
+                                  if self._is_live(movie_id, version))
+                scanned += high - low
+            top = heapq.nlargest(MAX_SUGGESTIONS, candidates,
+                                 key=lambda movie_id: (self._movies[movie_id].votes, movie_id))
+            if scanned > SCAN_LIMIT:
+                self._top_cache[prefix] = top
+
+        return [
+            {"imdbID": movie_id, "Title": self._movies[movie_id].title, "Year": self._movies[movie_id].year}
+            for movie_id in top[:limit]
+        ]
+
+    def _ensure_sorted(self) -> None:
+        if len(self._pending) > MERGE_PENDING_SIZE:
+            # Timsort merges the two sorted runs in linear time.
+            self._pending.sort()
+            self._entries += self._pending
+            self._entries.sort()
+            self._pending = []
+            self._pending_sorted = True
+        elif not self._pending_sorted:
+            self._pending.sort()
+            self._pending_sorted = True
+
+    def _is_live(self, movie_id: str, version: int) -> bool:
+        movie = self._movies.get(movie_id)
+        return movie is not None and movie.version == version
+
+    def _compact(self) -> None:
+        # Filtering keeps the relative order, so sorted lists stay sorted.
+        self._entries = [entry for entry in self._entries if self._is_live(entry[1], entry[2])]
+        self._pending = [entry for entry in self._pending if self._is_live(entry[1], entry[2])]
+        self._dead = 0
@@ -0,0 +1,247 @@
+from array import array
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+from app.indexes.base import IMovieIndex
+from app.models.movies import Movie
+
+# Fields with few distinct values shared by many movies, stored once and referenced by code. The
+# multi-valued ones (e.g. "Drama, Crime") are stored whole, as the combinations repeat as well.
+CATEGORICAL_FIELDS = ("Genre", "Rated", "Type", "Language", "Country")
+# Free text, kept UTF-8 encoded in a single buffer shared by every movie.
+TEXT_FIELDS = ("Title", "Released", "Runtime", "Director", "Writer", "Actors", "Plot", "Awards", "Poster", "DVD",
+               "BoxOffice", "Production", "Website")
+# The text of removed or replaced movies is dropped from the buffer once it outweighs the live text
+# (and at least this many bytes are dead).
+COMPACT_MIN_GARBAGE = 1 << 20
+# Placeholder OMDb uses for unknown values.
+_UNKNOWN = "N/A"
+
+
+class _Vocabulary:
+    def __init__(self) -> None:
+        # Code 0 stands for a missing value
+        self.values: List[Any] = [None]
+        self._codes: Dict[Any, int] = {}
+
+    def code(self, value: Any) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _CategoricalColumn:
+    def __init__(self) -> None:
+        self.vocabulary = _Vocabulary()
+        # Two bytes per movie, widened to four once there are more distinct values
+        self.codes = array("H")
+
+    def set(self, row: int, value: Any) -> None:
+        code = self.vocabulary.code(value)
+        if code > 0xFFFF and self.codes.typecode == "H":
+            self.codes = array("I", self.codes)
+        _store(self.codes, row, code)
+
+    def get(self, row: int) -> Any:
+        return self.vocabulary.values[self.codes[row]]
+
+
+class _NumericColumn:
+    def __init__(self, typecode: str, parse: Callable[[str], int], format: Callable[[int], str]) -> None:
+        """
+        A column of parsed numbers, from which the original strings are formatted back. The few values
+        that are missing, unknown, or not formatted back to the same string are flagged, the latter kept
+        aside as they are.
+        """
+        self.values = array(typecode)
+        self._missing = (1 << 8 * self.values.itemsize) - 1
+        self._unknown = self._missing - 1
+        self._other = self._missing - 2
+        self._parse = parse
+        self._format = format
+        self._others: Dict[int, Any] = {}
+
+    def set(self, row: int, value: Any) -> None:
+        self._others.pop(row, None)
+        if value is None:
+            number = self._missing
+        elif value == _UNKNOWN:
+            number = self._unknown
+        else:
+            try:
+                number = self._parse(value)
+            except (AttributeError, OverflowError, TypeError, ValueError):
+                number = None
+            if number is None or not 0 <= number < self._other or self._format(number) != value:
+                number = self._other
+                self._others[row] = value
+        _store(self.values, row, number)
+
+    def get(self, row: int) -> Any:
+        number = self.values[row]
+        if number < self._other:
+            return self._format(number)
+        if number == self._other:
+            return self._others[row]
+        return _UNKNOWN if number == self._unknown else None
+
+    def clear(self, row: int) -> None:
+        self._others.pop(row, None)
+
+
+def _store(column: array, row: int, value: int) -> None:
+    if row == len(column):
+        column.append(value)
+    else:
+        column[row] = value
+
+
+def _parse_rating(value: str) -> int:
+    return round(float(value) * 10)
+
+
+def _format_rating(number: int) -> str:
+    return f"{number / 10:.1f}"
+
+
+def _parse_votes(value: str) -> int:
+    return int(value.replace(",", ""))
+
+
+def _format_votes(number: int) -> str:
+    return f"{number:,}"
+
+
+class CompactMovieStore(IMovieIndex):
+    def __init__(self) -> None:
+        """
+        Initializes an in-memory store of the whole movie catalog, laid out in columns rather than one
+        object per movie, for catalogs of millions of movies to fit in memory.
+
+        Categorical fields are stored as codes into a table of their distinct values, the numeric ones
+        (Year, imdbRating, imdbVotes, Metascore) as parsed numbers in typed arrays, and the free text and
+        ratings of each movie as one JSON record in a shared byte buffer. A movie is only rebuilt, as a
+        dict or a Movie, when it is read. Fields that are not part of the Movie model are not kept.
+
+        Rows of removed movies are reused, and the buffer is compacted once replaced records outweigh
+        the live ones.
+        """
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._categorical = {field: _CategoricalColumn() for field in CATEGORICAL_FIELDS}
+        # Ratings in tenths; Metascores range from 0 to 100
+        self._numeric = {
+            "Year": _NumericColumn("H", int, str),
+            "imdbRating": _NumericColumn("H", _parse_rating, _format_rating),
+            "imdbVotes": _NumericColumn("I", _parse_votes, _format_votes),
+            "Metascore": _NumericColumn("B", int, str),
+        }
+        self._responses = array("b")
+        self._rating_sources = _Vocabulary()
+        self._text = bytearray()
+        self._text_offsets = array("Q")
+        self._text_lengths = array("I")
+        self._garbage = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, movie_id: str) -> bool:
+        return movie_id in self._rows
+
+    def add(self, movie: dict) -> None:
+        """
+        Store a movie, replacing its previous version if it was already stored.
+        """
+        movie_id = movie.get("imdbID")
+        if not movie_id:
+            return
+        row = self._rows.get(movie_id)
+        if row is None:
+            row = self._free.pop() if self._free else len(self._ids)
+            if row == len(self._ids):
+                self._ids.append(movie_id)
+            else:
+                self._ids[row] = movie_id
+            self._rows[movie_id] = row
+        else:
+            self._garbage += self._text_lengths[row]
+
+        for field, column in self._categorical.items():
+            column.set(row, movie.get(field))
+        for field, column in self._numeric.items():
+            column.set(row, movie.get(field))
+        response = movie.get("Response")
+        _store(self._responses, row, -1 if response is None else int(bool(response)))
+
+        ratings = movie.get("Ratings")
+        if ratings is not None:
+            ratings = [[self._rating_sources.code(rating.get("Source")), rating.get("Value")] for rating in ratings]
+        record = orjson.dumps([*(movie.get(field) for field in TEXT_FIELDS), ratings])
+        _store(self._text_offsets, row, len(self._text))
+        _store(self._text_lengths, row, len(record))
+        self._text += record
+        self._compact_if_needed()
+
+    def remove(self, movie_id: str) -> None:
+        row = self._rows.pop(movie_id, None)
+        if row is None:
+            return
+        self._ids[row] = None
+        self._free.append(row)
+        self._garbage += self._text_lengths[row]
+        for column in self._numeric.values():
+            column.clear(row)
+        self._compact_if_needed()
+
+    def get_data(self, movie_id: str) -> Optional[dict]:
+        """
+        Rebuild the fields of a stored movie.
+
+        Returns:
+            Optional[dict]: Every field of the Movie model, or None if the movie is not stored.
+        """
+        row = self._rows.get(movie_id)
+        if row is None:
+            return None
+        offset = self._text_offsets[row]
+        *texts, ratings = orjson.loads(self._text[offset:offset + self._text_lengths[row]])
+        data = dict(zip(TEXT_FIELDS, texts))
+        for field, column in self._categorical.items():
+            data[field] = column.get(row)
+        for field, column in self._numeric.items():
+            data[field] = column.get(row)
+        if ratings is not None:
+            ratings = [{"Source": self._rating_sources.values[source], "Value": value} for source, value in ratings]
+        response = self._responses[row]
+        data.update(Ratings=ratings, imdbID=movie_id, Response=None if response < 0 else bool(response))
+        return data
+
+    def get(self, movie_id: str) -> Optional[Movie]:
+        """
+        Rebuild a stored movie as a Movie model.
+
+        Raises:
+            ValidationError: If the stored fields are not a valid movie.
+        """
+        data = self.get_data(movie_id)
+        return Movie.from_dict(data) if data is not None else None
+
+    def _compact_if_needed(self) -> None:
+        if self._garbage < COMPACT_MIN_GARBAGE or self._garbage < len(self._text) - self._garbage:
+            return
+        text = bytearray()
+        for row, movie_id in enumerate(self._ids):
+            if movie_id is None:
+                continue
+            offset = self._text_offsets[row]
+            self._text_offsets[row] = len(text)
+            text += self._text[offset:offset + self._text_lengths[row]]
+        self._text = text
+        self._garbage = 0
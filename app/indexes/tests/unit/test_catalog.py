@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from app.indexes.catalog import CatalogSnapshot, MovieCatalog, SnapshotWriter
+
+
+def write_snapshot(path, movies, watermark=None) -> CatalogSnapshot:
+    writer = SnapshotWriter(str(path), time.time() if watermark is None else watermark)
+    writer.add_many(movies)
+    return writer.commit()
+
+
+def test_snapshot_finds_and_iterates_the_movies_written(tmp_path):
+    movies = [{"imdbID": f"tt{i}", "Title": f"Movie {i}", "Ratings": [{"Source": "IMDb"}]} for i in range(10)]
+
+    snapshot = write_snapshot(tmp_path / "catalog", movies, watermark=1234.5)
+
+    assert len(snapshot) == 10
+    assert snapshot.watermark == 1234.5
+    assert list(snapshot) == movies
+    assert snapshot.get("tt7") == movies[7]
+    assert snapshot.get("tt70") is None
+    assert list(tmp_path.iterdir()) == [tmp_path / "catalog"]
+
+
+def test_snapshot_records_must_be_written_in_id_order(tmp_path):
+    writer = SnapshotWriter(str(tmp_path / "catalog"), 0)
+    writer.add({"imdbID": "tt2"})
+
+    with pytest.raises(ValueError):
+        writer.add({"imdbID": "tt1"})
+    writer.abort()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_truncated_snapshot_is_rejected(tmp_path):
+    write_snapshot(tmp_path / "catalog", [{"imdbID": "tt1"}])
+    data = (tmp_path / "catalog").read_bytes()
+    (tmp_path / "catalog").write_bytes(data[:-1])
+
+    with pytest.raises(ValueError):
+        CatalogSnapshot(str(tmp_path / "catalog"))
+
+
+def test_catalog_only_loads_recent_snapshots(tmp_path):
+    catalog = MovieCatalog(str(tmp_path / "catalog"), max_age=60)
+    assert not catalog.load()
+
+    write_snapshot(tmp_path / "catalog", [{"imdbID": "tt1"}], watermark=time.time() - 120)
+    assert not catalog.load()
+
+    write_snapshot(tmp_path / "catalog", [{"imdbID": "tt1"}], watermark=time.time() - 30)
+    assert catalog.load()
+    assert catalog.get("tt1") == {"imdbID": "tt1"}
+
+
+@pytest.mark.asyncio
+async def test_save_merges_the_changes_into_a_new_snapshot(tmp_path):
+    write_snapshot(tmp_path / "catalog", [{"imdbID": f"tt{i}", "Title": "Old"} for i in range(4)])
+    catalog = MovieCatalog(str(tmp_path / "catalog"), max_age=60)
+    catalog.load()
+    catalog.add({"imdbID": "tt1", "Title": "New"})
+    catalog.add({"imdbID": "tt9", "Title": "Added"})
+    catalog.remove("tt2")
+    assert catalog.get("tt2") is None
+
+    assert await catalog.save() == 4
+
+    expected = [{"imdbID": "tt0", "Title": "Old"}, {"imdbID": "tt1", "Title": "New"},
+                {"imdbID": "tt3", "Title": "Old"}, {"imdbID": "tt9", "Title": "Added"}]
+    assert list(catalog) == expected
+    assert catalog._changes == {}
+    assert list(CatalogSnapshot(str(tmp_path / "catalog"))) == expected
+
+
+@pytest.mark.asyncio
+async def test_changes_made_while_saving_are_kept(tmp_path, monkeypatch):
+    write_snapshot(tmp_path / "catalog", [])
+    catalog = MovieCatalog(str(tmp_path / "catalog"), max_age=60)
+    catalog.load()
+    catalog.add({"imdbID": "tt1", "Title": "Saved"})
+    catalog.add({"imdbID": "tt2", "Title": "Saved"})
+    to_thread = asyncio.to_thread
+
+    async def write_then_change(function, *args):
+        snapshot = await to_thread(function, *args)
+        catalog.add({"imdbID": "tt2", "Title": "Written during the save"})
+        return snapshot
+
+    monkeypatch.setattr(asyncio, "to_thread", write_then_change)
+    await catalog.save()
+
+    assert list(catalog._changes) == ["tt2"]
+    assert [movie["Title"] for movie in catalog] == ["Saved", "Written during the save"]
+
+
+@pytest.mark.asyncio
+async def test_catalog_without_snapshot_cannot_be_saved(tmp_path):
+    catalog = MovieCatalog(str(tmp_path / "catalog"), max_age=60)
+    catalog.add({"imdbID": "tt1"})
+
+    with pytest.raises(ValueError):
+        await catalog.save()
@@ -0,0 +1,26 @@
+from app.indexes.facets import FacetIndex
+
+
+def test_counts_follow_adds_updates_and_removes():
+    index = FacetIndex()
+    index.add({"imdbID": "tt1", "Genre": "Drama, Crime", "Type": "movie", "Year": "1972", "Rated": "R"})
+    index.add({"imdbID": "tt2", "Genre": "Crime", "Type": "movie", "Year": "1974", "Rated": "N/A"})
+    index.add({"imdbID": "tt2", "Genre": "Crime, Drama", "Type": "movie", "Year": "1974", "Rated": "R"})
+    index.add({"imdbID": "tt3", "Genre": "Comedy", "Type": "series", "Year": "1999", "Rated": None})
+    index.remove("tt3")
+
+    assert index.stats() == {
+        "total": 2,
+        "facets": {"Genre": {"Drama": 2, "Crime": 2}, "Type": {"movie": 2}, "Year": {"1972": 1, "1974": 1},
+                   "Rated": {"R": 2}},
+    }
+
+
+def test_stats_are_recomputed_after_a_write():
+    index = FacetIndex()
+    index.add({"imdbID": "tt1", "Type": "movie"})
+    first = index.stats()
+
+    assert index.stats() is first
+    index.remove("tt1")
+    assert index.stats() == {"total": 0, "facets": {"Genre": {}, "Type": {}, "Year": {}, "Rated": {}}}
@@ -0,0 +1,46 @@
+from app.indexes.inverted import InvertedIndex
+
+
+def make_index() -> InvertedIndex:
+    index = InvertedIndex()
+    index.add_many([
+        {"imdbID": "tt1", "Title": "Apollo 13", "Year": "1995", "Type": "movie", "Actors": "Tom Hanks, Bill Paxton",
+         "Director": "Ron Howard", "Genre": "Adventure, Drama", "Plot": "NASA must devise a strategy to return "
+                                                                        "Apollo 13 to Earth from space."},
+        {"imdbID": "tt2", "Title": "Cast Away", "Year": "2000", "Type": "movie", "Actors": "Tom Hanks, Helen Hunt",
+         "Director": "Robert Zemeckis", "Genre": "Adventure, Drama", "Plot": "A FedEx executive is stranded."},
+        {"imdbID": "tt3", "Title": "Gravity", "Year": "2013", "Type": "movie", "Actors": "Sandra Bullock",
+         "Director": "Alfonso Cuarón", "Genre": "Drama, Sci-Fi", "Plot": "Two astronauts are lost in space."},
+        {"imdbID": "tt4", "Title": "From the Earth to the Moon", "Year": "1998", "Type": "series",
+         "Actors": "Tom Hanks", "Plot": "The story of the Apollo space program."},
+    ])
+    return index
+
+
+def test_search_ranks_matches_on_all_terms_first():
+    index = make_index()
+
+    results = [movie_id for movie_id, _ in index.search("movies with Tom Hanks about space")]
+
+    assert results[0] in {"tt1", "tt4"}
+    assert set(results) == {"tt1", "tt2", "tt3", "tt4"}
+    assert results.index("tt3") > results.index("tt1")
+
+
+def test_search_applies_filters():
+    index = make_index()
+
+    assert [movie_id for movie_id, _ in index.search("tom hanks", movie_type="series")] == ["tt4"]
+    assert [movie_id for movie_id, _ in index.search("tom hanks", year_from=1999)] == ["tt2"]
+    assert {movie_id for movie_id, _ in index.search("space", year_to=1998)} == {"tt1", "tt4"}
+
+
+def test_remove_and_update_keep_the_index_in_sync():
+    index = make_index()
+
+    index.remove("tt3")
+    index.add({"imdbID": "tt2", "Title": "Cast Away", "Year": "2000", "Type": "movie", "Plot": "Stranded."})
+
+    assert index.search("gravity") == []
+    assert {movie_id for movie_id, _ in index.search("hanks")} == {"tt1", "tt4"}
+    assert len(index) == 3
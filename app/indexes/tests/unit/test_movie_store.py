@@ -0,0 +1,69 @@
+from app.indexes import store as store_module
+from app.indexes.store import CompactMovieStore
+from app.models.movies import Movie
+
+
+def make_movie(movie_id: str, **fields) -> dict:
+    movie = {name: None for name in Movie.model_fields}
+    movie.update({
+        "imdbID": movie_id, "Title": "The Godfather", "Year": "1972", "Rated": "R", "Released": "24 Mar 1972",
+        "Runtime": "175 min", "Genre": "Crime, Drama", "Director": "Francis Ford Coppola",
+        "Actors": "Marlon Brando, Al Pacino", "Plot": "The aging patriarch of an organized crime dynasty...",
+        "Language": "English, Italian, Latin", "Country": "United States", "Metascore": "100",
+        "imdbRating": "9.2", "imdbVotes": "1,997,651", "Type": "movie", "Response": True,
+        "Ratings": [{"Source": "Internet Movie Database", "Value": "9.2/10"},
+                    {"Source": "Metacritic", "Value": "100/100"}],
+    })
+    movie.update(fields)
+    return movie
+
+
+def test_movies_are_rebuilt_as_they_were_stored():
+    store = CompactMovieStore()
+    movie = make_movie("tt0068646")
+    store.add(movie)
+
+    assert store.get_data("tt0068646") == movie
+    assert store.get("tt0068646") == Movie.from_dict(movie)
+    assert store.get("tt404") is None
+
+
+def test_values_that_do_not_parse_back_are_kept_as_they_are():
+    store = CompactMovieStore()
+    odd = {"Year": "2005–2010", "imdbRating": "10", "imdbVotes": "N/A", "Metascore": None, "Genre": None,
+           "Ratings": None, "Response": False}
+    store.add(make_movie("tt1", **odd))
+
+    data = store.get_data("tt1")
+
+    assert {field: data[field] for field in odd} == odd
+
+
+def test_movies_are_replaced_and_removed():
+    store = CompactMovieStore()
+    store.add(make_movie("tt1"))
+    store.add(make_movie("tt2"))
+    store.add(make_movie("tt1", Title="The Godfather Part II", Year="1974"))
+    store.remove("tt2")
+    store.add(make_movie("tt3", Year="1990"))
+
+    assert len(store) == 2
+    assert "tt2" not in store
+    assert store.get_data("tt2") is None
+    assert (store.get_data("tt1")["Title"], store.get_data("tt1")["Year"]) == ("The Godfather Part II", "1974")
+    assert store.get_data("tt3")["Year"] == "1990"
+
+
+def test_replaced_text_is_compacted(monkeypatch):
+    monkeypatch.setattr(store_module, "COMPACT_MIN_GARBAGE", 0)
+    store = CompactMovieStore()
+    store.add(make_movie("tt1"))
+    store.add(make_movie("tt2"))
+    size = len(store._text)
+
+    for _ in range(3):
+        store.add(make_movie("tt1", Plot="Another plot"))
+    store.remove("tt2")
+
+    assert len(store._text) < size
+    assert store.get_data("tt1")["Plot"] == "Another plot"
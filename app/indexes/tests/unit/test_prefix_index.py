@@ -0,0 +1,53 @@
+from app.indexes import prefix
+from app.indexes.prefix import TitlePrefixIndex
+from app.indexes.text import normalize
+
+
+def make_index() -> TitlePrefixIndex:
+    index = TitlePrefixIndex()
+    index.add_many([
+        {"imdbID": "tt1", "Title": "The Godfather", "Year": "1972", "imdbVotes": "2,000,000"},
+        {"imdbID": "tt2", "Title": "The Godfather Part II", "Year": "1974", "imdbVotes": "1,300,000"},
+        {"imdbID": "tt3", "Title": "Amélie", "Year": "2001", "imdbVotes": "780,000"},
+        {"imdbID": "tt4", "Title": "Godzilla", "Year": "2014", "imdbVotes": "N/A"},
+    ])
+    return index
+
+
+def test_normalize_strips_case_accents_and_punctuation():
+    assert normalize("  Amélie: LE Fabuleux-Destin ") == "amelie le fabuleux destin"
+
+
+def test_suggest_matches_word_prefixes_ranked_by_votes():
+    index = make_index()
+
+    assert [movie["imdbID"] for movie in index.suggest("GOD")] == ["tt1", "tt2", "tt4"]
+    assert [movie["imdbID"] for movie in index.suggest("godfather part")] == ["tt2"]
+    assert index.suggest("ame") == [{"imdbID": "tt3", "Title": "Amélie", "Year": "2001"}]
+    assert index.suggest("god", limit=1)[0]["Title"] == "The Godfather"
+    assert index.suggest("  ") == []
+
+
+def test_add_and_remove_update_suggestions(monkeypatch):
+    monkeypatch.setattr(prefix, "SCAN_LIMIT", 0)
+    index = make_index()
+    assert [movie["imdbID"] for movie in index.suggest("god")] == ["tt1", "tt2", "tt4"]
+
+    index.remove("tt1")
+    index.add({"imdbID": "tt4", "Title": "Godzilla", "Year": "2014", "imdbVotes": "5,000,000"})
+
+    assert [movie["imdbID"] for movie in index.suggest("god")] == ["tt4", "tt2"]
+    assert len(index) == 3
+
+
+def test_removed_entries_are_compacted(monkeypatch):
+    monkeypatch.setattr(prefix, "COMPACT_MIN_DEAD", 2)
+    index = make_index()
+    index.suggest("god")
+
+    index.remove("tt2")
+    index.add({"imdbID": "tt3", "Title": "Amelie", "Year": "2001", "imdbVotes": "780,000"})
+
+    assert len(index._entries) + len(index._pending) == 4, "Tombstones of the removed titles should be purged."
+    assert [movie["imdbID"] for movie in index.suggest("god")] == ["tt1", "tt4"]
+    assert index.suggest("amel")[0]["Title"] == "Amelie"
@@ -0,0 +1,28 @@
+import re
+import unicodedata
+from typing import List, Optional
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Case-fold a text, strip accents and collapse punctuation and whitespace to single spaces.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALPHANUMERIC.sub(" ", stripped).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+def parse_number(value: Optional[str]) -> float:
+    """
+    Parse OMDb numbers such as "905,144", "8.3" or "N/A", returning 0 when the value is missing.
+    """
+    try:
+        return float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,18 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class ImportFailure(BaseModel):
+    line: int
+    imdbID: Optional[str]
+    error: str
+
+
+class ImportReport(BaseModel):
+    rows: int
+    written: int
+    unchanged: int
+    failed: int
+    failures: List[ImportFailure]
+    elapsed_seconds: float
+    rows_per_second: float
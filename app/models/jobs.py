@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Any, Optional
+from pydantic import BaseModel
+
+
+class JobStatus(BaseModel):
+    id: str
+    key: str
+    status: str
+    attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -1,5 +1,5 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 
 
 class Rating(BaseModel):
@@ -37,3 +37,30 @@ class Movie(BaseModel):
     @classmethod
     def from_dict(cls, data: dict):
         return cls(**data)
+
+
+class MovieIdsRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class MoviesByIds(BaseModel):
+    # One entry per requested id, in request order; null when the movie was not found
+    items: List[Optional[Movie]]
+    not_found: List[str]
+
+
+class TitleSuggestion(BaseModel):
+    imdbID: str
+    Title: str
+    Year: Optional[str]
+
+
+class SearchHit(BaseModel):
+    score: float
+    movie: Movie
+
+
+class CatalogStats(BaseModel):
+    total: int
+    # Number of movies per value of Genre, Type, Year and Rated, most common first
+    facets: Dict[str, Dict[str, int]]
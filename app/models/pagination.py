@@ -1,10 +1,14 @@
-from typing import Generic, List, Optional, TypeVar
+from typing import Generic, List, Literal, Optional, TypeVar
 from pydantic.generics import GenericModel
 
 T = TypeVar('T')
 
+# Fields a page can be ordered by, besides the document ID
+SortableField = Literal["Title", "Year", "Released", "imdbID"]
+
 
 class Page(GenericModel, Generic[T]):
     items: List[T]
+    # Opaque, signed cursor to pass back as `start_after`; null on the last page
     next_page_token: Optional[str]
     page_size: int
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Tuple
+
+from app.clients.firestore.errors import DocumentNotFoundError
+from app.models.movies import Movie
+from app.repositories.movies.repository import IMovieRepository
+from app.tools.loader import DataLoader
+
+if TYPE_CHECKING:
+    from google.cloud.firestore_v1 import DocumentSnapshot
+
+
+class BatchedMovieRepository(IMovieRepository):
+    def __init__(self, repository: IMovieRepository, max_batch_size: int = 100, window: float = 0) -> None:
+        """
+        Initializes a repository merging concurrent lookups by ID into batched reads of another repository.
+
+        Concurrent lookups of the same movie share one read, and lookups of different movies made within
+        the batching window are read together with get_movies_by_ids. Projected lookups (with field_paths)
+        and the other methods go straight to the repository.
+
+        Args:
+            repository (IMovieRepository): The repository the batched reads are made on.
+            max_batch_size (int): Maximum number of movies per batched read.
+            window (float): Seconds to wait for more lookups before reading. Zero batches the lookups made
+                            during the same event loop iteration.
+        """
+        self.repository = repository
+        self._loader: DataLoader[str, Optional[DocumentSnapshot]] = DataLoader(
+            "movies_by_id", repository.get_movies_by_ids, max_batch_size=max_batch_size, window=window)
+
+    async def get_all_movies(self, page_size: int = 10, start_after: str = None,
+                             order_by: Optional[str] = None) -> Tuple[List[Movie], Optional[str]]:
+        return await self.repository.get_all_movies(page_size=page_size, start_after=start_after,
+                                                   order_by=order_by)
+
+    async def get_movie_page(self, page_size: int = 10, start_after: str = None, order_by: Optional[str] = None,
+                             field_paths: Optional[List[str]] = None) -> Tuple[List[DocumentSnapshot], Optional[str]]:
+        return await self.repository.get_movie_page(page_size=page_size, start_after=start_after,
+                                                   order_by=order_by, field_paths=field_paths)
+
+    def iter_all_movies(self, page_size: int = 500) -> AsyncIterator[dict]:
+        return self.repository.iter_all_movies(page_size=page_size)
+
+    def iter_movies_updated_since(self, since: datetime, page_size: int = 500) -> AsyncIterator[dict]:
+        return self.repository.iter_movies_updated_since(since, page_size=page_size)
+
+    async def get_movie_by_id(self, movie_id: str,
+                              field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
+        """
+        Get a movie by ID, in a batched read shared with the concurrent lookups.
+
+        Raises:
+            DocumentNotFoundError: If the movie does not exist.
+        """
+        if field_paths is not None:
+            return await self.repository.get_movie_by_id(movie_id, field_paths=field_paths)
+        document = await self._loader.load(movie_id)
+        if document is None:
+            raise DocumentNotFoundError
+        return document
+
+    async def get_movies_by_ids(self, movie_ids: List[str]) -> List[Optional[DocumentSnapshot]]:
+        return await self._loader.load_many(movie_ids)
+
+    async def get_movie_by_title(self, title, field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
+        return await self.repository.get_movie_by_title(title, field_paths=field_paths)
+
+    async def create_movie(self, document: dict) -> DocumentSnapshot:
+        try:
+            return await self.repository.create_movie(document)
+        finally:
+            self._loader.clear(document.get("imdbID"))
+
+    async def upsert_movies(self, documents: List[dict]) -> Tuple[List[str], List[str]]:
+        try:
+            return await self.repository.upsert_movies(documents)
+        finally:
+            for document in documents:
+                self._loader.clear(document.get("imdbID"))
+
+    async def delete_movie(self, movie_id: str) -> None:
+        try:
+            await self.repository.delete_movie(movie_id)
+        finally:
+            self._loader.clear(movie_id)
+
+    async def check_empty_collection(self) -> bool:
+        return await self.repository.check_empty_collection()
+
+    async def shutdown(self) -> None:
+        """
+        Cancel the batched reads in flight.
+        """
+        await self._loader.shutdown()
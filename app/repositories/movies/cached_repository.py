@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import orjson
+
+from app.clients.firestore.errors import DocumentNotFoundError
+from app.clients.memory.memory_db import MemoryDocumentSnapshot
+from app.models.movies import Movie
+from app.repositories.movies.repository import IMovieRepository
+from app.tools.base_logger import ILogger, LogLevel
+from app.tools.cache import TTLCache
+from app.tools.resilience import no_deadline, within_deadline
+from app.tools.shared_cache import SharedTTLCache
+from app.tools.tracing import current_span, traced
+
+if TYPE_CHECKING:
+    from google.cloud.firestore_v1 import DocumentSnapshot
+
+# Marker stored in the cache for lookups that found nothing (negative caching).
+_MISSING = object()
+
+
+def _encode_document(document) -> bytes:
+    if document is _MISSING:
+        return b""
+    update_time = document.update_time.isoformat() if document.update_time is not None else None
+    return orjson.dumps([document.id, update_time, document.to_dict()], default=str)
+
+
+def _decode_document(encoded: bytes):
+    if not encoded:
+        return _MISSING
+    document_id, update_time, data = orjson.loads(encoded)
+    return MemoryDocumentSnapshot(document_id, data,
+                                  update_time=datetime.fromisoformat(update_time) if update_time else None)
+
+
+class CachedMovieRepository(IMovieRepository):
+    def __init__(self, repository: IMovieRepository, logger: ILogger, max_size: int = 10000, ttl: float = 300,
+                 negative_ttl: float = 30, stale_ttl: float = 0, refresh_timeout: float = 0.05,
+                 shared_cache_path: Optional[str] = None, shared_cache_size: int = 64 * 1024 * 1024,
+                 shared_cache_slot_size: int = 4096) -> None:
+        """
+        Initializes a read-through cache in front of another movie repository.
+
+        With a shared_cache_path, movies are cached in a memory-mapped file shared by the worker processes
+        of the host (see SharedTTLCache): a movie read by one worker is a hit for the others, and a write
+        invalidates it for all of them. Title lookups stay cached per process; they only map titles to IDs.
+
+        Args:
+            repository (IMovieRepository): The repository that is queried on cache misses.
+            logger (ILogger): The application logger.
+            max_size (int): Maximum number of movies (and titles) kept in memory.
+            ttl (float): Seconds a cached movie is served without going to the repository.
+            negative_ttl (float): Seconds a "not found" result is cached.
+            stale_ttl (float): Seconds an expired movie can still be served while it is refreshed in the
+                               background. Zero disables stale-while-revalidate.
+            refresh_timeout (float): Seconds to wait for a refresh before serving the stale copy instead.
+            shared_cache_path (str, optional): File of the movie cache shared between processes. Movies are
+                                               cached in process memory, up to max_size, without it.
+            shared_cache_size (int): Size of the shared cache file in bytes.
+            shared_cache_slot_size (int): Bytes per movie in the shared cache; larger movies are not cached.
+        """
+        self.repository = repository
+        self.logger = logger
+        self._negative_ttl = negative_ttl
+        self._refresh_timeout = refresh_timeout
+        if shared_cache_path:
+            self._by_id = SharedTTLCache(shared_cache_path, size=shared_cache_size, ttl=ttl,
+                                         encode=_encode_document, decode=_decode_document, stale_ttl=stale_ttl,
+                                         slot_size=shared_cache_slot_size)
+        else:
+            self._by_id = TTLCache(max_size=max_size, ttl=ttl, stale_ttl=stale_ttl)
+        self._title_to_id = TTLCache(max_size=max_size, ttl=ttl, stale_ttl=stale_ttl)
+        self._refreshing: Dict[Tuple, asyncio.Task] = {}
+        # Ownership tokens of batch reads in flight, per movie ID; invalidate() revokes them.
+        self._batch_owners: Dict[str, object] = {}
+
+    async def get_all_movies(self, page_size: int = 10, start_after: str = None,
+                             order_by: Optional[str] = None) -> Tuple[List[Movie], Optional[str]]:
+        return await self.repository.get_all_movies(page_size=page_size, start_after=start_after,
+                                                   order_by=order_by)
+
+    async def get_movie_page(self, page_size: int = 10, start_after: str = None, order_by: Optional[str] = None,
+                             field_paths: Optional[List[str]] = None) -> Tuple[List[DocumentSnapshot], Optional[str]]:
+        return await self.repository.get_movie_page(page_size=page_size, start_after=start_after,
+                                                   order_by=order_by, field_paths=field_paths)
+
+    def iter_all_movies(self, page_size: int = 500) -> AsyncIterator[dict]:
+        return self.repository.iter_all_movies(page_size=page_size)
+
+    def iter_movies_updated_since(self, since: datetime, page_size: int = 500) -> AsyncIterator[dict]:
+        return self.repository.iter_movies_updated_since(since, page_size=page_size)
+
+    @traced()
+    async def get_movie_by_id(self, movie_id: str,
+                              field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
+        """
+        Get a movie by ID, serving it from the cache when possible.
+
+        Projected reads (with field_paths) are served from a fresh cached copy, which holds every field,
+        and otherwise read only the requested fields from the repository without caching them.
+
+        Raises:
+            DocumentNotFoundError: If the movie does not exist (the miss is cached as well).
+        """
+        if field_paths is not None:
+            document = self._fresh(self._by_id, movie_id)
+            if document is None:
+                return await self.repository.get_movie_by_id(movie_id, field_paths=field_paths)
+        else:
+            document = await self._read_through(self._by_id, movie_id, self._fetch_by_id)
+        if document is _MISSING:
+            raise DocumentNotFoundError
+        return document
+
+    @traced()
+    async def get_movies_by_ids(self, movie_ids: List[str]) -> List[Optional[DocumentSnapshot]]:
+        """
+        Get many movies by ID. Cached movies are served from memory and the rest is fetched in one batch.
+        """
+        now = time.monotonic()
+        found = {}
+        for movie_id in movie_ids:
+            entry = self._by_id.get_entry(movie_id)
+            if entry is not None and entry.is_fresh(now):
+                found[movie_id] = entry.value
+
+        missing = [movie_id for movie_id in dict.fromkeys(movie_ids) if movie_id not in found]
+        span = current_span()
+        span.set_attribute("cache.hits", len(found))
+        span.set_attribute("cache.misses", len(missing))
+        if missing:
+            owner = object()
+            for movie_id in missing:
+                self._batch_owners[movie_id] = owner
+            try:
+                documents = await self.repository.get_movies_by_ids(missing)
+                for movie_id, document in zip(missing, documents):
+                    found[movie_id] = _MISSING if document is None else document
+                    # A write or a newer batch since the read started owns the key now.
+                    if self._batch_owners.get(movie_id) is owner:
+                        self._store(self._by_id, movie_id, found[movie_id])
+            finally:
+                for movie_id in missing:
+                    if self._batch_owners.get(movie_id) is owner:
+                        del self._batch_owners[movie_id]
+
+        return [None if found[movie_id] is _MISSING else found[movie_id] for movie_id in movie_ids]
+
+    @traced()
+    async def get_movie_by_title(self, title, field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
+        """
+        Get a movie by title. Titles are mapped to movie IDs so both lookups share the same cached document.
+        """
+        if field_paths is not None:
+            movie_id = self._fresh(self._title_to_id, title)
+            if movie_id is None:
+                return await self.repository.get_movie_by_title(title, field_paths=field_paths)
+        else:
+            movie_id = await self._read_through(self._title_to_id, title, self._fetch_id_by_title)
+        if movie_id is _MISSING:
+            return None
+        try:
+            return await self.get_movie_by_id(movie_id, field_paths=field_paths)
+        except DocumentNotFoundError:
+            self._title_to_id.delete(title)
+            return None
+
+    async def create_movie(self, document: dict) -> DocumentSnapshot:
+        created = await self.repository.create_movie(document)
+        self.invalidate(document.get("imdbID"), document.get("Title"))
+        return created
+
+    async def upsert_movies(self, documents: List[dict]) -> Tuple[List[str], List[str]]:
+        try:
+            return await self.repository.upsert_movies(documents)
+        finally:
+            for document in documents:
+                self.invalidate(document.get("imdbID"), document.get("Title"))
+
+    async def delete_movie(self, movie_id: str) -> None:
+        entry = self._by_id.get_entry(movie_id)
+        title = None
+        if entry is not None and entry.value is not _MISSING:
+            title = (entry.value.to_dict() or {}).get("Title")
+        try:
+            await self.repository.delete_movie(movie_id)
+        finally:
+            self.invalidate(movie_id, title)
+
+    async def check_empty_collection(self) -> bool:
+        return await self.repository.check_empty_collection()
+
+    def invalidate(self, movie_id: Optional[str] = None, title: Optional[str] = None) -> None:
+        """
+        Drop the cached entries for a movie ID and/or title.
+        """
+        if movie_id is not None:
+            self._by_id.delete(movie_id)
+            self._batch_owners.pop(movie_id, None)
+        if title is not None:
+            self._title_to_id.delete(title)
+        # Results of refreshes started before the write must not land in the cache.
+        for refresh_key in [(id(self._by_id), movie_id), (id(self._title_to_id), title)]:
+            self._refreshing.pop(refresh_key, None)
+
+    def close(self) -> None:
+        """
+        Unmap the shared movie cache, if any. Its entries stay in the file for the other processes.
+        """
+        if isinstance(self._by_id, SharedTTLCache):
+            self._by_id.close()
+
+    async def _fetch_by_id(self, movie_id: str):
+        try:
+            document = await self.repository.get_movie_by_id(movie_id)
+        except DocumentNotFoundError:
+            return _MISSING
+        return _MISSING if document is None else document
+
+    async def _fetch_id_by_title(self, title: str):
+        document = await self.repository.get_movie_by_title(title)
+        if document is None:
+            return _MISSING
+        self._store(self._by_id, document.id, document)
+        return document.id
+
+    @staticmethod
+    def _fresh(cache: TTLCache, key: Hashable):
+        entry = cache.get_entry(key)
+        if entry is None or not entry.is_fresh(time.monotonic()):
+            current_span().set_attribute("cache.result", "miss")
+            return None
+        current_span().set_attribute("cache.result", "hit")
+        return entry.value
+
+    def _store(self, cache: TTLCache, key: Hashable, value) -> None:
+        cache.set(key, value, ttl=self._negative_ttl if value is _MISSING else None)
+
+    async def _read_through(self, cache: TTLCache, key: Hashable, fetch: Callable[[Hashable], Awaitable]):
+        entry = cache.get_entry(key)
+        span = current_span()
+        if entry is None:
+            span.set_attribute("cache.result", "miss")
+            return await within_deadline(asyncio.shield(self._start_refresh(cache, key, fetch)))
+        if entry.is_fresh(time.monotonic()):
+            span.set_attribute("cache.result", "hit")
+            return entry.value
+        span.set_attribute("cache.result", "stale")
+
+        # Stale entry: give the refresh a short head start and fall back to the cached copy if it is slow.
+        refresh = self._start_refresh(cache, key, fetch)
+        try:
+            return await asyncio.wait_for(asyncio.shield(refresh), timeout=self._refresh_timeout)
+        except asyncio.TimeoutError:
+            return entry.value
+        except Exception:
+            self.logger.log(LogLevel.WARNING, "Serving stale cache entry after a failed refresh: %s", key)
+            return entry.value
+
+    def _start_refresh(self, cache: TTLCache, key: Hashable, fetch: Callable[[Hashable], Awaitable]) -> asyncio.Task:
+        """
+        Start fetching a key, or join the fetch already in flight for it.
+        """
+        refresh_key = (id(cache), key)
+        task = self._refreshing.get(refresh_key)
+        if task is None:
+            # Shared by every caller of the key, so it does not run under the deadline of the first one
+            with no_deadline():
+                task = asyncio.ensure_future(self._fetch_and_store(cache, key, fetch, refresh_key))
+            self._refreshing[refresh_key] = task
+            task.add_done_callback(lambda done: self._on_refresh_done(refresh_key, done))
+        return task
+
+    def _on_refresh_done(self, refresh_key: Tuple, task: asyncio.Task) -> None:
+        if self._refreshing.get(refresh_key) is task:
+            del self._refreshing[refresh_key]
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.log(LogLevel.ERROR, "Failed to refresh cache entry: %s", refresh_key[1])
+
+    async def _fetch_and_store(self, cache: TTLCache, key: Hashable, fetch: Callable[[Hashable], Awaitable],
+                               refresh_key: Tuple):
+        value = await fetch(key)
+        if self._refreshing.get(refresh_key) is asyncio.current_task():
+            self._store(cache, key, value)
+        return value
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Set, Tuple
+
+from app.indexes.base import IMovieIndex
+from app.indexes.catalog import MovieCatalog, SnapshotWriter
+from app.indexes.facets import FacetIndex
+from app.models.movies import Movie
+from app.repositories.movies.repository import IMovieRepository
+from app.tools.base_logger import ILogger, LogLevel
+
+if TYPE_CHECKING:
+    from google.cloud.firestore_v1 import DocumentSnapshot
+
+# Number of movies handed to the indexes at once while they are built.
+BUILD_CHUNK_SIZE = 1000
+# The movies written since the catalog watermark are read from this many seconds before it, as writes
+# are stamped by the clock of the instance making them, before they are committed.
+CATCH_UP_OVERLAP_SECONDS = 60
+
+
+class IndexedMovieRepository(IMovieRepository):
+    def __init__(self, repository: IMovieRepository, indexes: List[IMovieIndex], logger: ILogger,
+                 catalog: Optional[MovieCatalog] = None) -> None:
+        """
+        Initializes a repository that keeps in-process movie indexes in sync with the writes it forwards.
+
+        Args:
+            repository (IMovieRepository): The repository reads and writes are forwarded to.
+            indexes (List[IMovieIndex]): The indexes updated on every create, upsert and delete.
+            logger (ILogger): The application logger.
+            catalog (MovieCatalog, optional): Local copy of the collection the indexes are built from when
+                                              it was saved by a previous run, kept in sync like the indexes.
+        """
+        self.repository = repository
+        self.indexes = indexes
+        self.logger = logger
+        self.catalog = catalog
+        self.ready = False
+        # IDs written or deleted while the indexes are being built; None when no build is running.
+        self._written_during_build: Optional[Set[str]] = None
+        # Same, for the scan of a facet reconciliation.
+        self._written_during_reconcile: Optional[Set[str]] = None
+        # Same, for the read of the movies written since the catalog watermark.
+        self._written_during_catch_up: Optional[Set[str]] = None
+
+    async def build_indexes(self, page_size: int = 500) -> None:
+        """
+        Load every movie of the collection into the indexes, then mark them ready.
+
+        With a catalog, the movies are loaded from its snapshot file when one recent enough was saved,
+        and only the movies written since then are read from the database. Otherwise the collection is
+        scanned, and the catalog snapshot is written from the scan.
+
+        Writes forwarded meanwhile update the indexes right away, and the loaded or scanned versions of
+        those movies are skipped, since they may be older than the write.
+        """
+        self.logger.log(LogLevel.INFO, "Building movie indexes")
+        self._written_during_build = set()
+        try:
+            if self._load_catalog():
+                count = await self._add_catalog()
+                await self.catch_up_catalog(page_size=page_size)
+            else:
+                count = await self._scan(page_size)
+        except Exception as e:
+            self.logger.log(LogLevel.ERROR, "Failed to build movie indexes. Error: %s", e)
+            raise
+        finally:
+            self._written_during_build = None
+        self.ready = True
+        self.logger.log(LogLevel.INFO, "Movie indexes built with %s movies", count)
+
+    async def catch_up_catalog(self, page_size: int = 500) -> int:
+        """
+        Read the movies written since the catalog watermark, by any instance, into the indexes and the
+        catalog, then move the watermark to the start of the read. Movies deleted by other instances are
+        only seen by the facet reconciliation.
+
+        Returns:
+            int: The number of movies read.
+        """
+        started = time.time()
+        since = datetime.fromtimestamp(self.catalog.watermark - CATCH_UP_OVERLAP_SECONDS, timezone.utc)
+        self._written_during_catch_up = set()
+        count = 0
+        chunk = []
+        try:
+            async for movie in self.repository.iter_movies_updated_since(since, page_size=page_size):
+                chunk.append(movie)
+                if len(chunk) >= BUILD_CHUNK_SIZE:
+                    count += self._add_caught_up(chunk)
+                    chunk = []
+            count += self._add_caught_up(chunk)
+        finally:
+            self._written_during_catch_up = None
+        self.catalog.watermark = started
+        self.logger.log(LogLevel.INFO, "Movie catalog caught up with %s movies written since %s", count, since)
+        return count
+
+    async def save_catalog(self) -> None:
+        """
+        Write the catalog to a new snapshot file, for the next instances to start from.
+        """
+        count = await self.catalog.save()
+        self.logger.log(LogLevel.INFO, "Movie catalog saved with %s movies", count)
+
+    async def reconcile_facets(self, facets: FacetIndex, page_size: int = 500) -> int:
+        """
+        Recount the facets from a scan of the collection, correcting any drift of the incremental counts
+        (e.g. writes made by other instances). Movies written during the scan keep their current counts.
+        Movies missing from the scan were deleted by other instances and are removed from the other
+        indexes and the catalog as well.
+
+        Returns:
+            int: The number of movies whose counts were corrected.
+        """
+        self._written_during_reconcile = set()
+        scanned = FacetIndex()
+        try:
+            async for movie in self.repository.iter_all_movies(page_size=page_size):
+                scanned.add(movie)
+            deleted = facets.movie_ids() - scanned.movie_ids() - self._written_during_reconcile
+            drift = facets.reconcile(scanned, self._written_during_reconcile)
+        finally:
+            self._written_during_reconcile = None
+        for movie_id in deleted:
+            self._remove(movie_id)
+        self.logger.log(LogLevel.INFO, "Movie facets reconciled with %s movies, %s corrected", len(facets), drift)
+        return drift
+
+    async def get_all_movies(self, page_size: int = 10, start_after: str = None,
+                             order_by: Optional[str] = None) -> Tuple[List[Movie], Optional[str]]:
+        return await self.repository.get_all_movies(page_size=page_size, start_after=start_after,
+                                                   order_by=order_by)
+
+    async def get_movie_page(self, page_size: int = 10, start_after: str = None, order_by: Optional[str] = None,
+                             field_paths: Optional[List[str]] = None) -> Tuple[List[DocumentSnapshot], Optional[str]]:
+        return await self.repository.get_movie_page(page_size=page_size, start_after=start_after,
+                                                   order_by=order_by, field_paths=field_paths)
+
+    def iter_all_movies(self, page_size: int = 500) -> AsyncIterator[dict]:
+        return self.repository.iter_all_movies(page_size=page_size)
+
+    def iter_movies_updated_since(self, since: datetime, page_size: int = 500) -> AsyncIterator[dict]:
+        return self.repository.iter_movies_updated_since(since, page_size=page_size)
+
+    async def get_movie_by_id(self, movie_id: str,
+                              field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
+        return await self.repository.get_movie_by_id(movie_id, field_paths=field_paths)
+
+    async def get_movies_by_ids(self, movie_ids: List[str]) -> List[Optional[DocumentSnapshot]]:
+        return await self.repository.get_movies_by_ids(movie_ids)
+
+    async def get_movie_by_title(self, title, field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
+        return await self.repository.get_movie_by_title(title, field_paths=field_paths)
+
+    async def create_movie(self, document: dict) -> DocumentSnapshot:
+        created = await self.repository.create_movie(document)
+        self._add([document])
+        return created
+
+    async def upsert_movies(self, documents: List[dict]) -> Tuple[List[str], List[str]]:
+        written, unchanged = await self.repository.upsert_movies(documents)
+        written_ids = set(written)
+        self._add([document for document in documents if document.get("imdbID") in written_ids])
+        return written, unchanged
+
+    async def delete_movie(self, movie_id: str) -> None:
+        await self.repository.delete_movie(movie_id)
+        self._record_writes([movie_id])
+        self._remove(movie_id)
+
+    async def check_empty_collection(self) -> bool:
+        return await self.repository.check_empty_collection()
+
+    def _add(self, movies: List[dict]) -> None:
+        self._record_writes(movie.get("imdbID") for movie in movies)
+        for index in self._synced_indexes():
+            index.add_many(movies)
+
+    def _remove(self, movie_id: str) -> None:
+        for index in self._synced_indexes():
+            index.remove(movie_id)
+
+    def _synced_indexes(self) -> List[IMovieIndex]:
+        return self.indexes if self.catalog is None else [*self.indexes, self.catalog]
+
+    def _load_catalog(self) -> bool:
+        if self.catalog is None:
+            return False
+        try:
+            return self.catalog.load()
+        except (OSError, ValueError) as e:
+            self.logger.log(LogLevel.WARNING, "Ignoring the movie catalog snapshot %s. Error: %s",
+                            self.catalog.path, e)
+            return False
+
+    async def _add_catalog(self) -> int:
+        count = 0
+        chunk = []
+        for movie in self.catalog:
+            chunk.append(movie)
+            if len(chunk) >= BUILD_CHUNK_SIZE:
+                count += self._add_scanned(chunk)
+                chunk = []
+                await asyncio.sleep(0)  # Lets requests in between chunks
+        return count + self._add_scanned(chunk)
+
+    async def _scan(self, page_size: int) -> int:
+        writer = self.catalog.writer(time.time()) if self.catalog is not None else None
+        count = 0
+        chunk = []
+        try:
+            async for movie in self.repository.iter_all_movies(page_size=page_size):
+                chunk.append(movie)
+                if len(chunk) >= BUILD_CHUNK_SIZE:
+                    count += self._add_scanned(chunk, writer)
+                    chunk = []
+            count += self._add_scanned(chunk, writer)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        if writer is not None:
+            try:
+                await self.catalog.install(writer)
+            except Exception as e:
+                self.logger.log(LogLevel.ERROR, "Failed to write the movie catalog snapshot. Error: %s", e)
+        return count
+
+    def _add_scanned(self, movies: List[dict], writer: Optional[SnapshotWriter] = None) -> int:
+        movies = [movie for movie in movies if movie.get("imdbID") not in self._written_during_build]
+        for index in self.indexes:
+            index.add_many(movies)
+        if writer is not None:
+            # The movies written during the scan are in the catalog already
+            writer.add_many(movies)
+        return len(movies)
+
+    def _add_caught_up(self, movies: List[dict]) -> int:
+        movies = [movie for movie in movies if movie.get("imdbID") not in self._written_during_catch_up]
+        for index in self._synced_indexes():
+            index.add_many(movies)
+        return len(movies)
+
+    def _record_writes(self, movie_ids) -> None:
+        movie_ids = list(movie_ids)
+        if self._written_during_build is not None:
+            self._written_during_build.update(movie_ids)
+        if self._written_during_reconcile is not None:
+            self._written_during_reconcile.update(movie_ids)
+        if self._written_during_catch_up is not None:
+            self._written_during_catch_up.update(movie_ids)
@@ -1,10 +1,39 @@
-from typing import Optional, Tuple, List
-from abc import ABC, abstractmethod
+from __future__ import annotations
 
-from google.cloud.firestore_v1 import DocumentSnapshot
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Tuple, List
+from abc import ABC, abstractmethod
 
 from app.clients.base_db import IDocumentDB
 from app.models.movies import Movie
+from app.tools.tracing import traced, tracer
+
+if TYPE_CHECKING:
+    # Annotations only: google.cloud.firestore is imported when the Firestore backend is used
+    from google.cloud.firestore_v1 import DocumentSnapshot
+
+# Document field holding the hash of the movie data, used to skip unchanged documents on bulk upserts.
+CONTENT_HASH_FIELD = "_content_hash"
+# Document field holding the time of the last write. Firestore cannot filter on its own update_time,
+# so the writes made since a given time are queried on this field instead.
+UPDATED_AT_FIELD = "_updated_at"
+INTERNAL_FIELDS = (CONTENT_HASH_FIELD, UPDATED_AT_FIELD)
+
+
+def content_hash(document: dict) -> str:
+    """
+    Compute a stable hash of a movie document, ignoring the internal fields.
+    """
+    data = {key: value for key, value in document.items() if key not in INTERNAL_FIELDS}
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _without_internal_fields(data: dict) -> dict:
+    for field in INTERNAL_FIELDS:
+        data.pop(field, None)
+    return data
 
 
 class IMovieRepository(ABC):
@@ -12,10 +41,26 @@ class IMovieRepository(ABC):
     async def get_all_movies(self, page_size: int):
         pass
 
+    @abstractmethod
+    async def get_movie_page(self, page_size: int):
+        pass
+
+    @abstractmethod
+    def iter_all_movies(self, page_size: int):
+        pass
+
+    @abstractmethod
+    def iter_movies_updated_since(self, since: datetime, page_size: int):
+        pass
+
     @abstractmethod
     async def get_movie_by_id(self, movie_id: str):
         pass
 
+    @abstractmethod
+    async def get_movies_by_ids(self, movie_ids: List[str]):
+        pass
+
     @abstractmethod
     async def get_movie_by_title(self, title):
         pass
@@ -24,6 +69,10 @@ class IMovieRepository(ABC):
     async def create_movie(self, document: dict):
         pass
 
+    @abstractmethod
+    async def upsert_movies(self, documents: List[dict]):
+        pass
+
     @abstractmethod
     async def delete_movie(self, movie_id: str):
         pass
@@ -43,36 +92,102 @@ class MovieRepository(IMovieRepository):
         """
         self.firestore_client = firestore_client
 
-    async def get_all_movies(self, page_size: int = 10, start_after: str = None) -> Tuple[List[Movie], Optional[str]]:
-        docs, next_page_token = await self.firestore_client.get_paginated_documents(page_size=page_size,
-                                                                                    start_after=start_after)
-        movies = [Movie.from_dict(doc.to_dict()) for doc in docs]
+    @traced()
+    async def get_all_movies(self, page_size: int = 10, start_after: str = None,
+                             order_by: Optional[str] = None) -> Tuple[List[Movie], Optional[str]]:
+        docs, next_page_token = await self.get_movie_page(page_size=page_size, start_after=start_after,
+                                                          order_by=order_by)
+        with tracer.start_as_current_span("MovieRepository.hydrate", {"movies.count": len(docs)}):
+            movies = [Movie.from_dict(doc.to_dict()) for doc in docs]
         return movies, next_page_token
 
-    async def get_movie_by_id(self, movie_id: str) -> Optional[DocumentSnapshot]:
+    @traced()
+    async def get_movie_page(self, page_size: int = 10, start_after: str = None, order_by: Optional[str] = None,
+                             field_paths: Optional[List[str]] = None) -> Tuple[List[DocumentSnapshot], Optional[str]]:
+        """
+        Get a page of movie documents, without converting them to Movie models.
+
+        Args:
+            field_paths (List[str], optional): Fields to read. All fields are read by default.
+
+        Returns:
+            Tuple[List[DocumentSnapshot], Optional[str]]: The documents and the token of the next page.
+        """
+        return await self.firestore_client.get_paginated_documents(page_size=page_size, start_after=start_after,
+                                                                   order_by=order_by, field_paths=field_paths)
+
+    async def iter_all_movies(self, page_size: int = 500) -> AsyncIterator[dict]:
+        """
+        Iterate over every movie of the collection, reading it page by page.
+
+        Args:
+            page_size (int): Number of movies read from the database per query.
+
+        Yields:
+            dict: The movie data, without internal fields.
+        """
+        async for document in self.firestore_client.get_all_documents(page_size=page_size):
+            yield _without_internal_fields(document.to_dict())
+
+    async def iter_movies_updated_since(self, since: datetime, page_size: int = 500) -> AsyncIterator[dict]:
+        """
+        Iterate over the movies created or overwritten after a given time, oldest write first. Deleted
+        movies are not seen, nor movies written before this field was maintained.
+
+        Args:
+            since (datetime): Only the movies written after this time are read.
+            page_size (int): Number of movies read from the database per query.
+
+        Yields:
+            dict: The movie data, without internal fields.
+        """
+        async for document in self.firestore_client.get_documents_after(UPDATED_AT_FIELD, since,
+                                                                         page_size=page_size):
+            yield _without_internal_fields(document.to_dict())
+
+    @traced()
+    async def get_movie_by_id(self, movie_id: str,
+                              field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
         """
         Get a movie by ID.
 
         Args:
             movie_id (str): The ID of the movie to get.
+            field_paths (List[str], optional): Fields to read. All fields are read by default.
 
         Returns:
             Optional[DocumentSnapshot]: The DocumentSnapshot of the requested movie.
         """
-        return await self.firestore_client.get_document(movie_id)
+        return await self.firestore_client.get_document(movie_id, field_paths=field_paths)
 
-    async def get_movie_by_title(self, title) -> Optional[DocumentSnapshot]:
+    @traced()
+    async def get_movies_by_ids(self, movie_ids: List[str]) -> List[Optional[DocumentSnapshot]]:
+        """
+        Get many movies by ID with batched reads.
+
+        Args:
+            movie_ids (List[str]): The IDs of the movies to get.
+
+        Returns:
+            List[Optional[DocumentSnapshot]]: The DocumentSnapshots in the requested order, None for missing movies.
+        """
+        return await self.firestore_client.get_documents(movie_ids)
+
+    @traced()
+    async def get_movie_by_title(self, title, field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
         """
         Get a single movie by title.
 
         Args:
             title (str): The title of the movie.
+            field_paths (List[str], optional): Fields to read. All fields are read by default.
 
         Returns:
             Optional[DocumentSnapshot]: The DocumentSnapshot of the movie.
         """
-        return await self.firestore_client.get_document_by_title(title)
+        return await self.firestore_client.get_document_by_title(title, field_paths=field_paths)
 
+    @traced()
     async def create_movie(self, document: dict) -> DocumentSnapshot:
         """
         Create a new movie document.
@@ -84,8 +199,39 @@ class MovieRepository(IMovieRepository):
             DocumentSnapshot: A DocumentSnapshot of the created movie document.
         """
         imdb_id = document.get("imdbID")
-        return await self.firestore_client.create_document(imdb_id, document)
+        return await self.firestore_client.create_document(imdb_id, {**document,
+                                                                     UPDATED_AT_FIELD: datetime.now(timezone.utc)})
 
+    @traced()
+    async def upsert_movies(self, documents: List[dict]) -> Tuple[List[str], List[str]]:
+        """
+        Create or overwrite many movies, keyed by imdbID.
+
+        The stored content hash of every movie is read in one batch first, and movies whose
+        content did not change are not written again.
+
+        Args:
+            documents (List[dict]): The movie data. Each imdbID should appear only once.
+
+        Returns:
+            Tuple[List[str], List[str]]: The IDs of the written movies and the IDs of the unchanged ones.
+        """
+        hashes = {document["imdbID"]: content_hash(document) for document in documents}
+        existing = await self.firestore_client.get_documents(list(hashes), field_paths=[CONTENT_HASH_FIELD])
+        unchanged = {
+            snapshot.id for snapshot in existing
+            if snapshot is not None and (snapshot.to_dict() or {}).get(CONTENT_HASH_FIELD) == hashes[snapshot.id]
+        }
+        now = datetime.now(timezone.utc)
+        to_write = {
+            document["imdbID"]: {**document, CONTENT_HASH_FIELD: hashes[document["imdbID"]], UPDATED_AT_FIELD: now}
+            for document in documents if document["imdbID"] not in unchanged
+        }
+        if to_write:
+            await self.firestore_client.set_documents(to_write)
+        return list(to_write), [movie_id for movie_id in hashes if movie_id in unchanged]
+
+    @traced()
     async def delete_movie(self, movie_id: str) -> None:
         """
         Delete a movie by ID.
@@ -95,6 +241,7 @@ class MovieRepository(IMovieRepository):
         """
         await self.firestore_client.delete_document(movie_id)
 
+    @traced()
     async def check_empty_collection(self) -> bool:
         """
         Check if the movie collection is empty.
@@ -0,0 +1,42 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.clients.firestore.errors import DocumentNotFoundError
+from app.repositories.movies.batched_repository import BatchedMovieRepository
+
+
+def make_document(movie_id: str):
+    document = MagicMock()
+    document.id = movie_id
+    return document
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_are_read_in_one_batch():
+    mock_repository = AsyncMock()
+    mock_repository.get_movies_by_ids.side_effect = lambda ids: [None if movie_id == "tt404" else
+                                                                 make_document(movie_id) for movie_id in ids]
+
+    repository = BatchedMovieRepository(mock_repository)
+
+    results = await asyncio.gather(repository.get_movie_by_id("tt1"), repository.get_movie_by_id("tt2"),
+                                   repository.get_movie_by_id("tt1"), repository.get_movie_by_id("tt404"),
+                                   return_exceptions=True)
+
+    assert [result.id for result in results[:3]] == ["tt1", "tt2", "tt1"]
+    assert isinstance(results[3], DocumentNotFoundError)
+    mock_repository.get_movies_by_ids.assert_awaited_once_with(["tt1", "tt2", "tt404"])
+    mock_repository.get_movie_by_id.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_projected_lookups_are_not_batched():
+    mock_repository = AsyncMock()
+    repository = BatchedMovieRepository(mock_repository)
+
+    await repository.get_movie_by_id("tt1", field_paths=["Title"])
+
+    mock_repository.get_movie_by_id.assert_awaited_once_with("tt1", field_paths=["Title"])
+    mock_repository.get_movies_by_ids.assert_not_called()
@@ -0,0 +1,230 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.clients.firestore.errors import DocumentNotFoundError
+from app.repositories.movies.cached_repository import CachedMovieRepository
+from app.tools.resilience import DeadlineExceededError, deadline, time_remaining
+
+
+def make_document(movie_id: str, title: str):
+    document = MagicMock()
+    document.id = movie_id
+    document.to_dict.return_value = {"imdbID": movie_id, "Title": title}
+    return document
+
+
+@pytest.mark.asyncio
+async def test_get_movie_by_id_is_served_from_cache():
+    mock_repository = AsyncMock()
+    mock_repository.get_movie_by_id.return_value = make_document("tt1", "Alien")
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock())
+
+    first = await repository.get_movie_by_id("tt1")
+    second = await repository.get_movie_by_id("tt1")
+
+    assert first is second, "The cached document should be returned."
+    mock_repository.get_movie_by_id.assert_awaited_once_with("tt1")
+
+
+@pytest.mark.asyncio
+async def test_get_movie_by_id_caches_misses():
+    mock_repository = AsyncMock()
+    mock_repository.get_movie_by_id.side_effect = DocumentNotFoundError
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock())
+
+    for _ in range(2):
+        with pytest.raises(DocumentNotFoundError):
+            await repository.get_movie_by_id("tt404")
+
+    mock_repository.get_movie_by_id.assert_awaited_once_with("tt404")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch():
+    mock_repository = AsyncMock()
+
+    async def slow_get(movie_id):
+        await asyncio.sleep(0.01)
+        return make_document(movie_id, "Alien")
+
+    mock_repository.get_movie_by_id.side_effect = slow_get
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock())
+
+    results = await asyncio.gather(*[repository.get_movie_by_id("tt1") for _ in range(5)])
+
+    assert all(result.id == "tt1" for result in results)
+    mock_repository.get_movie_by_id.assert_awaited_once_with("tt1")
+
+
+@pytest.mark.asyncio
+async def test_shared_fetch_outlives_the_deadline_of_the_first_caller():
+    mock_repository = AsyncMock()
+    deadlines = []
+
+    async def slow_get(movie_id):
+        deadlines.append(time_remaining())
+        await asyncio.sleep(0.01)
+        return make_document(movie_id, "Alien")
+
+    mock_repository.get_movie_by_id.side_effect = slow_get
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock())
+
+    async def get_with_deadline():
+        with deadline(0.001):
+            return await repository.get_movie_by_id("tt1")
+
+    impatient = asyncio.ensure_future(get_with_deadline())
+    patient = asyncio.ensure_future(repository.get_movie_by_id("tt1"))
+    with pytest.raises(DeadlineExceededError):
+        await impatient
+
+    assert (await patient).id == "tt1"
+    assert deadlines == [None]
+
+
+@pytest.mark.asyncio
+async def test_get_movie_by_title_populates_id_cache():
+    mock_repository = AsyncMock()
+    mock_repository.get_movie_by_title.return_value = make_document("tt1", "Alien")
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock())
+
+    by_title = await repository.get_movie_by_title("Alien")
+    by_id = await repository.get_movie_by_id("tt1")
+
+    assert by_title is by_id
+    mock_repository.get_movie_by_title.assert_awaited_once_with("Alien")
+    mock_repository.get_movie_by_id.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_create_and_delete_invalidate_cache():
+    mock_repository = AsyncMock()
+    mock_repository.get_movie_by_id.return_value = make_document("tt1", "Alien")
+    mock_repository.get_movie_by_title.return_value = None
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock())
+
+    assert await repository.get_movie_by_title("Alien") is None
+    mock_repository.get_movie_by_title.return_value = make_document("tt1", "Alien")
+    await repository.create_movie({"imdbID": "tt1", "Title": "Alien"})
+    assert (await repository.get_movie_by_title("Alien")).id == "tt1", "The negative entry should be invalidated."
+
+    await repository.delete_movie("tt1")
+    await repository.get_movie_by_id("tt1")
+
+    assert mock_repository.get_movie_by_title.await_count == 2
+    mock_repository.get_movie_by_id.assert_awaited_once_with("tt1")
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_refreshing():
+    mock_repository = AsyncMock()
+    refreshed = asyncio.Event()
+
+    async def slow_get(movie_id):
+        if mock_repository.get_movie_by_id.await_count > 1:
+            await asyncio.sleep(0.05)
+            refreshed.set()
+            return make_document(movie_id, "Alien (Director's Cut)")
+        return make_document(movie_id, "Alien")
+
+    mock_repository.get_movie_by_id.side_effect = slow_get
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock(), ttl=0, stale_ttl=60,
+                                       refresh_timeout=0.001)
+
+    await repository.get_movie_by_id("tt1")
+    stale = await repository.get_movie_by_id("tt1")
+    assert stale.to_dict()["Title"] == "Alien", "The stale copy should be served while the refresh is slow."
+
+    await refreshed.wait()
+    await asyncio.sleep(0)
+    assert mock_repository.get_movie_by_id.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_movies_by_ids_only_fetches_uncached_movies():
+    mock_repository = AsyncMock()
+    mock_repository.get_movie_by_id.return_value = make_document("tt1", "Alien")
+    mock_repository.get_movies_by_ids.return_value = [make_document("tt2", "Aliens"), None]
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock())
+    await repository.get_movie_by_id("tt1")
+
+    movies = await repository.get_movies_by_ids(["tt2", "tt1", "tt404", "tt2"])
+
+    assert [movie.id if movie else None for movie in movies] == ["tt2", "tt1", None, "tt2"]
+    mock_repository.get_movies_by_ids.assert_awaited_once_with(["tt2", "tt404"])
+    with pytest.raises(DocumentNotFoundError):
+        await repository.get_movie_by_id("tt404")
+
+
+@pytest.mark.asyncio
+async def test_get_movies_by_ids_does_not_cache_over_a_concurrent_write():
+    mock_repository = AsyncMock()
+    release = asyncio.Event()
+
+    async def slow_get_many(movie_ids):
+        await release.wait()
+        return [make_document("tt1", "Old title")]
+
+    mock_repository.get_movies_by_ids.side_effect = slow_get_many
+    mock_repository.get_movie_by_id.return_value = make_document("tt1", "New title")
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock())
+    batch = asyncio.ensure_future(repository.get_movies_by_ids(["tt1"]))
+    await asyncio.sleep(0)
+    await repository.create_movie({"imdbID": "tt1", "Title": "New title"})
+    release.set()
+    await batch
+
+    movie = await repository.get_movie_by_id("tt1")
+
+    assert movie.to_dict()["Title"] == "New title", "The stale batch result must not be cached."
+
+
+@pytest.mark.asyncio
+async def test_projected_reads_use_fresh_entries_without_caching_partial_documents():
+    mock_repository = AsyncMock()
+    partial = make_document("tt2", "Aliens")
+    mock_repository.get_movie_by_id.side_effect = [make_document("tt1", "Alien"), partial]
+
+    repository = CachedMovieRepository(mock_repository, logger=MagicMock())
+    cached = await repository.get_movie_by_id("tt1")
+
+    assert await repository.get_movie_by_id("tt1", field_paths=["Title"]) is cached
+    assert await repository.get_movie_by_id("tt2", field_paths=["Title"]) is partial
+    mock_repository.get_movie_by_id.assert_awaited_with("tt2", field_paths=["Title"])
+    assert repository._by_id.get("tt2") is None
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_is_filled_and_invalidated_for_every_worker(tmp_path):
+    mock_repository = AsyncMock()
+    mock_repository.get_movie_by_id.return_value = make_document("tt1", "Alien")
+    mock_repository.get_movie_by_id.return_value.update_time = None
+    path = str(tmp_path / "movies-cache")
+    first = CachedMovieRepository(mock_repository, logger=MagicMock(), shared_cache_path=path,
+                                  shared_cache_size=1024 * 1024)
+    second = CachedMovieRepository(mock_repository, logger=MagicMock(), shared_cache_path=path,
+                                   shared_cache_size=1024 * 1024)
+
+    await first.get_movie_by_id("tt1")
+    document = await second.get_movie_by_id("tt1")
+
+    assert document.id == "tt1" and document.to_dict() == {"imdbID": "tt1", "Title": "Alien"}
+    mock_repository.get_movie_by_id.assert_awaited_once_with("tt1")
+
+    await first.delete_movie("tt1")
+    mock_repository.get_movie_by_id.side_effect = DocumentNotFoundError
+    with pytest.raises(DocumentNotFoundError):
+        await second.get_movie_by_id("tt1")
+    first.close()
+    second.close()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.indexes.catalog import MovieCatalog, SnapshotWriter
+from app.indexes.facets import FacetIndex
+from app.indexes.prefix import TitlePrefixIndex
+from app.repositories.movies.indexed_repository import IndexedMovieRepository
+
+
+@pytest.mark.asyncio
+async def test_writes_during_build_are_not_overwritten_by_scanned_snapshots():
+    mock_repository = AsyncMock()
+    scanned = asyncio.Event()
+    release = asyncio.Event()
+
+    async def iter_all_movies(page_size):
+        yield {"imdbID": "tt1", "Title": "Old title"}
+        yield {"imdbID": "tt2", "Title": "Deleted title"}
+        scanned.set()
+        await release.wait()
+        yield {"imdbID": "tt3", "Title": "Unchanged title"}
+
+    mock_repository.iter_all_movies = iter_all_movies
+    index = TitlePrefixIndex()
+    repository = IndexedMovieRepository(mock_repository, [index], logger=MagicMock())
+
+    build = asyncio.ensure_future(repository.build_indexes())
+    await scanned.wait()
+    assert not repository.ready
+    await repository.create_movie({"imdbID": "tt1", "Title": "New title"})
+    await repository.delete_movie("tt2")
+    release.set()
+    await build
+
+    assert repository.ready
+    assert [movie["Title"] for movie in index.suggest("title")] == ["Unchanged title", "New title"]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_facets_corrects_drift_and_keeps_writes_made_during_the_scan():
+    mock_repository = AsyncMock()
+    release = asyncio.Event()
+
+    async def iter_all_movies(page_size):
+        yield {"imdbID": "tt1", "Type": "movie"}
+        yield {"imdbID": "tt2", "Type": "movie"}
+        await release.wait()
+
+    mock_repository.iter_all_movies = iter_all_movies
+    facets = FacetIndex()
+    facets.add({"imdbID": "tt1", "Type": "series"})
+    facets.add({"imdbID": "tt9", "Type": "movie"})
+    repository = IndexedMovieRepository(mock_repository, [facets], logger=MagicMock())
+
+    reconcile = asyncio.ensure_future(repository.reconcile_facets(facets))
+    await asyncio.sleep(0)
+    await repository.create_movie({"imdbID": "tt3", "Type": "episode"})
+    await repository.delete_movie("tt2")
+    release.set()
+
+    assert await reconcile == 2
+    assert facets.stats() == {"total": 2, "facets": {"Genre": {}, "Type": {"movie": 1, "episode": 1},
+                                                     "Year": {}, "Rated": {}}}
+
+
+@pytest.mark.asyncio
+async def test_build_without_snapshot_scans_the_collection_and_saves_it(tmp_path):
+    mock_repository = AsyncMock()
+
+    async def iter_all_movies(page_size):
+        yield {"imdbID": "tt1", "Title": "Alien"}
+        yield {"imdbID": "tt2", "Title": "Aliens"}
+
+    mock_repository.iter_all_movies = iter_all_movies
+    catalog = MovieCatalog(str(tmp_path / "catalog"), max_age=3600)
+    repository = IndexedMovieRepository(mock_repository, [TitlePrefixIndex()], logger=MagicMock(), catalog=catalog)
+
+    await repository.build_indexes()
+    await repository.delete_movie("tt2")
+    await repository.save_catalog()
+
+    reloaded = MovieCatalog(str(tmp_path / "catalog"), max_age=3600)
+    assert reloaded.load()
+    assert list(reloaded) == [{"imdbID": "tt1", "Title": "Alien"}]
+
+
+@pytest.mark.asyncio
+async def test_build_from_snapshot_only_reads_the_movies_written_since(tmp_path):
+    watermark = time.time() - 600
+    writer = SnapshotWriter(str(tmp_path / "catalog"), watermark)
+    writer.add_many([{"imdbID": "tt1", "Title": "Alien"}, {"imdbID": "tt2", "Title": "Old title"}])
+    writer.commit()
+    mock_repository = AsyncMock()
+    mock_repository.iter_all_movies = MagicMock(side_effect=AssertionError("The collection must not be scanned"))
+    since = []
+
+    async def iter_movies_updated_since(after, page_size):
+        since.append(after.timestamp())
+        yield {"imdbID": "tt2", "Title": "New title"}
+        yield {"imdbID": "tt3", "Title": "Added title"}
+
+    mock_repository.iter_movies_updated_since = iter_movies_updated_since
+    catalog = MovieCatalog(str(tmp_path / "catalog"), max_age=3600)
+    index = TitlePrefixIndex()
+    repository = IndexedMovieRepository(mock_repository, [index], logger=MagicMock(), catalog=catalog)
+
+    await repository.build_indexes()
+
+    assert repository.ready
+    assert since[0] < watermark
+    assert catalog.watermark > watermark
+    assert [movie["Title"] for movie in index.suggest("title")] == ["Added title", "New title"]
+    assert catalog.get("tt2") == {"imdbID": "tt2", "Title": "New title"}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_removes_the_movies_deleted_elsewhere_from_every_index(tmp_path):
+    mock_repository = AsyncMock()
+
+    async def iter_all_movies(page_size):
+        yield {"imdbID": "tt1", "Title": "Alien"}
+
+    mock_repository.iter_all_movies = iter_all_movies
+    facets = FacetIndex()
+    titles = TitlePrefixIndex()
+    catalog = MovieCatalog(str(tmp_path / "catalog"), max_age=3600)
+    repository = IndexedMovieRepository(mock_repository, [titles, facets], logger=MagicMock(), catalog=catalog)
+    mock_repository.upsert_movies.return_value = (["tt1", "tt2"], [])
+    await repository.upsert_movies([{"imdbID": "tt1", "Title": "Alien"}, {"imdbID": "tt2", "Title": "Aliens"}])
+
+    await repository.reconcile_facets(facets)
+
+    assert [movie["imdbID"] for movie in titles.suggest("alien")] == ["tt1"]
+    assert catalog.get("tt2") is None
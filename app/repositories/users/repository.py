@@ -45,6 +45,16 @@ class UserRepository:
             return UserInDB(**user_data)
         return None
 
+    async def update_password(self, email: str, hashed_password: str) -> None:
+        """
+        Replaces the stored password hash of a user.
+
+        Args:
+            email (str): The email of the user.
+            hashed_password (str): The new password hash.
+        """
+        await self.firestore_client.update_document(email, {"password": hashed_password})
+
     async def delete_user(self, email: str) -> None:
         """
         Deletes a user by document key (email).
@@ -1,12 +1,62 @@
-from fastapi import Depends, HTTPException, status
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from app.tools.config import Config
+from jose import JWTError
+from app.auth.tokens import get_token_verifier
+from app.container import Container
 from app.models.token import TokenData
+from app.services.movies.bulk_import import MovieImporter
+from app.services.movies.encoder import MovieEncoder, parse_fields
+from app.services.movies.service import MovieService
+from app.services.users.service import UserService
+from app.tools.jobs import JobRunner
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+# Dependencies are coroutines so FastAPI resolves them on the event loop instead of a worker thread
+async def get_container(request: Request) -> Container:
+    return request.app.state.container
+
+
+async def get_movie_service(container: Container = Depends(get_container)) -> MovieService:
+    return container.movie_service
+
+
+async def get_movie_encoder(container: Container = Depends(get_container)) -> MovieEncoder:
+    return container.movie_encoder
+
+
+async def get_movie_importer(container: Container = Depends(get_container)) -> MovieImporter:
+    return container.movie_importer
+
+
+async def get_job_runner(container: Container = Depends(get_container)) -> JobRunner:
+    return container.job_runner
+
+
+async def get_user_service(container: Container = Depends(get_container)) -> UserService:
+    return container.user_service
+
+
+async def get_field_projection(
+        fields: Optional[str] = Query(None, description="Comma-separated Movie fields to return, e.g. "
+                                                        "Title,Year,Poster,imdbID. All fields by default.")
+) -> Optional[List[str]]:
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def ensure_indexes_ready(container: Container = Depends(get_container)) -> None:
+    # Until the startup build finishes the indexes only hold part of the collection
+    if not container.movie_repository.ready:
+        raise HTTPException(status_code=503, detail="Movie indexes are still being built, try again later.",
+                            headers={"Retry-After": "5"})
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -14,7 +64,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, Config.TOKEN_SECRET_KEY(), algorithms=[Config.TOKEN_ALGORITHM()])
+        payload = get_token_verifier().verify(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -0,0 +1,182 @@
+import asyncio
+import math
+import time
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException
+
+from app.tools.metrics import REGISTRY
+from app.tools.resilience import CircuitOpenError, DeadlineExceededError, deadline
+from app.tools.tracing import InMemorySpanExporter, spans_to_dicts, tracer
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests handled.", ["method", "route", "status"])
+HTTP_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "Time to handle an HTTP request, body included.",
+                                  ["method", "route"])
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests being handled.", ["method", "route"])
+
+# Requests without a body, whose handlers never read from the client and can be cancelled when it leaves.
+_CANCELLABLE_METHODS = {"GET", "HEAD"}
+# Status recorded for requests abandoned by the client, as nginx does.
+CLIENT_CLOSED_REQUEST = 499
+# Requests are only watched for disconnects once they have run this long (e.g. while waiting on Firestore);
+# faster ones would lose more to the watcher than a disconnect could save.
+DISCONNECT_WATCH_DELAY_SECONDS = 0.01
+
+
+def _unavailable_exception(error: Exception) -> HTTPException:
+    """
+    Get the response to a request that failed without its dependency being called: 503 while a circuit
+    breaker is open, telling the client when to retry, and 504 once the request deadline expired.
+    """
+    if isinstance(error, CircuitOpenError):
+        return HTTPException(status_code=503, detail="Service temporarily unavailable, try again later.",
+                             headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))})
+    return HTTPException(status_code=504, detail="The request deadline expired.")
+
+
+def no_request_deadline(endpoint):
+    """
+    Exempt an endpoint whose requests are expected to run for long, such as exports and imports, from the
+    REQUEST_TIMEOUT_SECONDS deadline. A deadline sent by the caller still applies.
+    """
+    endpoint.request_deadline = False
+    return endpoint
+
+
+async def _wait_for_disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    API route recording request count, latency and in-flight requests, labelled with the route template
+    (e.g. /v1/movies/by-id/{movie_id}/) so that the number of time series stays bounded.
+
+    Each request is also the root span of a trace, continuing the caller's trace when a traceparent
+    header is sent.
+
+    Requests run under a deadline of REQUEST_TIMEOUT_SECONDS, shortened by an X-Request-Timeout header
+    (in seconds) sent by the caller, which bounds the Firestore calls made for them. Requests failing on
+    that deadline are answered 504, and those failed fast by an open circuit breaker 503. GET and HEAD
+    requests are cancelled, along with the calls they are waiting for, when the client disconnects.
+    """
+
+    async def handle(self, scope, receive, send) -> None:
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        traceparent = None
+        timeout = 0
+        if getattr(self.endpoint, "request_deadline", True):
+            timeout = scope["app"].state.container.settings.request_timeout_seconds
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+            elif name == b"x-request-timeout":
+                try:
+                    requested = float(value)
+                except ValueError:
+                    continue
+                if requested > 0:
+                    timeout = min(timeout, requested) if timeout > 0 else requested
+
+        in_flight = HTTP_IN_FLIGHT.labels(method, self.path)
+        in_flight.inc()
+        started = time.perf_counter()
+        span = tracer.start_root_span(f"{method} {self.path}", traceparent=traceparent)
+        try:
+            with span, deadline(timeout):
+                span.set_attribute("http.request.method", method)
+                span.set_attribute("http.route", self.path)
+                try:
+                    if method not in _CANCELLABLE_METHODS:
+                        await super().handle(scope, receive, send_with_status)
+                    elif await self._handle_until_disconnected(scope, receive, send_with_status):
+                        status = CLIENT_CLOSED_REQUEST
+                        span.set_status("ERROR", "Client disconnected")
+                except (CircuitOpenError, DeadlineExceededError) as e:
+                    exception = _unavailable_exception(e)
+                    status = exception.status_code
+                    raise exception from e
+                except HTTPException as e:
+                    # Sent by the exception middleware, outside of this route
+                    status = e.status_code
+                    if status < 500:
+                        span.set_status("OK")
+                    raise
+                finally:
+                    span.set_attribute("http.response.status_code", status)
+        finally:
+            HTTP_LATENCY.labels(method, self.path).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, self.path, str(status)).inc()
+            in_flight.dec()
+
+    async def _handle_until_disconnected(self, scope, receive, send) -> bool:
+        """
+        Handle a request, cancelling it if the client disconnects before it is done. The request keeps
+        running in the current task, and the task watching the client is only started when the request
+        takes longer than DISCONNECT_WATCH_DELAY_SECONDS.
+
+        Returns:
+            bool: True if the client disconnected and the request was cancelled.
+        """
+        task = asyncio.current_task()
+        disconnected = False
+
+        async def cancel_on_disconnect() -> None:
+            nonlocal disconnected
+            await _wait_for_disconnect(receive)
+            disconnected = True
+            task.cancel()
+
+        def start_watching() -> None:
+            nonlocal watcher
+            watcher = asyncio.ensure_future(cancel_on_disconnect())
+
+        watcher: Optional[asyncio.Task] = None
+        timer = asyncio.get_running_loop().call_later(DISCONNECT_WATCH_DELAY_SECONDS, start_watching)
+        try:
+            await super().handle(scope, receive, send)
+        except asyncio.CancelledError:
+            if not disconnected:
+                raise
+            if hasattr(task, "uncancel"):  # Python 3.11+
+                task.uncancel()
+            return True
+        finally:
+            timer.cancel()
+            if watcher is not None:
+                watcher.cancel()
+        return False
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Exposes the process metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/traces", include_in_schema=False)
+async def traces(trace_id: Optional[str] = None):
+    """
+    Returns the spans kept by the in-memory exporter, oldest first. Empty when another exporter is used.
+    """
+    exporter = tracer.exporter
+    if not isinstance(exporter, InMemorySpanExporter):
+        return {"spans": []}
+    return {"spans": spans_to_dicts(exporter.get_finished_spans(trace_id))}
@@ -1,64 +1,199 @@
-from fastapi import HTTPException, Query, Path, APIRouter, BackgroundTasks, Security
+from typing import List, Optional
+
+from fastapi import HTTPException, Query, Path, APIRouter, Depends, Request, Security
+from fastapi.responses import Response, StreamingResponse
 
 from app.services.movies.service import MovieService
-from app.repositories.movies.repository import MovieRepository
-from app.clients.firestore.firestore import get_firestore_client
-from app.clients.pub_sub.pub_sub import get_pub_sub_client
-from app.models.movies import Movie
-from app.models.pagination import Page
-from app.tools.logger import APPLogger
-from app.routers.dependencies import get_current_user
+from app.services.movies.bulk_import import MovieImporter, iter_lines
+from app.services.movies.encoder import MovieEncoder, negotiate
+from app.indexes.inverted import MAX_RESULTS
+from app.indexes.prefix import MAX_SUGGESTIONS
+from app.models.movies import CatalogStats, Movie, MovieIdsRequest, MoviesByIds, SearchHit, TitleSuggestion
+from app.models.imports import ImportReport
+from app.models.jobs import JobStatus
+from app.models.pagination import Page, SortableField
+from app.container import Container
+from app.routers.metrics import InstrumentedRoute, no_request_deadline
+from app.tools.http_cache import cache_control, etag_matches, make_etag
+from app.tools.jobs import JobRunner
+from app.tools.resilience import RESILIENCE_ERRORS
+from app.routers.dependencies import (
+    ensure_indexes_ready,
+    get_container,
+    get_current_user,
+    get_field_projection,
+    get_job_runner,
+    get_movie_encoder,
+    get_movie_importer,
+    get_movie_service,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
-logger = APPLogger()
-firestore_client = get_firestore_client(logger=logger)
-pub_sub_client = get_pub_sub_client(logger)
-movie_repository = MovieRepository(firestore_client)
-movie_service = MovieService(movie_repository, pub_sub_client, logger)
+
+def _encoded_response(request: Request, content: bytes, media_type: str) -> Response:
+    """
+    Send an encoded movie response with its ETag and caching headers, or 304 when the client's copy
+    is still current. Returned as is: the response model is only used for the documentation.
+    """
+    settings = request.app.state.container.settings
+    etag = make_etag(content)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control(settings.http_cache_max_age_seconds,
+                                       settings.http_cache_stale_while_revalidate_seconds),
+        "Vary": "Accept",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type=media_type, headers=headers)
 
 
 @router.get("/get-all-movies", response_model=Page[Movie])
-async def list_movies_paginated(page_size: int = Query(10, ge=1), start_after: str = Query(None)):
+async def list_movies_paginated(request: Request, page_size: int = Query(10, ge=1), start_after: str = Query(None),
+                                order_by: Optional[SortableField] = Query(None),
+                                fields: Optional[List[str]] = Depends(get_field_projection),
+                                movie_service: MovieService = Depends(get_movie_service),
+                                movie_encoder: MovieEncoder = Depends(get_movie_encoder)):
+    try:
+        documents, next_page_token = await movie_service.get_movie_page(page_size=page_size,
+                                                                        start_after=start_after,
+                                                                        order_by=order_by, field_paths=fields)
+    except RESILIENCE_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type = negotiate(request.headers.get("accept"))
+    content = movie_encoder.encode_page(documents, next_page_token, media_type, fields)
+    return _encoded_response(request, content, media_type)
+
+
+@router.get("/export")
+@no_request_deadline
+async def export_movies(gzip: bool = Query(False), container: Container = Depends(get_container)):
+    """
+    Streams the whole movie collection as NDJSON, optionally gzip encoded.
+    """
+    headers = {"Content-Disposition": "attachment; filename=movies.ndjson"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    chunks = container.movie_service.export_movies(page_size=container.settings.export_page_size, compress=gzip)
+    return StreamingResponse(chunks, media_type="application/x-ndjson", headers=headers)
+
+
+@router.get("/suggest", response_model=List[TitleSuggestion], dependencies=[Depends(ensure_indexes_ready)])
+async def suggest_titles(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+                        movie_service: MovieService = Depends(get_movie_service)):
+    """
+    Suggests titles starting with the typed text, most voted first.
+    """
+    return movie_service.suggest_titles(q, limit)
+
+
+@router.get("/stats", response_model=CatalogStats, dependencies=[Depends(ensure_indexes_ready)])
+async def get_catalog_stats(movie_service: MovieService = Depends(get_movie_service)):
+    """
+    Counts the movies, in total and per genre, type, year and rating, from counters kept in memory.
+    """
+    return movie_service.get_stats()
+
+
+@router.get("/search", response_model=List[SearchHit], dependencies=[Depends(ensure_indexes_ready)])
+async def search_movies(q: str = Query(..., min_length=1), movie_type: Optional[str] = Query(None, alias="type"),
+                        year_from: Optional[int] = Query(None), year_to: Optional[int] = Query(None),
+                        limit: int = Query(10, ge=1, le=MAX_RESULTS),
+                        movie_service: MovieService = Depends(get_movie_service)):
+    """
+    Full-text search over title, actors, director, writer, genre and plot, best match first.
+    """
     try:
-        movies, next_page_token = await movie_service.get_all_movies(page_size=page_size, start_after=start_after)
-        return Page(items=movies, next_page_token=next_page_token, page_size=len(movies))
+        hits = await movie_service.search_movies(q, movie_type=movie_type, year_from=year_from, year_to=year_to,
+                                                 limit=limit)
+    except RESILIENCE_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return [SearchHit(score=score, movie=movie.to_dict()) for movie, score in hits]
 
 
 @router.get("/by-id/{movie_id}/", response_model=Movie)
-async def get_movie_by_id(movie_id: str = Path(...)):
-    movie = await movie_service.get_movie_by_id(movie_id)
+async def get_movie_by_id(request: Request, movie_id: str = Path(...),
+                          fields: Optional[List[str]] = Depends(get_field_projection),
+                          movie_service: MovieService = Depends(get_movie_service),
+                          movie_encoder: MovieEncoder = Depends(get_movie_encoder)):
+    movie = await movie_service.get_movie_by_id(movie_id, field_paths=fields)
     if not movie:
         raise HTTPException(status_code=404, detail="Movie id not found")
-    return movie.to_dict()
+    media_type = negotiate(request.headers.get("accept"))
+    return _encoded_response(request, movie_encoder.encode_movie(movie, media_type, fields), media_type)
+
+
+@router.post("/by-ids", response_model=MoviesByIds)
+async def get_movies_by_ids(request: MovieIdsRequest, movie_service: MovieService = Depends(get_movie_service)):
+    try:
+        movies = await movie_service.get_movies_by_ids(request.ids)
+    except RESILIENCE_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [movie.to_dict() if movie else None for movie in movies]
+    not_found = [movie_id for movie_id, movie in zip(request.ids, movies) if not movie]
+    return MoviesByIds(items=items, not_found=not_found)
 
 
 @router.get("/title/", response_model=Movie)
-async def get_movie_by_title(title: str = Query(...)):
-    movie = await movie_service.get_movie_by_title(title)
+async def get_movie_by_title(request: Request, title: str = Query(...),
+                             fields: Optional[List[str]] = Depends(get_field_projection),
+                             movie_service: MovieService = Depends(get_movie_service),
+                             movie_encoder: MovieEncoder = Depends(get_movie_encoder)):
+    movie = await movie_service.get_movie_by_title(title, field_paths=fields)
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
-    return movie.to_dict()
+    media_type = negotiate(request.headers.get("accept"))
+    return _encoded_response(request, movie_encoder.encode_movie(movie, media_type, fields), media_type)
 
 
 @router.post("/", response_model=Movie)
-async def create_movie(movie_data: Movie):
+async def create_movie(movie_data: Movie, movie_service: MovieService = Depends(get_movie_service)):
     created_movie = await movie_service.create_movie(movie_data.dict())
     return created_movie.to_dict()
 
 
+@router.post("/import", response_model=ImportReport)
+@no_request_deadline
+async def import_movies(request: Request, current_user: str = Security(get_current_user),
+                        movie_importer: MovieImporter = Depends(get_movie_importer)):
+    """
+    Upserts movies streamed as NDJSON in the request body, one movie per line.
+    """
+    return await movie_importer.run(iter_lines(request.stream()))
+
+
 @router.delete("/{movie_id}/", status_code=204)
-async def delete_movie(movie_id: str, current_user: str = Security(get_current_user)):
+async def delete_movie(movie_id: str, current_user: str = Security(get_current_user),
+                       movie_service: MovieService = Depends(get_movie_service)):
     await movie_service.delete_movie(movie_id)
     return {"detail": "Movie deleted successfully"}
 
 
 @router.post("/notify-if-empty/")
-async def notify_empty_collection(background_tasks: BackgroundTasks):
+async def notify_empty_collection(movie_service: MovieService = Depends(get_movie_service),
+                                  job_runner: JobRunner = Depends(get_job_runner)):
     """
     Checks if the movie collection is empty and notifies via Pub/Sub if it is.
+    Concurrent requests share the same check; poll /jobs/{job_id} for its outcome.
+    """
+    job = job_runner.submit("notify-if-empty", movie_service.notify_if_empty)
+    return {"message": "Database check in progress", "job_id": job.id}
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job_status(job_id: str = Path(..., description="The job ID returned when the job was started"),
+                         job_runner: JobRunner = Depends(get_job_runner)):
+    """
+    Returns the status of a background job: pending, running, succeeded or failed, with its result or last error.
     """
-    background_tasks.add_task(movie_service.notify_empty_collection)
-    return {"message": "Database check in progress"}
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatus.model_validate(job, from_attributes=True)
@@ -0,0 +1,151 @@
+import asyncio
+import codecs
+import json
+import time
+from typing import AsyncIterator, Dict, Set, Tuple, Union
+
+from pydantic import ValidationError
+
+from app.models.imports import ImportFailure, ImportReport
+from app.models.movies import Movie
+from app.repositories.movies.repository import IMovieRepository
+from app.tools.base_logger import ILogger, LogLevel
+
+# Maximum number of per-row failures kept in the report; the failure count is always exact.
+MAX_REPORTED_FAILURES = 1000
+
+
+async def iter_lines(chunks: AsyncIterator[Union[bytes, str]]) -> AsyncIterator[str]:
+    """
+    Split a stream of byte or text chunks into lines, without holding more than one line in memory.
+    Byte chunks are decoded incrementally, so a UTF-8 character may be split across chunks.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+class MovieImporter:
+    def __init__(self, movie_repository: IMovieRepository, logger: ILogger, batch_size: int = 500,
+                 max_concurrency: int = 4):
+        """
+        Initializes the bulk import pipeline.
+
+        Args:
+            movie_repository (IMovieRepository): The repository the movies are upserted into.
+            logger (ILogger): The application logger.
+            batch_size (int): Number of movies sent to the repository in one upsert.
+            max_concurrency (int): Maximum number of upserts in flight at the same time.
+        """
+        self.movie_repository = movie_repository
+        self.logger = logger
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+
+    async def run(self, lines: AsyncIterator[str]) -> ImportReport:
+        """
+        Import movies from NDJSON lines.
+
+        Rows are validated against the Movie model as they arrive, grouped in batches and upserted on
+        imdbID. Movies whose content did not change are skipped by the repository. When an imdbID appears
+        on several lines, the last one wins: a batch repeating an ID still being written by an earlier
+        batch waits for it.
+
+        Args:
+            lines (AsyncIterator[str]): The NDJSON lines, one movie per line. Blank lines are ignored.
+
+        Returns:
+            ImportReport: Row counts, per-row failures and throughput of the import.
+        """
+        started = time.perf_counter()
+        report = ImportReport(rows=0, written=0, unchanged=0, failed=0, failures=[], elapsed_seconds=0,
+                              rows_per_second=0)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        pending = set()
+        batch: Dict[str, Tuple[int, dict]] = {}
+        # Batch being written for each imdbID
+        writers: Dict[str, asyncio.Task] = {}
+
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            report.rows += 1
+            row = None
+            try:
+                row = json.loads(line)
+                movie = Movie(**row)
+            except (ValueError, TypeError) as e:
+                imdb_id = row.get("imdbID") if isinstance(row, dict) else None
+                self._add_failure(report, line_number, imdb_id, self._describe(e))
+                continue
+
+            # A later row for the same imdbID replaces the earlier one in the batch.
+            batch[movie.imdbID] = (line_number, movie.dict())
+            if len(batch) >= self.batch_size:
+                await semaphore.acquire()
+                pending.add(self._start_batch(batch, writers, report, semaphore))
+                pending = {task for task in pending if not task.done()}
+                batch = {}
+
+        if batch:
+            await semaphore.acquire()
+            pending.add(self._start_batch(batch, writers, report, semaphore))
+        await asyncio.gather(*pending)
+
+        report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        report.rows_per_second = round(report.rows / report.elapsed_seconds, 1) if report.elapsed_seconds else 0
+        self.logger.log(LogLevel.INFO, "Imported %s rows: %s written, %s unchanged, %s failed in %ss",
+                        report.rows, report.written, report.unchanged, report.failed, report.elapsed_seconds)
+        return report
+
+    def _start_batch(self, batch: Dict[str, Tuple[int, dict]], writers: Dict[str, asyncio.Task],
+                     report: ImportReport, semaphore: asyncio.Semaphore) -> asyncio.Task:
+        earlier = {writers[imdb_id] for imdb_id in batch if imdb_id in writers}
+        task = asyncio.ensure_future(self._write_batch(batch, report, semaphore, earlier))
+        for imdb_id in batch:
+            writers[imdb_id] = task
+
+        def forget(done: asyncio.Task) -> None:
+            for imdb_id in batch:
+                if writers.get(imdb_id) is done:
+                    del writers[imdb_id]
+
+        task.add_done_callback(forget)
+        return task
+
+    async def _write_batch(self, batch: Dict[str, Tuple[int, dict]], report: ImportReport,
+                           semaphore: asyncio.Semaphore, earlier: Set[asyncio.Task]) -> None:
+        try:
+            if earlier:
+                # The earlier batches hold their own slots, so waiting for them with this one cannot deadlock
+                await asyncio.wait(earlier)
+            written, unchanged = await self.movie_repository.upsert_movies([row for _, row in batch.values()])
+            report.written += len(written)
+            report.unchanged += len(unchanged)
+        except Exception as e:
+            self.logger.log(LogLevel.ERROR, "Failed to write a batch of %s movies. Error: %s", len(batch), e)
+            for imdb_id, (line_number, _) in batch.items():
+                self._add_failure(report, line_number, imdb_id, f"Write failed: {e}")
+        finally:
+            semaphore.release()
+
+    @staticmethod
+    def _add_failure(report: ImportReport, line_number: int, imdb_id, error: str) -> None:
+        report.failed += 1
+        if len(report.failures) < MAX_REPORTED_FAILURES:
+            report.failures.append(ImportFailure(line=line_number, imdbID=imdb_id, error=error))
+
+    @staticmethod
+    def _describe(error: Exception) -> str:
+        if isinstance(error, ValidationError):
+            return "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors())
+        return str(error)
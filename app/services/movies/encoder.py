@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import orjson
+
+from app.models.movies import Movie
+
+try:
+    import msgpack
+except ImportError:  # MessagePack responses are optional
+    msgpack = None
+
+if TYPE_CHECKING:
+    from google.cloud.firestore_v1 import DocumentSnapshot
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# Fields returned for a movie; internal fields stored with the document (e.g. the content hash) are left out.
+MOVIE_FIELDS = tuple(Movie.model_fields)
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse the comma-separated fields of a projection, e.g. "Title,Year,Poster".
+
+    Returns:
+        Optional[List[str]]: The requested fields in Movie order, or None when every field is requested.
+
+    Raises:
+        ValueError: If a field is not a Movie field.
+    """
+    if value is None:
+        return None
+    requested = {field.strip() for field in value.split(",") if field.strip()}
+    unknown = requested.difference(MOVIE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if not requested:
+        raise ValueError("No fields requested")
+    return [field for field in MOVIE_FIELDS if field in requested]
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Pick the response format from an Accept header: MessagePack when the client lists it (and msgpack is
+    installed), JSON otherwise.
+    """
+    if not accept or msgpack is None:
+        return JSON
+    for media_range in accept.split(","):
+        media_type, _, params = media_range.partition(";")
+        if media_type.strip().lower() in _MSGPACK_TYPES and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            return MSGPACK
+    return JSON
+
+
+class MovieEncoder:
+    def __init__(self, max_size: int = 10000) -> None:
+        """
+        Serializes stored movies for the API responses without going through the Movie model.
+
+        Movies are validated when they are written, so reads only need their public fields picked out.
+        The encoded bytes of each movie are kept per format and document update time, and pages are
+        assembled from them without encoding the movies again.
+
+        Args:
+            max_size (int): Number of encoded movies kept, per format. Zero disables the cache.
+        """
+        self._max_size = max_size
+        self._encoded: Dict[str, OrderedDict[str, Tuple[object, bytes]]] = {JSON: OrderedDict(),
+                                                                             MSGPACK: OrderedDict()}
+
+    def encode_movie(self, document: DocumentSnapshot, media_type: str = JSON,
+                     fields: Optional[List[str]] = None) -> bytes:
+        """
+        Get the encoded movie of a document, from the cache when the document did not change.
+
+        Args:
+            fields (List[str], optional): Only encode these fields. Projections are not cached.
+        """
+        cache = self._encoded[media_type]
+        update_time = document.update_time
+        if fields is None:
+            cached = cache.get(document.id)
+            if cached is not None and update_time is not None and cached[0] == update_time:
+                cache.move_to_end(document.id)
+                return cached[1]
+
+        data = document.to_dict() or {}
+        payload = {field: data.get(field) for field in fields or MOVIE_FIELDS}
+        encoded = msgpack.packb(payload) if media_type == MSGPACK else orjson.dumps(payload)
+        if fields is None and self._max_size and update_time is not None:
+            cache[document.id] = (update_time, encoded)
+            cache.move_to_end(document.id)
+            if len(cache) > self._max_size:
+                cache.popitem(last=False)
+        return encoded
+
+    def encode_page(self, documents: List[DocumentSnapshot], next_page_token: Optional[str],
+                    media_type: str = JSON, fields: Optional[List[str]] = None) -> bytes:
+        """
+        Encode a page of movies with the shape of Page[Movie], or of a page of partial movies.
+        """
+        items = [self.encode_movie(document, media_type, fields) for document in documents]
+        if media_type == MSGPACK:
+            # MessagePack values can be concatenated, so only the headers are packed here.
+            packer = msgpack.Packer()
+            return b"".join([
+                packer.pack_map_header(3),
+                packer.pack("items"), packer.pack_array_header(len(items)), *items,
+                packer.pack("next_page_token"), packer.pack(next_page_token),
+                packer.pack("page_size"), packer.pack(len(items)),
+            ])
+        return b"".join([
+            b'{"items":[', b",".join(items), b'],"next_page_token":', orjson.dumps(next_page_token),
+            b',"page_size":', str(len(items)).encode(), b"}",
+        ])
@@ -1,60 +1,202 @@
-from typing import Optional, Tuple, List
+from __future__ import annotations
 
-from app.repositories.movies.repository import IMovieRepository, DocumentSnapshot
+import json
+import zlib
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Tuple, List
+
+from app.repositories.movies.repository import IMovieRepository
 from app.clients.base_message_service import IMessageService
+from app.clients.memory.memory_db import MemoryDocumentSnapshot
 from app.tools.base_logger import ILogger, LogLevel
+from app.indexes.facets import FacetIndex
+from app.indexes.inverted import InvertedIndex
+from app.indexes.prefix import TitlePrefixIndex
+from app.indexes.store import CompactMovieStore
 from app.models.movies import Movie
+from app.tools.resilience import RESILIENCE_ERRORS
+from app.tools.tracing import current_span, traced
+
+if TYPE_CHECKING:
+    from google.cloud.firestore_v1 import DocumentSnapshot
+
+# Size of the chunks handed to the HTTP response while exporting the collection.
+EXPORT_CHUNK_SIZE = 64 * 1024
 
 
 class MovieService:
-    def __init__(self, movie_repository: IMovieRepository, pub_sub_client: IMessageService, logger: ILogger):
+    def __init__(self, movie_repository: IMovieRepository, pub_sub_client: IMessageService, logger: ILogger,
+                 title_index: Optional[TitlePrefixIndex] = None, search_index: Optional[InvertedIndex] = None,
+                 facet_index: Optional[FacetIndex] = None, movie_store: Optional[CompactMovieStore] = None):
         """
         Initializes the MovieService with a movie repository and a pub/sub client.
 
         Args:
             movie_repository (IMovieRepository): An instance of a class that implements the IMovieRepository interface.
             pub_sub_client (IMessageService): An instance of a class that implements the IMessageService interface.
+            title_index (TitlePrefixIndex, optional): Prefix index over titles used for suggestions.
+            search_index (InvertedIndex, optional): Full-text index used for searches.
+            facet_index (FacetIndex, optional): Movie counters used for the catalog statistics.
+            movie_store (CompactMovieStore, optional): In-memory copy of the catalog the search results are
+                                                       read from, instead of the database.
         """
         self.movie_repository = movie_repository
         self.pub_sub_client = pub_sub_client
         self.logger = logger
+        self.title_index = title_index
+        self.search_index = search_index
+        self.facet_index = facet_index
+        self.movie_store = movie_store
 
-    async def get_all_movies(self, page_size: int = 10, start_after: str = None) -> Tuple[List[Movie], Optional[str]]:
-        return await self.movie_repository.get_all_movies(page_size=page_size, start_after=start_after)
+    @traced()
+    async def get_all_movies(self, page_size: int = 10, start_after: str = None,
+                             order_by: Optional[str] = None) -> Tuple[List[Movie], Optional[str]]:
+        span = current_span()
+        span.set_attribute("movies.page_size", page_size)
+        movies, next_page_token = await self.movie_repository.get_all_movies(page_size=page_size,
+                                                                             start_after=start_after,
+                                                                             order_by=order_by)
+        span.set_attribute("movies.count", len(movies))
+        return movies, next_page_token
+
+    @traced()
+    async def get_movie_page(self, page_size: int = 10, start_after: str = None, order_by: Optional[str] = None,
+                             field_paths: Optional[List[str]] = None) -> Tuple[List[DocumentSnapshot], Optional[str]]:
+        span = current_span()
+        span.set_attribute("movies.page_size", page_size)
+        documents, next_page_token = await self.movie_repository.get_movie_page(page_size=page_size,
+                                                                                start_after=start_after,
+                                                                                order_by=order_by,
+                                                                                field_paths=field_paths)
+        span.set_attribute("movies.count", len(documents))
+        return documents, next_page_token
+
+    async def export_movies(self, page_size: int = 500, compress: bool = False) -> AsyncIterator[bytes]:
+        """
+        Export the whole collection as NDJSON, one movie per line.
+
+        Movies are streamed page by page from the repository and grouped in chunks of about
+        EXPORT_CHUNK_SIZE bytes, so memory use does not depend on the collection size.
+
+        Args:
+            page_size (int): Number of movies read from the database per query.
+            compress (bool): Gzip the output.
+
+        Yields:
+            bytes: The next chunk of the export.
+        """
+        self.logger.log(LogLevel.INFO, "Exporting movie collection")
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+        buffer = bytearray()
+        async for movie in self.movie_repository.iter_all_movies(page_size=page_size):
+            buffer += json.dumps(movie, default=str).encode("utf-8") + b"\n"
+            if len(buffer) >= EXPORT_CHUNK_SIZE:
+                chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+                buffer.clear()
+                if chunk:
+                    yield chunk
+        tail = bytes(buffer)
+        if compressor:
+            tail = compressor.compress(tail) + compressor.flush()
+        if tail:
+            yield tail
 
-    async def get_movie_by_id(self, movie_id: str) -> Optional[DocumentSnapshot]:
-        self.logger.log(LogLevel.INFO, f"Getting movie by id: {movie_id}")
+    @traced()
+    async def get_movie_by_id(self, movie_id: str,
+                              field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
+        self.logger.log(LogLevel.INFO, "Getting movie by id: %s", movie_id)
         try:
-            return await self.movie_repository.get_movie_by_id(movie_id)
+            return await self.movie_repository.get_movie_by_id(movie_id, field_paths=field_paths)
+        except RESILIENCE_ERRORS:
+            raise
         except Exception:
-            self.logger.log(LogLevel.ERROR, f"Failed to get movie by id: {movie_id}")
+            self.logger.log(LogLevel.ERROR, "Failed to get movie by id: %s", movie_id)
 
-    async def get_movie_by_title(self, title: str) -> Optional[DocumentSnapshot]:
-        self.logger.log(LogLevel.INFO, f"Getting movie by title: {title}")
+    @traced()
+    async def get_movies_by_ids(self, movie_ids: List[str]) -> List[Optional[DocumentSnapshot]]:
+        self.logger.log(LogLevel.INFO, "Getting %s movies by id", len(movie_ids))
+        return await self.movie_repository.get_movies_by_ids(movie_ids)
+
+    @traced()
+    async def get_movie_by_title(self, title: str,
+                                 field_paths: Optional[List[str]] = None) -> Optional[DocumentSnapshot]:
+        self.logger.log(LogLevel.INFO, "Getting movie by title: %s", title)
         try:
-            return await self.movie_repository.get_movie_by_title(title)
+            return await self.movie_repository.get_movie_by_title(title, field_paths=field_paths)
+        except RESILIENCE_ERRORS:
+            raise
         except Exception:
-            self.logger.log(LogLevel.ERROR, f"Failed to get movie by title: {title}")
+            self.logger.log(LogLevel.ERROR, "Failed to get movie by title: %s", title)
+
+    def suggest_titles(self, query: str, limit: int = 10) -> List[dict]:
+        if self.title_index is None:
+            return []
+        return self.title_index.suggest(query, limit)
+
+    def get_stats(self) -> dict:
+        if self.facet_index is None:
+            return {"total": 0, "facets": {}}
+        return self.facet_index.stats()
+
+    @traced()
+    async def search_movies(self, query: str, movie_type: Optional[str] = None, year_from: Optional[int] = None,
+                            year_to: Optional[int] = None, limit: int = 10) -> List[Tuple[DocumentSnapshot, float]]:
+        """
+        Search movies with the full-text index and get their documents from the movie store if there is
+        one, or else with one batched read.
 
+        Returns:
+            List[Tuple[DocumentSnapshot, float]]: The matching movies and their scores, best match first.
+        """
+        if self.search_index is None:
+            return []
+        self.logger.log(LogLevel.INFO, "Searching movies: %s", query)
+        hits = self.search_index.search(query, movie_type=movie_type, year_from=year_from, year_to=year_to,
+                                        limit=limit)
+        if not hits:
+            return []
+        if self.movie_store is not None:
+            movies = [self._stored_movie(movie_id) for movie_id, _ in hits]
+        else:
+            movies = await self.movie_repository.get_movies_by_ids([movie_id for movie_id, _ in hits])
+        current_span().set_attribute("movies.count", len(hits))
+        return [(movie, score) for movie, (_, score) in zip(movies, hits) if movie]
+
+    @traced()
     async def create_movie(self, movie_data: dict) -> DocumentSnapshot:
-        self.logger.log(LogLevel.INFO, f"Creating new movie entry")
+        self.logger.log(LogLevel.INFO, "Creating new movie entry")
         try:
             return await self.movie_repository.create_movie(movie_data)
+        except RESILIENCE_ERRORS:
+            raise
         except Exception:
-            self.logger.log(LogLevel.ERROR, f"Failed to create movie: {movie_data}")
+            self.logger.log(LogLevel.ERROR, "Failed to create movie: %s", movie_data)
 
+    @traced()
     async def delete_movie(self, movie_id: str) -> None:
-        self.logger.log(LogLevel.INFO, f"Deleting movie: {movie_id}")
+        self.logger.log(LogLevel.INFO, "Deleting movie: %s", movie_id)
         try:
             await self.movie_repository.delete_movie(movie_id)
+        except RESILIENCE_ERRORS:
+            raise
         except Exception as e:
-            self.logger.log(LogLevel.ERROR, f"Failed to delete movie: {movie_id}")
+            self.logger.log(LogLevel.ERROR, "Failed to delete movie: %s", movie_id)
 
-    async def notify_empty_collection(self):
+    @traced()
+    async def notify_if_empty(self) -> bool:
         """
         Check if the movie collection is empty and notify via the publish-subscribe client if it is.
+
+        Returns:
+            bool: True if the collection is empty (and the notification was published).
+
+        Raises:
+            Exception: If the check or the publication failed, so the caller can retry.
         """
-        # TODO add retry logic
         is_empty = await self.movie_repository.check_empty_collection()
         if is_empty:
-            self.pub_sub_client.publish({"Status": "Empty"})
+            await self.pub_sub_client.publish({"Status": "Empty"})
+        return is_empty
+
+    def _stored_movie(self, movie_id: str) -> Optional[MemoryDocumentSnapshot]:
+        data = self.movie_store.get_data(movie_id)
+        return MemoryDocumentSnapshot(movie_id, data) if data is not None else None
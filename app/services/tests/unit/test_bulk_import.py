@@ -0,0 +1,98 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.movies.bulk_import import MovieImporter, iter_lines
+
+
+def movie_row(imdb_id: str, title: str) -> dict:
+    fields = ["Rated", "Released", "Runtime", "Genre", "Director", "Writer", "Actors", "Plot", "Language",
+              "Country", "Awards", "Poster", "Ratings", "Metascore", "imdbRating", "imdbVotes", "Type", "DVD",
+              "BoxOffice", "Production", "Website", "Response"]
+    return {"Title": title, "Year": "1979", "imdbID": imdb_id, **{field: None for field in fields}}
+
+
+async def as_stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_splits_chunks():
+    lines = [line async for line in iter_lines(as_stream(b'{"a"', b': 1}\n{"b": 2}\n', b'{"c": 3}'))]
+
+    assert lines == ['{"a": 1}', '{"b": 2}', '{"c": 3}']
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_decodes_characters_split_across_chunks():
+    encoded = '{"Title": "Amélie"}\n'.encode("utf-8")
+    split_at = encoded.index("é".encode("utf-8")) + 1
+
+    lines = [line async for line in iter_lines(as_stream(encoded[:split_at], encoded[split_at:]))]
+
+    assert lines == ['{"Title": "Amélie"}']
+
+
+@pytest.mark.asyncio
+async def test_run_batches_rows_and_reports_failures():
+    mock_movie_repository = AsyncMock()
+    mock_movie_repository.upsert_movies.side_effect = lambda rows: ([row["imdbID"] for row in rows[:-1]],
+                                                                    [rows[-1]["imdbID"]])
+    mock_logger = AsyncMock()
+
+    lines = [json.dumps(movie_row(f"tt{i}", f"Movie {i}")) for i in range(5)]
+    lines.insert(2, '{"Title": "No id"}')
+    lines.insert(3, "")
+    lines.append("not json")
+
+    importer = MovieImporter(mock_movie_repository, mock_logger, batch_size=2, max_concurrency=2)
+
+    report = await importer.run(as_stream(*lines))
+
+    assert report.rows == 7
+    assert report.written == 2
+    assert report.unchanged == 3
+    assert report.failed == 2
+    assert [failure.line for failure in report.failures] == [3, 8]
+    assert mock_movie_repository.upsert_movies.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_run_reports_every_row_of_a_failed_batch():
+    mock_movie_repository = AsyncMock()
+    mock_movie_repository.upsert_movies.side_effect = Exception("Database error")
+    mock_logger = AsyncMock()
+
+    lines = [json.dumps(movie_row(f"tt{i}", f"Movie {i}")) for i in range(3)]
+
+    importer = MovieImporter(mock_movie_repository, mock_logger, batch_size=10)
+
+    report = await importer.run(as_stream(*lines))
+
+    assert report.failed == 3
+    assert {failure.imdbID for failure in report.failures} == {"tt0", "tt1", "tt2"}
+
+
+@pytest.mark.asyncio
+async def test_run_keeps_the_last_row_of_ids_repeated_across_concurrent_batches():
+    stored = {}
+
+    async def upsert_movies(rows):
+        # The first batch is the slowest: it would land last if the batches were not ordered
+        await asyncio.sleep(0.01 if rows[0]["Title"] == "First" else 0)
+        stored.update({row["imdbID"]: row["Title"] for row in rows})
+        return [row["imdbID"] for row in rows], []
+
+    mock_movie_repository = AsyncMock()
+    mock_movie_repository.upsert_movies.side_effect = upsert_movies
+
+    lines = [json.dumps(movie_row("tt1", "First")), json.dumps(movie_row("tt2", "Other")),
+             json.dumps(movie_row("tt1", "Second")), json.dumps(movie_row("tt3", "Other"))]
+    importer = MovieImporter(mock_movie_repository, AsyncMock(), batch_size=2, max_concurrency=2)
+
+    await importer.run(as_stream(*lines))
+
+    assert stored["tt1"] == "Second"
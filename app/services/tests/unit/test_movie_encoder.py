@@ -0,0 +1,84 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.clients.memory.memory_db import MemoryDocumentSnapshot
+from app.models.movies import Movie
+from app.models.pagination import Page
+from app.services.movies import encoder
+from app.services.movies.encoder import JSON, MSGPACK, MovieEncoder, negotiate, parse_fields
+
+UPDATED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def snapshot(imdb_id: str, title: str, update_time: datetime = UPDATED) -> MemoryDocumentSnapshot:
+    data = {field: None for field in Movie.model_fields}
+    data.update({"Title": title, "Year": "1979", "imdbID": imdb_id, "_content_hash": "abc",
+                 "Ratings": [{"Source": "IMDb", "Value": "8.5/10"}]})
+    return MemoryDocumentSnapshot(imdb_id, data, UPDATED, update_time)
+
+
+def test_encode_page_matches_the_response_model():
+    documents = [snapshot("tt1", "Alien"), snapshot("tt2", "Aliens")]
+
+    encoded = MovieEncoder().encode_page(documents, "token")
+
+    movies = [Movie(**document.to_dict()) for document in documents]
+    assert json.loads(encoded) == Page[Movie](items=movies, next_page_token="token", page_size=2).model_dump()
+
+
+def test_encoded_movie_is_reused_until_the_document_changes():
+    movie_encoder = MovieEncoder()
+    first = movie_encoder.encode_movie(snapshot("tt1", "Alien"))
+
+    assert movie_encoder.encode_movie(snapshot("tt1", "Changed")) is first
+    updated = movie_encoder.encode_movie(snapshot("tt1", "Changed", UPDATED + timedelta(seconds=1)))
+    assert json.loads(updated)["Title"] == "Changed"
+
+
+def test_projection_is_encoded_without_replacing_the_cached_movie():
+    movie_encoder = MovieEncoder()
+    full = movie_encoder.encode_movie(snapshot("tt1", "Alien"))
+
+    partial = movie_encoder.encode_movie(snapshot("tt1", "Alien"), fields=["Title", "imdbID"])
+
+    assert json.loads(partial) == {"Title": "Alien", "imdbID": "tt1"}
+    assert movie_encoder.encode_movie(snapshot("tt1", "Alien")) is full
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields("imdbID, Title,Year") == ["Title", "Year", "imdbID"]
+    with pytest.raises(ValueError):
+        parse_fields("Title,_content_hash")
+    with pytest.raises(ValueError):
+        parse_fields(",")
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON),
+    ("application/json", JSON),
+    ("application/msgpack", MSGPACK),
+    ("application/json, application/x-msgpack;q=0.9", MSGPACK),
+    ("application/msgpack;q=0", JSON),
+])
+def test_negotiate(monkeypatch, accept, expected):
+    monkeypatch.setattr(encoder, "msgpack", object())
+
+    assert negotiate(accept) == expected
+
+
+def test_negotiate_falls_back_to_json_without_msgpack(monkeypatch):
+    monkeypatch.setattr(encoder, "msgpack", None)
+
+    assert negotiate("application/msgpack") == JSON
+
+
+def test_encode_page_as_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+    documents = [snapshot("tt1", "Alien")]
+
+    encoded = MovieEncoder().encode_page(documents, None, MSGPACK)
+
+    assert msgpack.unpackb(encoded) == json.loads(MovieEncoder().encode_page(documents, None))
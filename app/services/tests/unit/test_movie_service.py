@@ -1,10 +1,15 @@
-from unittest.mock import AsyncMock, call
+import gzip
+import json
+from unittest.mock import AsyncMock, MagicMock, call
 
 import pytest
 
+from app.indexes.inverted import InvertedIndex
+from app.indexes.store import CompactMovieStore
 from app.services.movies.service import MovieService
 from app.tools.base_logger import LogLevel
 from app.models.movies import Movie
+from app.tools.resilience import CircuitOpenError, DeadlineExceededError
 
 
 @pytest.mark.asyncio
@@ -20,10 +25,10 @@ async def test_get_movie_by_id_success():
     movie = await movie_service.get_movie_by_id("123")
 
     assert movie is not None, "It Should be DocumentSnapshot."
-    mock_movie_repository.get_movie_by_id.assert_awaited_once_with("123"), "get_movie_by_id wasn't called correctly."
-    mock_logger.log.assert_any_call(LogLevel.INFO, f"Getting movie by id: 123")
+    mock_movie_repository.get_movie_by_id.assert_awaited_once_with("123", field_paths=None), "get_movie_by_id wasn't called correctly."
+    mock_logger.log.assert_any_call(LogLevel.INFO, "Getting movie by id: %s", "123")
 
-    error_call = call(LogLevel.ERROR, f"Failed to get movie by id: 123")
+    error_call = call(LogLevel.ERROR, "Failed to get movie by id: %s", "123")
     assert error_call not in mock_logger.log.call_args_list, "Shouldn't log error for a successful op"
 
 
@@ -40,9 +45,21 @@ async def test_get_movie_by_id_failure():
     movie = await movie_service.get_movie_by_id("123")
 
     assert movie is None, "It should be None"
-    mock_movie_repository.get_movie_by_id.assert_awaited_once_with("123"), "get_movie_by_id wasn't called correctly."
-    mock_logger.log.assert_any_call(LogLevel.INFO, "Getting movie by id: 123")
-    mock_logger.log.assert_any_call(LogLevel.ERROR, "Failed to get movie by id: 123")
+    mock_movie_repository.get_movie_by_id.assert_awaited_once_with("123", field_paths=None), "get_movie_by_id wasn't called correctly."
+    mock_logger.log.assert_any_call(LogLevel.INFO, "Getting movie by id: %s", "123")
+    mock_logger.log.assert_any_call(LogLevel.ERROR, "Failed to get movie by id: %s", "123")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [CircuitOpenError("open"), DeadlineExceededError("expired")])
+async def test_get_movie_by_id_does_not_hide_unavailable_database(error):
+    mock_movie_repository = AsyncMock()
+    mock_movie_repository.get_movie_by_id.side_effect = error
+
+    movie_service = MovieService(mock_movie_repository, AsyncMock(), AsyncMock())
+
+    with pytest.raises(type(error)):
+        await movie_service.get_movie_by_id("123")
 
 
 @pytest.mark.asyncio
@@ -58,10 +75,10 @@ async def test_get_movie_by_title_success():
     movie = await movie_service.get_movie_by_title("Titanic")
 
     assert movie is not None, "It should DocumentSnapshot."
-    mock_movie_repository.get_movie_by_title.assert_awaited_once_with("Titanic"), "get_movie_by_title wasn't called correctly."
-    mock_logger.log.assert_any_call(LogLevel.INFO, f"Getting movie by title: Titanic")
+    mock_movie_repository.get_movie_by_title.assert_awaited_once_with("Titanic", field_paths=None), "get_movie_by_title wasn't called correctly."
+    mock_logger.log.assert_any_call(LogLevel.INFO, "Getting movie by title: %s", "Titanic")
 
-    error_call = call(LogLevel.ERROR, f"Failed to get movie by title: Titanic")
+    error_call = call(LogLevel.ERROR, "Failed to get movie by title: %s", "Titanic")
     assert error_call not in mock_logger.log.call_args_list, "Shouldn't log error for a successful op"
 
 
@@ -78,9 +95,9 @@ async def test_get_movie_by_title_failure():
     movie = await movie_service.get_movie_by_title("Titanic")
 
     assert movie is None, "It should be None."
-    mock_movie_repository.get_movie_by_title.assert_awaited_once_with("Titanic"), "get_movie_by_title wasn't called correctly."
-    mock_logger.log.assert_any_call(LogLevel.INFO, "Getting movie by title: Titanic")
-    mock_logger.log.assert_any_call(LogLevel.ERROR, "Failed to get movie by title: Titanic")
+    mock_movie_repository.get_movie_by_title.assert_awaited_once_with("Titanic", field_paths=None), "get_movie_by_title wasn't called correctly."
+    mock_logger.log.assert_any_call(LogLevel.INFO, "Getting movie by title: %s", "Titanic")
+    mock_logger.log.assert_any_call(LogLevel.ERROR, "Failed to get movie by title: %s", "Titanic")
 
 
 @pytest.mark.asyncio
@@ -119,7 +136,7 @@ async def test_create_movie_failure():
     assert result is None, "It should be None"
     mock_movie_repository.create_movie.assert_awaited_once_with(movie_data)
     mock_logger.log.assert_any_call(LogLevel.INFO, "Creating new movie entry")
-    mock_logger.log.assert_any_call(LogLevel.ERROR, f"Failed to create movie: {movie_data}")
+    mock_logger.log.assert_any_call(LogLevel.ERROR, "Failed to create movie: %s", movie_data)
 
 
 @pytest.mark.asyncio
@@ -135,7 +152,7 @@ async def test_delete_movie_success():
     await movie_service.delete_movie(movie_id)
 
     mock_movie_repository.delete_movie.assert_awaited_once_with(movie_id), "delete_movie wasn't called correctly."
-    mock_logger.log.assert_any_call(LogLevel.INFO, f"Deleting movie: {movie_id}"), "logged i called correctly.."
+    mock_logger.log.assert_any_call(LogLevel.INFO, "Deleting movie: %s", movie_id), "logged i called correctly.."
 
 
 @pytest.mark.asyncio
@@ -158,12 +175,12 @@ async def test_delete_movie_failure():
 
     assert not exception_raised, "It should'nt raise a exception."
     mock_movie_repository.delete_movie.assert_awaited_once_with(movie_id), "delete_movie wasn't called correctly with id."
-    mock_logger.log.assert_any_call(LogLevel.INFO, f"Deleting movie: {movie_id}"), "Info Log wasn't called correctly."
-    mock_logger.log.assert_any_call(LogLevel.ERROR, f"Failed to delete movie: {movie_id}"), "Error log wasn't called correctly"
+    mock_logger.log.assert_any_call(LogLevel.INFO, "Deleting movie: %s", movie_id), "Info Log wasn't called correctly."
+    mock_logger.log.assert_any_call(LogLevel.ERROR, "Failed to delete movie: %s", movie_id), "Error log wasn't called correctly"
 
 
 @pytest.mark.asyncio
-async def test_notify_empty_collection_when_empty():
+async def test_notify_if_empty_when_empty():
     mock_movie_repository = AsyncMock()
     mock_pub_sub_client = AsyncMock()
     mock_logger = AsyncMock()
@@ -172,14 +189,32 @@ async def test_notify_empty_collection_when_empty():
 
     movie_service = MovieService(mock_movie_repository, mock_pub_sub_client, mock_logger)
 
-    await movie_service.notify_empty_collection()
+    assert await movie_service.notify_if_empty() is True
 
     mock_movie_repository.check_empty_collection.assert_awaited_once(), "check_empty_collection wasn't called correctly."
-    mock_pub_sub_client.publish.assert_called_once_with({"Status": "Empty"}), "publish wasn't called correctly with 'Empty' status"
+    mock_pub_sub_client.publish.assert_awaited_once_with({"Status": "Empty"}), "publish wasn't called correctly with 'Empty' status"
 
 
 @pytest.mark.asyncio
-async def test_notify_empty_collection_when_not_empty():
+async def test_notify_if_empty_raises_publish_errors_for_retry():
+    mock_movie_repository = AsyncMock()
+    mock_pub_sub_client = AsyncMock()
+    mock_logger = AsyncMock()
+
+    mock_movie_repository.check_empty_collection.return_value = True
+    error = Exception("Publish failed")
+    mock_pub_sub_client.publish.side_effect = error
+
+    movie_service = MovieService(mock_movie_repository, mock_pub_sub_client, mock_logger)
+
+    with pytest.raises(Exception) as raised:
+        await movie_service.notify_if_empty()
+
+    assert raised.value is error, "The job runner retries on the raised error"
+
+
+@pytest.mark.asyncio
+async def test_notify_if_empty_when_not_empty():
     mock_movie_repository = AsyncMock()
     mock_pub_sub_client = AsyncMock()
     mock_logger = AsyncMock()
@@ -188,7 +223,7 @@ async def test_notify_empty_collection_when_not_empty():
 
     movie_service = MovieService(mock_movie_repository, mock_pub_sub_client, mock_logger)
 
-    await movie_service.notify_empty_collection()
+    assert await movie_service.notify_if_empty() is False
 
     mock_movie_repository.check_empty_collection.assert_awaited_once(), "check_empty_collection wasn't called correctly."
     mock_pub_sub_client.publish.assert_not_called(), "Publish should't be called when collection is not empty"
@@ -210,7 +245,7 @@ async def test_get_all_movies_without_start_after():
 
     assert movies[0].Title == movie_data_1["Title"], "The returned movie is not the asked for."
     assert next_token == "nextToken", "The returned token os not the asked for."
-    mock_movie_repository.get_all_movies.assert_awaited_once_with(page_size=10, start_after=None)
+    mock_movie_repository.get_all_movies.assert_awaited_once_with(page_size=10, start_after=None, order_by=None)
 
 
 @pytest.mark.asyncio
@@ -229,4 +264,64 @@ async def test_get_all_movies_with_start_after():
 
     assert movies[0].Title == movie_data_2["Title"], "The returned movie is not the asked for."
     assert next_token == "nextToken2", "The returned token os not the asked for."
-    mock_movie_repository.get_all_movies.assert_awaited_once_with(page_size=10, start_after="token1")
+    mock_movie_repository.get_all_movies.assert_awaited_once_with(page_size=10, start_after="token1", order_by=None)
+
+
+@pytest.mark.asyncio
+async def test_get_movies_by_ids():
+    mock_movie_repository = AsyncMock()
+    mock_pub_sub_client = AsyncMock()
+    mock_logger = AsyncMock()
+
+    found = AsyncMock()
+    mock_movie_repository.get_movies_by_ids.return_value = [found, None]
+
+    movie_service = MovieService(mock_movie_repository, mock_pub_sub_client, mock_logger)
+
+    movies = await movie_service.get_movies_by_ids(["tt1", "tt404"])
+
+    assert movies == [found, None], "The movies should be returned in the requested order."
+    mock_movie_repository.get_movies_by_ids.assert_awaited_once_with(["tt1", "tt404"])
+    mock_logger.log.assert_any_call(LogLevel.INFO, "Getting %s movies by id", 2)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compress", [False, True])
+async def test_export_movies(compress):
+    mock_movie_repository = AsyncMock()
+    mock_pub_sub_client = AsyncMock()
+    mock_logger = AsyncMock()
+
+    movies = [{"Title": "Scarface", "imdbID": "tt0086250"}, {"Title": "Yojimbo", "imdbID": "tt0055630"}]
+
+    async def iter_all_movies(page_size):
+        for movie in movies:
+            yield movie
+
+    mock_movie_repository.iter_all_movies = iter_all_movies
+
+    movie_service = MovieService(mock_movie_repository, mock_pub_sub_client, mock_logger)
+
+    output = b"".join([chunk async for chunk in movie_service.export_movies(page_size=1, compress=compress)])
+    if compress:
+        output = gzip.decompress(output)
+
+    assert [json.loads(line) for line in output.splitlines()] == movies
+
+
+@pytest.mark.asyncio
+async def test_search_movies_reads_the_hits_from_the_movie_store():
+    mock_movie_repository = AsyncMock()
+    search_index = InvertedIndex()
+    movie_store = CompactMovieStore()
+    for movie in [{"imdbID": "tt1", "Title": "Alien", "Plot": "In space"},
+                  {"imdbID": "tt2", "Title": "Heat", "Plot": "In Los Angeles"}]:
+        search_index.add(movie)
+        movie_store.add(movie)
+    movie_service = MovieService(mock_movie_repository, AsyncMock(), MagicMock(), search_index=search_index,
+                                 movie_store=movie_store)
+
+    hits = await movie_service.search_movies("space")
+
+    assert [(movie.id, movie.to_dict()["Title"]) for movie, _ in hits] == [("tt1", "Alien")]
+    mock_movie_repository.get_movies_by_ids.assert_not_awaited()
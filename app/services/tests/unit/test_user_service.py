@@ -0,0 +1,80 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.auth.utils import PasswordHasher, PasswordHasherBusyError
+from app.models.users import UserCreate, UserInDB
+from app.services.users.service import UserService
+from app.tools.base_logger import LogLevel
+
+
+@pytest.mark.asyncio
+async def test_create_user_hashes_password_on_the_hasher():
+    mock_user_repository = AsyncMock()
+    mock_logger = AsyncMock()
+    mock_password_hasher = AsyncMock()
+    mock_password_hasher.hash.return_value = "hashed"
+
+    user_service = UserService(mock_user_repository, mock_logger, mock_password_hasher)
+
+    await user_service.create_user(UserCreate(email="user@example.com", password="secret"))
+
+    mock_password_hasher.hash.assert_awaited_once_with("secret")
+    mock_user_repository.add_user.assert_awaited_once_with(UserCreate(email="user@example.com", password="hashed"))
+
+
+@pytest.mark.asyncio
+async def test_authenticate_user_rehashes_outdated_hash():
+    mock_user_repository = AsyncMock()
+    mock_user_repository.get_user_by_email.return_value = UserInDB(email="user@example.com", hashed_password="old")
+    mock_logger = AsyncMock()
+    mock_password_hasher = AsyncMock()
+    mock_password_hasher.verify_and_update.return_value = (True, "new")
+
+    user_service = UserService(mock_user_repository, mock_logger, mock_password_hasher)
+
+    user = await user_service.authenticate_user("user@example.com", "secret")
+
+    assert user.hashed_password == "new"
+    mock_password_hasher.verify_and_update.assert_awaited_once_with("secret", "old")
+    mock_user_repository.update_password.assert_awaited_once_with("user@example.com", "new")
+
+
+@pytest.mark.asyncio
+async def test_authenticate_user_wrong_password():
+    mock_user_repository = AsyncMock()
+    mock_user_repository.get_user_by_email.return_value = UserInDB(email="user@example.com", hashed_password="old")
+    mock_logger = AsyncMock()
+    mock_password_hasher = AsyncMock()
+    mock_password_hasher.verify_and_update.return_value = (False, None)
+
+    user_service = UserService(mock_user_repository, mock_logger, mock_password_hasher)
+
+    assert await user_service.authenticate_user("user@example.com", "wrong") is None
+    mock_user_repository.update_password.assert_not_awaited()
+    error_calls = [call for call in mock_logger.log.call_args_list if call.args[0] == LogLevel.ERROR]
+    assert not error_calls
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_calls_when_saturated(monkeypatch):
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow_hash(password):
+        asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+        return f"hashed-{password}"
+
+    monkeypatch.setattr("app.auth.utils.get_password_hash", slow_hash)
+    password_hasher = PasswordHasher(ThreadPoolExecutor(max_workers=1), max_pending=2)
+
+    pending = [asyncio.ensure_future(password_hasher.hash(str(n))) for n in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(PasswordHasherBusyError):
+        await password_hasher.hash("rejected")
+
+    release.set()
+    assert await asyncio.gather(*pending) == ["hashed-0", "hashed-1"]
+    password_hasher.shutdown()
@@ -1,6 +1,6 @@
 from datetime import timedelta
 from app.models.users import UserCreate
-from app.auth.utils import get_password_hash, verify_password, create_access_token
+from app.auth.utils import PasswordHasher, create_access_token
 from app.repositories.users.repository import UserRepository
 from app.tools.base_logger import ILogger, LogLevel
 
@@ -8,23 +8,33 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 
 class UserService:
-    def __init__(self, user_repository: UserRepository, logger: ILogger):
+    def __init__(self, user_repository: UserRepository, logger: ILogger, password_hasher: PasswordHasher):
         self.user_repository = user_repository
         self.logger = logger
+        self.password_hasher = password_hasher
 
     async def create_user(self, user_in: UserCreate):
-        hashed_password = get_password_hash(user_in.password)
+        hashed_password = await self.password_hasher.hash(user_in.password)
         user_in.password = hashed_password
         try:
             return await self.user_repository.add_user(user_in)
         except Exception:
-            self.logger.log(LogLevel.ERROR, f"Failed to create user: {user_in.email}")
+            self.logger.log(LogLevel.ERROR, "Failed to create user: %s", user_in.email)
 
     async def authenticate_user(self, email: str, password: str):
         user_in_db = await self.user_repository.get_user_by_email(email)
-        if user_in_db and verify_password(password, user_in_db.hashed_password):
-            return user_in_db
-        return None
+        if not user_in_db:
+            return None
+        verified, new_hash = await self.password_hasher.verify_and_update(password, user_in_db.hashed_password)
+        if not verified:
+            return None
+        if new_hash:
+            try:
+                await self.user_repository.update_password(email, new_hash)
+                user_in_db.hashed_password = new_hash
+            except Exception:
+                self.logger.log(LogLevel.ERROR, "Failed to rehash password for user: %s", email)
+        return user_in_db
 
     def create_token_for_user(self, user_email: str):
         try:
@@ -34,4 +44,4 @@ class UserService:
             )
             return {"access_token": access_token, "token_type": "bearer"}
         except Exception:
-            self.logger.log(LogLevel.ERROR, f"Failed to create access token for user: {user_email}")
+            self.logger.log(LogLevel.ERROR, "Failed to create access token for user: %s", user_email)
@@ -0,0 +1,38 @@
+from dataclasses import replace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.container import Container
+from app.tools.settings import Settings
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "memory")
+    monkeypatch.setenv("PAGE_TOKEN_SECRET", "secret")
+    return Settings.from_env()
+
+
+def test_components_are_created_on_first_use(settings):
+    container = Container(settings)
+    assert "movies_db" not in container.__dict__
+
+    with patch.object(Container, "logger", MagicMock()):
+        service = container.movie_service
+
+    assert container.movie_service is service
+    assert container.movie_repository.indexes == [container.title_index, container.search_index,
+                                                  container.facet_index]
+    assert "users_db" not in container.__dict__
+
+
+@pytest.mark.asyncio
+async def test_shutdown_only_releases_created_clients(settings):
+    container = Container(replace(settings, warm_up_enabled=False))
+    container.__dict__["message_service"] = AsyncMock()
+
+    await container.shutdown()
+
+    container.message_service.close.assert_awaited_once()
+    assert "password_hasher" not in container.__dict__
@@ -12,5 +12,5 @@ class LogLevel(Enum):
 
 class ILogger(ABC):
     @abstractmethod
-    def log(self, level: LogLevel, message: str):
+    def log(self, level: LogLevel, message: str, *args, **fields):
         pass
@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+
+class TTLCache:
+    def __init__(self, max_size: int, ttl: float, stale_ttl: float = 0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initializes a bounded LRU cache whose entries expire after a TTL.
+
+        Args:
+            max_size (int): Maximum number of entries kept; the least recently used entry is evicted first.
+            ttl (float): Default number of seconds an entry is considered fresh.
+            stale_ttl (float): Extra seconds an expired entry is kept so it can still be served as stale.
+            clock (Callable[[], float]): Monotonic time source, in seconds.
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Get the entry stored for a key, fresh or stale.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Optional[CacheEntry]: The entry, or None if it is missing or past its stale window.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._clock() >= entry.stale_until:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get the value stored for a key only if it is still fresh.
+        """
+        entry = self.get_entry(key)
+        if entry is None or not entry.is_fresh(self._clock()):
+            return default
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            ttl (float, optional): Seconds the value stays fresh. Defaults to the cache TTL.
+        """
+        now = self._clock()
+        fresh_until = now + (self._ttl if ttl is None else ttl)
+        self._entries[key] = CacheEntry(value, fresh_until, fresh_until + self._stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
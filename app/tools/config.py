@@ -31,3 +31,306 @@ class Config:
     @staticmethod
     def PUB_SUB_TOPIC_NAME():
         return os.getenv('PUB_SUB_TOPIC_NAME', 'database-check-topic')
+
+    @staticmethod
+    def MOVIES_CACHE_ENABLED():
+        return os.getenv('MOVIES_CACHE_ENABLED', 'true')
+
+    @staticmethod
+    def MOVIES_CACHE_MAX_SIZE():
+        return os.getenv('MOVIES_CACHE_MAX_SIZE', '10000')
+
+    @staticmethod
+    def MOVIES_BATCHING_ENABLED():
+        # Merge concurrent lookups by ID into batched reads, behind the movie cache
+        return os.getenv('MOVIES_BATCHING_ENABLED', 'true')
+
+    @staticmethod
+    def MOVIES_BATCH_MAX_SIZE():
+        return os.getenv('MOVIES_BATCH_MAX_SIZE', '100')
+
+    @staticmethod
+    def MOVIES_BATCH_WINDOW_SECONDS():
+        # Time to wait for more lookups before a batched read; 0 batches the lookups of one event loop tick
+        return os.getenv('MOVIES_BATCH_WINDOW_SECONDS', '0')
+
+    @staticmethod
+    def ENCODED_MOVIES_CACHE_SIZE():
+        # Serialized movies kept per response format, reused while the document is unchanged; 0 disables it
+        return os.getenv('ENCODED_MOVIES_CACHE_SIZE', '10000')
+
+    @staticmethod
+    def HTTP_CACHE_MAX_AGE_SECONDS():
+        # Cache-Control max-age of the movie responses, for browsers and CDNs; 0 sends no-cache
+        return os.getenv('HTTP_CACHE_MAX_AGE_SECONDS', '60')
+
+    @staticmethod
+    def HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS():
+        return os.getenv('HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS', '300')
+
+    @staticmethod
+    def MOVIES_CACHE_TTL_SECONDS():
+        return os.getenv('MOVIES_CACHE_TTL_SECONDS', '300')
+
+    @staticmethod
+    def MOVIES_CACHE_NEGATIVE_TTL_SECONDS():
+        return os.getenv('MOVIES_CACHE_NEGATIVE_TTL_SECONDS', '30')
+
+    @staticmethod
+    def MOVIES_CACHE_STALE_SECONDS():
+        # How long an expired movie may still be served while it is refreshed in the background
+        return os.getenv('MOVIES_CACHE_STALE_SECONDS', '600')
+
+    @staticmethod
+    def MOVIES_CACHE_REFRESH_TIMEOUT_SECONDS():
+        return os.getenv('MOVIES_CACHE_REFRESH_TIMEOUT_SECONDS', '0.05')
+
+    @staticmethod
+    def MOVIES_SHARED_CACHE_PATH():
+        # Memory-mapped file caching movies for all the workers of the host, e.g. /dev/shm/movies-cache
+        return os.getenv('MOVIES_SHARED_CACHE_PATH', '')
+
+    @staticmethod
+    def MOVIES_SHARED_CACHE_SIZE_MB():
+        return os.getenv('MOVIES_SHARED_CACHE_SIZE_MB', '64')
+
+    @staticmethod
+    def MOVIES_SHARED_CACHE_SLOT_BYTES():
+        # Space for one movie in the shared cache; larger movies are not cached
+        return os.getenv('MOVIES_SHARED_CACHE_SLOT_BYTES', '4096')
+
+    @staticmethod
+    def IMPORT_BATCH_SIZE():
+        return os.getenv('IMPORT_BATCH_SIZE', '500')
+
+    @staticmethod
+    def IMPORT_MAX_CONCURRENCY():
+        return os.getenv('IMPORT_MAX_CONCURRENCY', '4')
+
+    @staticmethod
+    def EXPORT_PAGE_SIZE():
+        # Number of documents read from Firestore per query while exporting the collection
+        return os.getenv('EXPORT_PAGE_SIZE', '500')
+
+    @staticmethod
+    def PAGE_TOKEN_SECRET():
+        # Key used to sign pagination tokens; required, and kept separate from the JWT secret
+        return os.getenv('PAGE_TOKEN_SECRET', '')
+
+    @staticmethod
+    def DB_BACKEND():
+        # Document database backend: "firestore" or "memory" (in-process, for local development and load tests)
+        return os.getenv('DB_BACKEND', 'firestore')
+
+    @staticmethod
+    def MESSAGE_BACKEND():
+        # "pubsub" or "memory" (messages kept in process); the memory database backend defaults to memory
+        return os.getenv('MESSAGE_BACKEND', 'memory' if Config.DB_BACKEND() == 'memory' else 'pubsub')
+
+    @staticmethod
+    def INDEX_BUILD_PAGE_SIZE():
+        # Number of documents read from Firestore per query while building the in-process indexes at startup
+        return os.getenv('INDEX_BUILD_PAGE_SIZE', '500')
+
+    @staticmethod
+    def STATS_RECONCILE_INTERVAL_SECONDS():
+        # How often the /stats counters are recounted from a full scan of the collection; 0 disables it
+        return os.getenv('STATS_RECONCILE_INTERVAL_SECONDS', '3600')
+
+    @staticmethod
+    def MOVIE_STORE_ENABLED():
+        # Keep every movie in memory in a compact store, from which the search results are read
+        return os.getenv('MOVIE_STORE_ENABLED', 'false')
+
+    @staticmethod
+    def CATALOG_SNAPSHOT_PATH():
+        # Local file the indexes are built from at startup when a previous run saved it; empty disables it
+        return os.getenv('CATALOG_SNAPSHOT_PATH', '')
+
+    @staticmethod
+    def CATALOG_SNAPSHOT_INTERVAL_SECONDS():
+        # How often the catalog reads the movies written by other instances and is saved; 0 saves on shutdown only
+        return os.getenv('CATALOG_SNAPSHOT_INTERVAL_SECONDS', '600')
+
+    @staticmethod
+    def CATALOG_SNAPSHOT_MAX_AGE_SECONDS():
+        # Older snapshots are ignored and the collection is scanned again
+        return os.getenv('CATALOG_SNAPSHOT_MAX_AGE_SECONDS', '86400')
+
+    @staticmethod
+    def PUB_SUB_BATCH_MAX_MESSAGES():
+        return os.getenv('PUB_SUB_BATCH_MAX_MESSAGES', '100')
+
+    @staticmethod
+    def PUB_SUB_BATCH_MAX_BYTES():
+        return os.getenv('PUB_SUB_BATCH_MAX_BYTES', '1000000')
+
+    @staticmethod
+    def PUB_SUB_BATCH_MAX_LATENCY_SECONDS():
+        return os.getenv('PUB_SUB_BATCH_MAX_LATENCY_SECONDS', '0.01')
+
+    @staticmethod
+    def PUB_SUB_FLOW_CONTROL_MAX_MESSAGES():
+        # Maximum number of messages waiting to be acknowledged before publishers wait
+        return os.getenv('PUB_SUB_FLOW_CONTROL_MAX_MESSAGES', '1000')
+
+    @staticmethod
+    def PUB_SUB_FLOW_CONTROL_MAX_BYTES():
+        return os.getenv('PUB_SUB_FLOW_CONTROL_MAX_BYTES', '10000000')
+
+    @staticmethod
+    def PUB_SUB_ENABLE_ORDERING():
+        return os.getenv('PUB_SUB_ENABLE_ORDERING', 'false')
+
+    @staticmethod
+    def BCRYPT_ROUNDS():
+        # bcrypt cost factor; stored hashes with another cost are rehashed on the next login
+        return os.getenv('BCRYPT_ROUNDS', '12')
+
+    @staticmethod
+    def PASSWORD_HASH_EXECUTOR():
+        # "thread" or "process"
+        return os.getenv('PASSWORD_HASH_EXECUTOR', 'thread')
+
+    @staticmethod
+    def PASSWORD_HASH_WORKERS():
+        return os.getenv('PASSWORD_HASH_WORKERS', '2')
+
+    @staticmethod
+    def PASSWORD_HASH_MAX_PENDING():
+        # Hashing calls running or queued before new ones are rejected with 503
+        return os.getenv('PASSWORD_HASH_MAX_PENDING', '32')
+
+    @staticmethod
+    def TOKEN_PRIVATE_KEY():
+        # PEM key or path to a PEM file, used to sign tokens with asymmetric algorithms (RS*, PS*, ES*)
+        return os.getenv('TOKEN_PRIVATE_KEY')
+
+    @staticmethod
+    def TOKEN_PUBLIC_KEY():
+        # PEM key or path to a PEM file, used to verify tokens with asymmetric algorithms (RS*, PS*, ES*)
+        return os.getenv('TOKEN_PUBLIC_KEY')
+
+    @staticmethod
+    def TOKEN_CACHE_MAX_SIZE():
+        return os.getenv('TOKEN_CACHE_MAX_SIZE', '10000')
+
+    @staticmethod
+    def LOG_LEVEL():
+        return os.getenv('LOG_LEVEL', 'INFO')
+
+    @staticmethod
+    def LOG_SINK():
+        # "cloud" (Cloud Logging) or "stdout"; the memory database backend defaults to stdout
+        return os.getenv('LOG_SINK', 'stdout' if Config.DB_BACKEND() == 'memory' else 'cloud')
+
+    @staticmethod
+    def LOG_QUEUE_SIZE():
+        # Records waiting for the logging worker; new records are dropped when the queue is full
+        return os.getenv('LOG_QUEUE_SIZE', '10000')
+
+    @staticmethod
+    def LOG_BATCH_SIZE():
+        return os.getenv('LOG_BATCH_SIZE', '100')
+
+    @staticmethod
+    def LOG_SAMPLE_RATES():
+        # Fraction of records kept per level, e.g. "DEBUG=0.01,INFO=0.1"; unlisted levels are always kept
+        return os.getenv('LOG_SAMPLE_RATES', '')
+
+    @staticmethod
+    def WARM_UP_ENABLED():
+        # Open the database and message clients during startup instead of on the first request
+        return os.getenv('WARM_UP_ENABLED', 'false')
+
+    @staticmethod
+    def WARM_UP_TIMEOUT_SECONDS():
+        return os.getenv('WARM_UP_TIMEOUT_SECONDS', '5')
+
+    @staticmethod
+    def EVENT_LOOP_LAG_INTERVAL_SECONDS():
+        # How often the event loop lag is sampled for /metrics; 0 disables the sampler
+        return os.getenv('EVENT_LOOP_LAG_INTERVAL_SECONDS', '0.5')
+
+    @staticmethod
+    def TRACE_SAMPLE_RATE():
+        # Fraction of traces recorded when the caller did not send a sampling decision; 0 disables tracing
+        return os.getenv('TRACE_SAMPLE_RATE', '0')
+
+    @staticmethod
+    def TRACE_EXPORTER():
+        # "memory" keeps the last TRACE_MAX_SPANS spans for /traces, "file" appends them to TRACE_FILE_PATH
+        return os.getenv('TRACE_EXPORTER', 'memory')
+
+    @staticmethod
+    def TRACE_FILE_PATH():
+        return os.getenv('TRACE_FILE_PATH', 'traces.jsonl')
+
+    @staticmethod
+    def TRACE_MAX_SPANS():
+        return os.getenv('TRACE_MAX_SPANS', '1000')
+
+    @staticmethod
+    def REQUEST_TIMEOUT_SECONDS():
+        # Deadline of a request, shared by the Firestore calls made for it; 0 disables it
+        return os.getenv('REQUEST_TIMEOUT_SECONDS', '10')
+
+    @staticmethod
+    def FIRESTORE_TIMEOUT_SECONDS():
+        # Timeout of a single Firestore call attempt, unless FIRESTORE_OPERATION_TIMEOUTS overrides it
+        return os.getenv('FIRESTORE_TIMEOUT_SECONDS', '5')
+
+    @staticmethod
+    def FIRESTORE_OPERATION_TIMEOUTS():
+        # Per-operation attempt timeouts in seconds, e.g. "get_document=1,set_documents=30"
+        return os.getenv('FIRESTORE_OPERATION_TIMEOUTS', '')
+
+    @staticmethod
+    def FIRESTORE_MAX_ATTEMPTS():
+        return os.getenv('FIRESTORE_MAX_ATTEMPTS', '3')
+
+    @staticmethod
+    def FIRESTORE_RETRY_BASE_DELAY_SECONDS():
+        return os.getenv('FIRESTORE_RETRY_BASE_DELAY_SECONDS', '0.1')
+
+    @staticmethod
+    def FIRESTORE_RETRY_MAX_DELAY_SECONDS():
+        return os.getenv('FIRESTORE_RETRY_MAX_DELAY_SECONDS', '2')
+
+    @staticmethod
+    def FIRESTORE_HEDGE_ENABLED():
+        # Send a second single-document read when the first is slower than the p95 of recent reads
+        return os.getenv('FIRESTORE_HEDGE_ENABLED', 'false')
+
+    @staticmethod
+    def FIRESTORE_HEDGE_MIN_DELAY_SECONDS():
+        return os.getenv('FIRESTORE_HEDGE_MIN_DELAY_SECONDS', '0.02')
+
+    @staticmethod
+    def FIRESTORE_CIRCUIT_FAILURE_THRESHOLD():
+        # Consecutive failed Firestore calls that open the circuit breaker; 0 disables it
+        return os.getenv('FIRESTORE_CIRCUIT_FAILURE_THRESHOLD', '5')
+
+    @staticmethod
+    def FIRESTORE_CIRCUIT_RESET_SECONDS():
+        # Time the circuit stays open before a trial call is let through
+        return os.getenv('FIRESTORE_CIRCUIT_RESET_SECONDS', '30')
+
+    @staticmethod
+    def JOB_MAX_WORKERS():
+        # Background jobs (e.g. the empty collection check) running at the same time
+        return os.getenv('JOB_MAX_WORKERS', '4')
+
+    @staticmethod
+    def JOB_MAX_ATTEMPTS():
+        return os.getenv('JOB_MAX_ATTEMPTS', '3')
+
+    @staticmethod
+    def JOB_RETRY_BASE_DELAY_SECONDS():
+        # Delay before the first retry of a failed job, doubled for every following one
+        return os.getenv('JOB_RETRY_BASE_DELAY_SECONDS', '0.5')
+
+    @staticmethod
+    def JOB_RESULT_TTL_SECONDS():
+        # How long a successful job is returned again instead of running the same work twice
+        return os.getenv('JOB_RESULT_TTL_SECONDS', '5')
@@ -0,0 +1,35 @@
+import hashlib
+from typing import Optional
+
+
+def make_etag(content: bytes) -> str:
+    """
+    Get a strong ETag for a response body.
+    """
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against the ETag of the current representation, with the weak
+    comparison RFC 9110 requires for this header.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cache_control(max_age: int, stale_while_revalidate: int) -> str:
+    """
+    Build a Cache-Control value for public responses. A max age of zero makes caches revalidate every time.
+    """
+    if max_age <= 0:
+        return "no-cache"
+    directives = f"public, max-age={max_age}"
+    if stale_while_revalidate > 0:
+        directives += f", stale-while-revalidate={stale_while_revalidate}"
+    return directives
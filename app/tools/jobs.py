@@ -0,0 +1,134 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app.tools.base_logger import ILogger, LogLevel
+from app.tools.resilience import backoff_delay, no_deadline
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    key: str
+    status: str = PENDING
+    attempts: int = 0
+    result: Any = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    # Monotonic time the job finished at, for the result cache
+    finished: Optional[float] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+
+class JobRunner:
+    def __init__(self, logger: ILogger, max_workers: int = 4, max_attempts: int = 3, retry_base_delay: float = 0.5,
+                 retry_max_delay: float = 30, result_ttl: float = 5, history_size: int = 1000,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Runs background jobs on the event loop, a few at a time, with retries.
+
+        Jobs are submitted with a key naming the work they do. While a job is pending or running, submitting
+        the same key returns it instead of starting another one, and a successful job is returned again
+        for result_ttl seconds after it finished. Failed attempts are retried with exponential backoff
+        and jitter; the worker slot is released while a job waits to be retried.
+
+        Args:
+            logger (ILogger): The application logger.
+            max_workers (int): Maximum number of attempts running at the same time.
+            max_attempts (int): Attempts made before a job is marked as failed.
+            retry_base_delay (float): Seconds before the first retry, doubled for every following one.
+            retry_max_delay (float): Maximum number of seconds between two attempts.
+            result_ttl (float): Seconds a successful job is reused for the same key.
+            history_size (int): Number of jobs kept for the status endpoint; the oldest are dropped first.
+            clock (Callable[[], float]): Monotonic time source, in seconds.
+        """
+        self.logger = logger
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.result_ttl = result_ttl
+        self._workers = asyncio.Semaphore(max_workers)
+        self._history_size = history_size
+        self._clock = clock
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._latest: Dict[str, Job] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, key: str, func: Callable[[], Awaitable[Any]]) -> Job:
+        """
+        Start a job, or join the one already running (or recently succeeded) for the same key.
+
+        Args:
+            key (str): Identifies the work; jobs with the same key are deduplicated.
+            func (Callable[[], Awaitable[Any]]): Coroutine function doing the work. Its return value is the
+                                                 job result; an exception fails the attempt.
+
+        Returns:
+            Job: The job doing the work.
+        """
+        job = self._latest.get(key)
+        if job is not None and (not job.done or
+                                (job.status == SUCCEEDED and self._clock() - job.finished < self.result_ttl)):
+            return job
+
+        job = Job(id=uuid.uuid4().hex, key=key)
+        self._latest[key] = job
+        self._jobs[job.id] = job
+        while len(self._jobs) > self._history_size:
+            self._jobs.popitem(last=False)
+        # The job outlives the request submitting it, and so does not run under its deadline
+        with no_deadline():
+            task = asyncio.ensure_future(self._run(job, func))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def shutdown(self) -> None:
+        """
+        Cancel the jobs that are still pending or running.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, job: Job, func: Callable[[], Awaitable[Any]]) -> None:
+        while True:
+            async with self._workers:
+                job.status = RUNNING
+                job.attempts += 1
+                try:
+                    job.result = await func()
+                    job.status = SUCCEEDED
+                    job.error = None
+                    break
+                except Exception as e:
+                    job.error = str(e) or type(e).__name__
+                    if job.attempts >= self.max_attempts:
+                        job.status = FAILED
+                        self.logger.log(LogLevel.ERROR, "Job %s failed after %s attempts. Error: %s", job.key,
+                                        job.attempts, e)
+                        break
+                    job.status = PENDING
+            delay = backoff_delay(job.attempts, self.retry_base_delay, self.retry_max_delay)
+            self.logger.log(LogLevel.WARNING, "Job %s failed, retrying in %.2fs. Error: %s", job.key, delay,
+                            job.error)
+            await asyncio.sleep(delay)
+        job.finished = self._clock()
+        job.finished_at = datetime.now(timezone.utc)
@@ -0,0 +1,134 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from app.tools.metrics import REGISTRY
+from app.tools.resilience import no_deadline, within_deadline
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+LOADER_BATCH_SIZE = REGISTRY.histogram("loader_batch_size", "Keys fetched per batch by a loader.", ["loader"],
+                                       buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+LOADER_COALESCED = REGISTRY.counter("loader_coalesced_loads_total",
+                                    "Loads that joined a fetch already queued or in flight for the same key.",
+                                    ["loader"])
+
+
+class DataLoader(Generic[K, V]):
+    def __init__(self, name: str, batch_load: Callable[[List[K]], Awaitable[List[V]]], max_batch_size: int = 100,
+                 window: float = 0) -> None:
+        """
+        Merges the loads made by concurrent callers into batched fetches.
+
+        Loads for the same key share a single fetch while it is queued or in flight. Distinct keys loaded
+        within the batching window are fetched together, in batches of at most max_batch_size keys.
+        Results are not kept once the fetch is done: caching is left to the callers.
+
+        Args:
+            name (str): Name of the loader, used as the metrics label.
+            batch_load (Callable[[List[K]], Awaitable[List[V]]]): Fetches distinct keys and returns one value
+                                                                   per key, in the same order.
+            max_batch_size (int): Maximum number of keys per fetch; a full batch is fetched right away.
+            window (float): Seconds to wait for more keys before fetching. Zero fetches the keys loaded
+                            during the current event loop iteration.
+        """
+        self._batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._futures: Dict[K, asyncio.Future] = {}
+        # Futures are queued with their key: a cleared key no longer maps to the future waiting for it
+        self._queue: List[Tuple[K, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Handle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._batch_sizes = LOADER_BATCH_SIZE.labels(name)
+        self._coalesced = LOADER_COALESCED.labels(name)
+
+    async def load(self, key: K) -> V:
+        """
+        Load the value of a key, sharing the fetch of any concurrent load of the same key.
+
+        Raises:
+            DeadlineExceededError: If the deadline of the caller expires first.
+            Exception: The error of the batch fetch.
+        """
+        # Shielded: a caller giving up must not cancel the fetch shared with the others
+        return await within_deadline(asyncio.shield(self._future(key)))
+
+    async def load_many(self, keys: Iterable[K]) -> List[V]:
+        """
+        Load the values of many keys, in the same order.
+        """
+        return list(await within_deadline(asyncio.shield(asyncio.gather(*[self._future(key) for key in keys]))))
+
+    def clear(self, key: K) -> None:
+        """
+        Forget the fetch queued or in flight for a key, so that the next load fetches it again. Called
+        after the value is written, as the fetch may have read the previous value. The loads already
+        waiting for that fetch still get its result.
+        """
+        self._futures.pop(key, None)
+
+    async def shutdown(self) -> None:
+        """
+        Cancel the fetches in flight.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _future(self, key: K) -> asyncio.Future:
+        future = self._futures.get(key)
+        if future is not None:
+            self._coalesced.inc()
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = self._futures[key] = loop.create_future()
+        self._queue.append((key, future))
+        if len(self._queue) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = (loop.call_soon(self._dispatch) if self.window <= 0
+                           else loop.call_later(self.window, self._dispatch))
+        return future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        queued, self._queue = self._queue, []
+        if not queued:
+            return
+        self._batch_sizes.observe(len(queued))
+        # The fetch is shared by every queued load, so it does not run under the deadline of any of them
+        with no_deadline():
+            task = asyncio.ensure_future(self._fetch(queued))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, queued: List[Tuple[K, asyncio.Future]]) -> None:
+        # A key cleared and loaded again before the dispatch is queued twice, but read once
+        keys = list(dict.fromkeys(key for key, _ in queued))
+        try:
+            values = await self._batch_load(keys)
+            if len(values) != len(keys):
+                raise ValueError(f"Batch load returned {len(values)} values for {len(keys)} keys")
+        except asyncio.CancelledError:
+            for _, future in queued:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in queued:
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # Marks it retrieved, in case every caller gave up
+            return
+        finally:
+            for key, future in queued:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+        results = dict(zip(keys, values))
+        for key, future in queued:
+            if not future.done():
+                future.set_result(results[key])
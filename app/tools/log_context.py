@@ -0,0 +1,65 @@
+import re
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+# Correlation ID of the request being handled, attached to every log record it produces.
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+REQUEST_ID_HEADER = b"x-request-id"
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex
+
+
+def request_id_from_headers(headers) -> str:
+    """
+    Get the client supplied request ID, or a new one when it is missing or not a short, safe token.
+
+    Args:
+        headers: The raw ASGI header pairs.
+
+    Returns:
+        str: The correlation ID for the request.
+    """
+    for name, value in headers:
+        if name.lower() == REQUEST_ID_HEADER:
+            request_id = value.decode("latin-1")
+            if _VALID_REQUEST_ID.fullmatch(request_id):
+                return request_id
+            break
+    return new_correlation_id()
+
+
+class CorrelationIdMiddleware:
+    def __init__(self, app) -> None:
+        """
+        ASGI middleware binding a correlation ID to every HTTP request and echoing it as X-Request-ID.
+
+        Args:
+            app: The wrapped ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = request_id_from_headers(scope.get("headers", []))
+
+        async def send_with_request_id(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [(name, value) for name, value in message.get("headers", [])
+                           if name.lower() != REQUEST_ID_HEADER]
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = correlation_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            correlation_id.reset(token)
@@ -1,9 +1,77 @@
+import atexit
+import json
 import logging
-
-from google.cloud import logging as cloud_logging
+import queue
+import random
+import threading
+from typing import Dict, List
 
 from app.tools.base_logger import ILogger, LogLevel
 from app.tools.config import Config
+from app.tools.log_context import correlation_id
+
+_LEVELS = {
+    LogLevel.DEBUG: logging.DEBUG,
+    LogLevel.INFO: logging.INFO,
+    LogLevel.WARNING: logging.WARNING,
+    LogLevel.ERROR: logging.ERROR,
+    LogLevel.CRITICAL: logging.CRITICAL,
+}
+
+_IMMUTABLE_TYPES = (str, int, float, bool, type(None))
+
+
+def parse_sample_rates(value: str) -> Dict[LogLevel, float]:
+    """
+    Parse per-level sampling rates such as "DEBUG=0.01,INFO=0.1". Levels not listed are always logged.
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        level, _, rate = item.partition("=")
+        rates[LogLevel[level.strip().upper()]] = float(rate)
+    return rates
+
+
+class _StructuredFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        fields = getattr(record, "json_fields", None)
+        return f"{message} {json.dumps(fields, default=str)}" if fields else message
+
+
+class _BatchingListener:
+    def __init__(self, records: queue.Queue, handler: logging.Handler, batch_size: int) -> None:
+        """
+        Background worker that drains the log queue in batches and hands the records to the sink.
+        """
+        self._records = records
+        self._handler = handler
+        self._batch_size = batch_size
+        self._thread = threading.Thread(target=self._run, name="app-logger", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: List = [self._records.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._records.get_nowait())
+                except queue.Empty:
+                    break
+            for record in batch:
+                if record is None:
+                    self._handler.flush()
+                    return
+                try:
+                    self._handler.handle(record)
+                except Exception:
+                    self._handler.handleError(record)
+            self._handler.flush()
+
+    def stop(self, timeout: float = 5) -> None:
+        if self._thread.is_alive():
+            self._records.put(None, timeout=timeout)
+            self._thread.join(timeout)
 
 
 class APPLogger(ILogger):
@@ -16,18 +84,60 @@ class APPLogger(ILogger):
         return cls._instance
 
     def _initialize(self):
-        self.client = cloud_logging.Client()
-        self.client.setup_logging()
         self.logger = logging.getLogger(Config.LOG_NAME())
-        self.logger.setLevel(logging.INFO)
-
-    def log(self, level: LogLevel, message: str, **kwargs):
-        log_method = {
-            LogLevel.DEBUG: self.logger.debug,
-            LogLevel.INFO: self.logger.info,
-            LogLevel.WARNING: self.logger.warning,
-            LogLevel.ERROR: self.logger.error,
-            LogLevel.CRITICAL: self.logger.critical,
-        }.get(level, self.logger.info)
-
-        log_method(message)
+        self.logger.setLevel(Config.LOG_LEVEL().upper())
+        self.sample_rates = parse_sample_rates(Config.LOG_SAMPLE_RATES())
+        self.dropped = 0
+        # Only the enqueue happens on the request path; the sink is called from the worker thread.
+        self._records = queue.Queue(maxsize=int(Config.LOG_QUEUE_SIZE()))
+        self._listener = _BatchingListener(self._records, self._create_sink(), int(Config.LOG_BATCH_SIZE()))
+        atexit.register(self.close)
+
+    @staticmethod
+    def _create_sink() -> logging.Handler:
+        if Config.LOG_SINK() == "stdout":
+            handler = logging.StreamHandler()
+            handler.setFormatter(_StructuredFormatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+            return handler
+
+        from google.cloud import logging as cloud_logging
+        from google.cloud.logging.handlers import setup_logging
+
+        handler = cloud_logging.Client().get_default_handler()
+        # Library, server and unhandled-exception logs keep going to Cloud Logging through the root logger.
+        setup_logging(handler)
+        return handler
+
+    def log(self, level: LogLevel, message: str, *args, **fields):
+        """
+        Queue a log record. Nothing is formatted when the level is disabled or the record is sampled out.
+        Arguments are snapshotted with str() on enqueue, and `message % args` is computed by the
+        background worker.
+
+        Args:
+            level (LogLevel): The record level.
+            message (str): The message, with %-style placeholders for `args`.
+            fields: Structured fields attached to the record, with the request correlation ID.
+        """
+        python_level = _LEVELS.get(level, logging.INFO)
+        if not self.logger.isEnabledFor(python_level):
+            return
+        rate = self.sample_rates.get(level)
+        if rate is not None and random.random() >= rate:
+            return
+
+        request_id = correlation_id.get()
+        if request_id is not None:
+            fields["correlation_id"] = request_id
+        # Later mutations of the arguments must not change the logged message.
+        args = tuple(arg if isinstance(arg, _IMMUTABLE_TYPES) else str(arg) for arg in args)
+        record = self.logger.makeRecord(self.logger.name, python_level, "(unknown file)", 0, message, args, None,
+                                        extra={"json_fields": fields} if fields else None)
+        try:
+            self._records.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Flush the queued records to the sink and stop the worker."""
+        self._listener.stop()
@@ -0,0 +1,226 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Iterator, List, Optional, TypeVar
+
+from app.tools.metrics import REGISTRY
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+# Values of the circuit_breaker_state gauge
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_BREAKER_STATE = REGISTRY.gauge("circuit_breaker_state",
+                                       "Circuit breaker state: 0 closed, 1 half-open, 2 open.", ["name"])
+CIRCUIT_BREAKER_OPENED = REGISTRY.counter("circuit_breaker_opened_total", "Times a circuit breaker opened.",
+                                          ["name"])
+CIRCUIT_BREAKER_REJECTED = REGISTRY.counter("circuit_breaker_rejected_total",
+                                            "Calls failed fast by an open circuit breaker.", ["name"])
+
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, message: str, retry_after: float = 0) -> None:
+        super().__init__(message)
+        # Seconds before the circuit lets a trial call through
+        self.retry_after = retry_after
+
+
+# Raised instead of making a call, when waiting for the dependency is pointless. Passed through by the
+# layers that wrap the failures of their calls, so that clients are answered 503 or 504.
+RESILIENCE_ERRORS = (CircuitOpenError, DeadlineExceededError)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Run the block under a deadline, seen by time_remaining() in the same task and the tasks it starts.
+    A deadline can only be shortened: the earliest of the enclosing one and the new one applies.
+
+    Args:
+        seconds (Optional[float]): Time allowed from now. None or a value <= 0 keeps the enclosing deadline.
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def no_deadline() -> Iterator[None]:
+    """
+    Run the block without a deadline. Background tasks and fetches shared between requests are started
+    in it, so that they do not inherit the deadline of the request that happened to start them.
+    """
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+async def within_deadline(future: Awaitable[T]) -> T:
+    """
+    Wait for a future started without the current deadline, giving up when the deadline expires. The
+    future is cancelled then, so shield it if other callers share it.
+
+    Raises:
+        DeadlineExceededError: If the deadline expires first.
+    """
+    remaining = time_remaining()
+    if remaining is None:
+        return await future
+    try:
+        return await asyncio.wait_for(future, max(remaining, 0))
+    except asyncio.TimeoutError:
+        if time_remaining() > 0:
+            raise  # Raised by the future itself
+        raise DeadlineExceededError("Request deadline expired") from None
+
+
+def time_remaining() -> Optional[float]:
+    """
+    Get the seconds left before the current deadline, or None when there is no deadline.
+    """
+    expires = _deadline.get()
+    return None if expires is None else expires - time.monotonic()
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Get the delay before retrying after a failed attempt: exponential in the attempt number, capped at
+    max_delay, with jitter so that clients failing together do not retry together.
+
+    Args:
+        attempt (int): Number of attempts made so far, starting at 1.
+    """
+    return min(max_delay, base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1)
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 1000, min_samples: int = 20) -> None:
+        """
+        Keeps the most recent latencies of an operation to estimate its percentiles.
+
+        Percentiles are recomputed after every tenth of the window has been replaced, not on each call.
+
+        Args:
+            size (int): Number of latencies kept.
+            min_samples (int): Latencies needed before percentiles are reported.
+        """
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._min_samples = min_samples
+        self._refresh_every = max(1, size // 10)
+        self._since_sorted = 0
+        self._sorted: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_sorted += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Get the latency below which a fraction q of the recent calls finished, or None without enough samples.
+        """
+        if len(self._samples) < self._min_samples:
+            return None
+        if not self._sorted or self._since_sorted >= self._refresh_every:
+            self._sorted = sorted(self._samples)
+            self._since_sorted = 0
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Fails calls fast while a dependency keeps failing, instead of making every caller wait for it.
+
+        The circuit opens after failure_threshold consecutive failures. While it is open, calls are
+        rejected with CircuitOpenError. After reset_timeout seconds a single trial call is let through
+        (half-open): its success closes the circuit and its failure opens it again.
+
+        Args:
+            name (str): Name of the dependency, used as the metrics label.
+            failure_threshold (int): Consecutive failures that open the circuit. Zero disables the breaker.
+            reset_timeout (float): Seconds the circuit stays open before a trial call.
+            clock (Callable[[], float]): Monotonic time source, in seconds.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._state_gauge = CIRCUIT_BREAKER_STATE.labels(name)
+        self._state_gauge.set(_STATE_VALUES[CLOSED])
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Check that a call may be made. Must be followed by record_success(), record_failure() or
+        record_cancelled().
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with its trial call in flight.
+        """
+        if self._state == CLOSED or not self.failure_threshold:
+            return
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+        if self._state == HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return
+        CIRCUIT_BREAKER_REJECTED.labels(self.name).inc()
+        retry_after = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+        raise CircuitOpenError(f"Circuit breaker {self.name} is open", retry_after=retry_after)
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._trial_running = False
+        if self._state != CLOSED:
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_running = False
+        if self.failure_threshold and (self._state == HALF_OPEN or
+                                       (self._state == CLOSED and self._failures >= self.failure_threshold)):
+            self._opened_at = self._clock()
+            self._set_state(OPEN)
+            CIRCUIT_BREAKER_OPENED.labels(self.name).inc()
+
+    def record_cancelled(self) -> None:
+        """
+        Record a call abandoned by its caller, which tells nothing about the dependency.
+        """
+        self._trial_running = False
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        self._state_gauge.set(_STATE_VALUES[state])
@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.tools.config import Config
+
+
+@dataclass(frozen=True)
+class Settings:
+    log_name: str
+    db_backend: str
+    message_backend: str
+    movies_collection_name: str
+    users_collection_name: str
+    movies_cache_enabled: bool
+    movies_cache_max_size: int
+    movies_cache_ttl_seconds: float
+    movies_cache_negative_ttl_seconds: float
+    movies_cache_stale_seconds: float
+    movies_cache_refresh_timeout_seconds: float
+    movies_shared_cache_path: str
+    movies_shared_cache_size_mb: int
+    movies_shared_cache_slot_bytes: int
+    movies_batching_enabled: bool
+    movies_batch_max_size: int
+    movies_batch_window_seconds: float
+    encoded_movies_cache_size: int
+    http_cache_max_age_seconds: int
+    http_cache_stale_while_revalidate_seconds: int
+    import_batch_size: int
+    import_max_concurrency: int
+    export_page_size: int
+    index_build_page_size: int
+    stats_reconcile_interval_seconds: float
+    movie_store_enabled: bool
+    catalog_snapshot_path: str
+    catalog_snapshot_interval_seconds: float
+    catalog_snapshot_max_age_seconds: float
+    warm_up_enabled: bool
+    warm_up_timeout_seconds: float
+    event_loop_lag_interval_seconds: float
+    trace_sample_rate: float
+    trace_exporter: str
+    trace_file_path: str
+    trace_max_spans: int
+    request_timeout_seconds: float
+    job_max_workers: int
+    job_max_attempts: int
+    job_retry_base_delay_seconds: float
+    job_result_ttl_seconds: float
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Read and convert the application settings from the environment, through the Config getters.
+        """
+        return cls(
+            log_name=Config.LOG_NAME(),
+            db_backend=Config.DB_BACKEND(),
+            message_backend=Config.MESSAGE_BACKEND(),
+            movies_collection_name=Config.MOVIES_COLLECTION_NAME(),
+            users_collection_name=Config.USERS_COLLECTION_NAME(),
+            movies_cache_enabled=Config.MOVIES_CACHE_ENABLED().lower() == "true",
+            movies_cache_max_size=int(Config.MOVIES_CACHE_MAX_SIZE()),
+            movies_cache_ttl_seconds=float(Config.MOVIES_CACHE_TTL_SECONDS()),
+            movies_cache_negative_ttl_seconds=float(Config.MOVIES_CACHE_NEGATIVE_TTL_SECONDS()),
+            movies_cache_stale_seconds=float(Config.MOVIES_CACHE_STALE_SECONDS()),
+            movies_cache_refresh_timeout_seconds=float(Config.MOVIES_CACHE_REFRESH_TIMEOUT_SECONDS()),
+            movies_shared_cache_path=Config.MOVIES_SHARED_CACHE_PATH(),
+            movies_shared_cache_size_mb=int(Config.MOVIES_SHARED_CACHE_SIZE_MB()),
+            movies_shared_cache_slot_bytes=int(Config.MOVIES_SHARED_CACHE_SLOT_BYTES()),
+            movies_batching_enabled=Config.MOVIES_BATCHING_ENABLED().lower() == "true",
+            movies_batch_max_size=int(Config.MOVIES_BATCH_MAX_SIZE()),
+            movies_batch_window_seconds=float(Config.MOVIES_BATCH_WINDOW_SECONDS()),
+            encoded_movies_cache_size=int(Config.ENCODED_MOVIES_CACHE_SIZE()),
+            http_cache_max_age_seconds=int(Config.HTTP_CACHE_MAX_AGE_SECONDS()),
+            http_cache_stale_while_revalidate_seconds=int(Config.HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS()),
+            import_batch_size=int(Config.IMPORT_BATCH_SIZE()),
+            import_max_concurrency=int(Config.IMPORT_MAX_CONCURRENCY()),
+            export_page_size=int(Config.EXPORT_PAGE_SIZE()),
+            index_build_page_size=int(Config.INDEX_BUILD_PAGE_SIZE()),
+            stats_reconcile_interval_seconds=float(Config.STATS_RECONCILE_INTERVAL_SECONDS()),
+            movie_store_enabled=Config.MOVIE_STORE_ENABLED().lower() == "true",
+            catalog_snapshot_path=Config.CATALOG_SNAPSHOT_PATH(),
+            catalog_snapshot_interval_seconds=float(Config.CATALOG_SNAPSHOT_INTERVAL_SECONDS()),
+            catalog_snapshot_max_age_seconds=float(Config.CATALOG_SNAPSHOT_MAX_AGE_SECONDS()),
+            warm_up_enabled=Config.WARM_UP_ENABLED().lower() == "true",
+            warm_up_timeout_seconds=float(Config.WARM_UP_TIMEOUT_SECONDS()),
+            event_loop_lag_interval_seconds=float(Config.EVENT_LOOP_LAG_INTERVAL_SECONDS()),
+            trace_sample_rate=float(Config.TRACE_SAMPLE_RATE()),
+            trace_exporter=Config.TRACE_EXPORTER(),
+            trace_file_path=Config.TRACE_FILE_PATH(),
+            trace_max_spans=int(Config.TRACE_MAX_SPANS()),
+            request_timeout_seconds=float(Config.REQUEST_TIMEOUT_SECONDS()),
+            job_max_workers=int(Config.JOB_MAX_WORKERS()),
+            job_max_attempts=int(Config.JOB_MAX_ATTEMPTS()),
+            job_retry_base_delay_seconds=float(Config.JOB_RETRY_BASE_DELAY_SECONDS()),
+            job_result_ttl_seconds=float(Config.JOB_RESULT_TTL_SECONDS()),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Get the settings, resolved once per process.
+    """
+    return Settings.from_env()
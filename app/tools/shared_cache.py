@@ -0,0 +1,286 @@
+import fcntl
+import mmap
+import os
+import struct
+import time
+import zlib
+from contextlib import contextmanager
+from hashlib import blake2b
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+from app.tools.cache import CacheEntry
+from app.tools.metrics import REGISTRY
+
+_MAGIC = b"MOVCACH1"
+# Magic, slot size, slot count, slots per bucket
+_HEADER = struct.Struct("<8sIII")
+_HEADER_SIZE = 64
+# Key hash (0 for an empty slot), sequence number (odd while the slot is written), checksum of the key
+# and value, fresh until, stale until, last used, key length, value length
+_SLOT = struct.Struct("<QIIdddHI")
+_HASH = struct.Struct("<Q")
+_SEQ = struct.Struct("<I")
+_LAST_USED = struct.Struct("<d")
+_SEQ_OFFSET = 8
+_LAST_USED_OFFSET = 32
+_DATA_OFFSET = 48
+# Reads retried while a slot is being written by another process, before giving up as a miss
+_READ_ATTEMPTS = 4
+
+SHARED_CACHE_EVICTIONS = REGISTRY.counter("shared_cache_evictions_total",
+                                          "Live entries evicted from the shared memory cache to make room.")
+SHARED_CACHE_OVERSIZED = REGISTRY.counter("shared_cache_oversized_total",
+                                          "Values not stored in the shared memory cache as they exceed a slot.")
+
+
+def _key_hash(key: bytes) -> int:
+    # hash() is salted per process, so the workers could not find each other's entries with it
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+class SharedTTLCache:
+    def __init__(self, path: str, size: int, ttl: float, encode: Callable[[Any], bytes],
+                 decode: Callable[[bytes], Any], stale_ttl: float = 0, slot_size: int = 4096, ways: int = 8,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initializes a TTL cache kept in a memory-mapped file, shared by every process of the host that
+        opens the same path, e.g. the workers of a gunicorn server. Entries written or deleted by one
+        process are seen by the others right away, and survive the restart of the workers.
+
+        The file is split in fixed-size slots grouped in buckets of `ways` slots. A key can only be stored
+        in its bucket, where it replaces an expired entry or else the least recently used one. Values that
+        do not fit in a slot are not cached.
+
+        Reads take no lock: each slot has a sequence number, odd while the slot is written, and a checksum,
+        and a read overlapping a write is retried. Writes lock the bucket only, with a POSIX record lock.
+
+        Values are serialized with `encode` when stored and rebuilt with `decode` on every read. Expiry
+        times are taken from a monotonic clock, which is the same for all the processes of a host.
+
+        Args:
+            path (str): The file shared by the processes, preferably on a tmpfs such as /dev/shm. It is
+                        created on first use, and replaced when it was created with another geometry.
+            size (int): Size of the file in bytes.
+            ttl (float): Default number of seconds an entry is considered fresh.
+            encode (Callable[[Any], bytes]): Serializes a value.
+            decode (Callable[[bytes], Any]): Rebuilds a value from its serialized form.
+            stale_ttl (float): Extra seconds an expired entry is kept so it can still be served as stale.
+            slot_size (int): Bytes per entry, its key and value included.
+            ways (int): Slots per bucket, among which the least recently used entry is evicted.
+            clock (Callable[[], float]): Monotonic time source, in seconds.
+
+        Raises:
+            ValueError: If the file is too small for a single bucket.
+        """
+        slot_count = (size - _HEADER_SIZE) // slot_size // ways * ways
+        if slot_count <= 0 or slot_size <= _DATA_OFFSET:
+            raise ValueError(f"A shared cache of {size} bytes cannot hold {ways} slots of {slot_size} bytes")
+        self.path = path
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._encode = encode
+        self._decode = decode
+        self._clock = clock
+        self._slot_size = slot_size
+        self._ways = ways
+        self._bucket_count = slot_count // ways
+        self._capacity = slot_size - _DATA_OFFSET
+        self._header = _HEADER.pack(_MAGIC, slot_size, slot_count, ways)
+        self._file_size = _HEADER_SIZE + slot_count * slot_size
+        self._fd = self._open()
+        self._map = mmap.mmap(self._fd, self._file_size)
+        self._evictions = SHARED_CACHE_EVICTIONS.labels()
+        self._oversized = SHARED_CACHE_OVERSIZED.labels()
+
+    def __len__(self) -> int:
+        now = self._clock()
+        return sum(1 for offset in self._offsets(0, self._bucket_count * self._ways)
+                   if _HASH.unpack_from(self._map, offset)[0] and self._stale_until(offset) > now)
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get the entry stored for a key, fresh or stale.
+
+        Returns:
+            Optional[CacheEntry]: The entry, or None if it is missing, past its stale window, or being written.
+        """
+        key_bytes = key.encode()
+        key_hash = _key_hash(key_bytes)
+        for offset in self._bucket_offsets(key_hash):
+            if _HASH.unpack_from(self._map, offset)[0] != key_hash:
+                continue
+            found = self._read(offset, key_hash, key_bytes)
+            if found is None:
+                return None
+            fresh_until, stale_until, value = found
+            now = self._clock()
+            if now >= stale_until:
+                return None
+            # Unlocked: a lost update only makes the eviction order a little less exact
+            _LAST_USED.pack_into(self._map, offset + _LAST_USED_OFFSET, now)
+            return CacheEntry(self._decode(value), fresh_until, stale_until)
+        return None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get the value stored for a key only if it is still fresh.
+        """
+        entry = self.get_entry(key)
+        if entry is None or not entry.is_fresh(self._clock()):
+            return default
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry of its bucket if the bucket is full.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The value to store.
+            ttl (float, optional): Seconds the value stays fresh. Defaults to the cache TTL.
+        """
+        key_bytes = key.encode()
+        data = key_bytes + self._encode(value)
+        key_hash = _key_hash(key_bytes)
+        now = self._clock()
+        fresh_until = now + (self._ttl if ttl is None else ttl)
+        with self._bucket_locked(key_hash):
+            if len(data) > self._capacity:
+                # The previous value must not outlive this write
+                self._oversized.inc()
+                self._delete_locked(key_hash, key_bytes)
+                return
+            offset = self._choose_slot(key_hash, key_bytes, now)
+            self._write(offset, key_hash, fresh_until, fresh_until + self._stale_ttl, now, len(key_bytes), data)
+
+    def delete(self, key: str) -> None:
+        key_bytes = key.encode()
+        key_hash = _key_hash(key_bytes)
+        with self._bucket_locked(key_hash):
+            self._delete_locked(key_hash, key_bytes)
+
+    def clear(self) -> None:
+        for bucket in range(self._bucket_count):
+            with self._locked(bucket):
+                for offset in self._offsets(bucket * self._ways, self._ways):
+                    if _HASH.unpack_from(self._map, offset)[0]:
+                        self._write(offset, 0, 0, 0, 0, 0, b"")
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    def _open(self) -> int:
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX, _HEADER_SIZE, 0)
+                if os.fstat(fd).st_ino != os.stat(self.path).st_ino:
+                    os.close(fd)  # Replaced by another process while waiting for the lock: open the new file
+                    continue
+                if os.fstat(fd).st_size == 0:
+                    self._initialize(fd)
+                elif os.pread(fd, _HEADER.size, 0) != self._header:
+                    # Created with other settings: the processes still using it keep their copy
+                    self._replace()
+                    os.close(fd)
+                    continue
+                fcntl.lockf(fd, fcntl.LOCK_UN, _HEADER_SIZE, 0)
+                return fd
+            except BaseException:
+                os.close(fd)
+                raise
+
+    def _initialize(self, fd: int) -> None:
+        os.ftruncate(fd, self._file_size)
+        os.pwrite(fd, self._header, 0)
+
+    def _replace(self) -> None:
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(temporary, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            self._initialize(fd)
+        finally:
+            os.close(fd)
+        os.replace(temporary, self.path)
+
+    def _offsets(self, first_slot: int, count: int) -> Iterator[int]:
+        start = _HEADER_SIZE + first_slot * self._slot_size
+        return iter(range(start, start + count * self._slot_size, self._slot_size))
+
+    def _bucket_offsets(self, key_hash: int) -> Iterator[int]:
+        return self._offsets(key_hash % self._bucket_count * self._ways, self._ways)
+
+    def _stale_until(self, offset: int) -> float:
+        return _SLOT.unpack_from(self._map, offset)[4]
+
+    @contextmanager
+    def _locked(self, bucket: int) -> Iterator[None]:
+        # Only the first byte of the bucket is locked, which is enough for writers following the same rule
+        start = _HEADER_SIZE + bucket * self._ways * self._slot_size
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, start)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, start)
+
+    def _bucket_locked(self, key_hash: int):
+        return self._locked(key_hash % self._bucket_count)
+
+    def _read(self, offset: int, key_hash: int, key: bytes) -> Optional[Tuple[float, float, bytes]]:
+        for _ in range(_READ_ATTEMPTS):
+            slot_hash, seq, checksum, fresh_until, stale_until, _, key_length, value_length = \
+                _SLOT.unpack_from(self._map, offset)
+            if seq & 1:
+                continue
+            start = offset + _DATA_OFFSET
+            data = self._map[start:start + min(key_length + value_length, self._capacity)]
+            if _SEQ.unpack_from(self._map, offset + _SEQ_OFFSET)[0] != seq:
+                continue
+            if zlib.crc32(data) != checksum:
+                continue  # Torn read that the sequence numbers missed
+            if slot_hash != key_hash or data[:key_length] != key:
+                return None
+            return fresh_until, stale_until, data[key_length:]
+        return None
+
+    def _choose_slot(self, key_hash: int, key: bytes, now: float) -> int:
+        empty = expired = None
+        least_recent, least_recent_used = None, float("inf")
+        for offset in self._bucket_offsets(key_hash):
+            slot_hash, _, _, _, stale_until, last_used, key_length, _ = _SLOT.unpack_from(self._map, offset)
+            if slot_hash == key_hash:
+                start = offset + _DATA_OFFSET
+                if self._map[start:start + key_length] == key:
+                    return offset
+            if not slot_hash:
+                empty = offset if empty is None else empty
+            elif stale_until <= now:
+                expired = offset if expired is None else expired
+            elif last_used < least_recent_used:
+                least_recent, least_recent_used = offset, last_used
+        if empty is not None:
+            return empty
+        if expired is not None:
+            return expired
+        self._evictions.inc()
+        return least_recent
+
+    def _delete_locked(self, key_hash: int, key: bytes) -> None:
+        for offset in self._bucket_offsets(key_hash):
+            if _HASH.unpack_from(self._map, offset)[0] == key_hash:
+                key_length = _SLOT.unpack_from(self._map, offset)[6]
+                start = offset + _DATA_OFFSET
+                if self._map[start:start + key_length] == key:
+                    self._write(offset, 0, 0, 0, 0, 0, b"")
+
+    def _write(self, offset: int, key_hash: int, fresh_until: float, stale_until: float, last_used: float,
+               key_length: int, data: bytes) -> None:
+        # Odd while the slot is written; a writer that died halfway left it odd, hence the | 1
+        seq = ((_SEQ.unpack_from(self._map, offset + _SEQ_OFFSET)[0] + 1) | 1) & 0xFFFFFFFF
+        _SEQ.pack_into(self._map, offset + _SEQ_OFFSET, seq)
+        start = offset + _DATA_OFFSET
+        self._map[start:start + len(data)] = data
+        _SLOT.pack_into(self._map, offset, key_hash, seq, zlib.crc32(data), fresh_until, stale_until, last_used,
+                        key_length, len(data) - key_length)
+        _SEQ.pack_into(self._map, offset + _SEQ_OFFSET, (seq + 1) & 0xFFFFFFFF)
@@ -0,0 +1,26 @@
+import pytest
+
+from app.tools.http_cache import cache_control, etag_matches, make_etag
+
+
+def test_etag_depends_on_the_content():
+    assert make_etag(b'{"Title":"Alien"}') == make_etag(b'{"Title":"Alien"}')
+    assert make_etag(b'{"Title":"Alien"}') != make_etag(b'{"Title":"Aliens"}')
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ("*", True),
+    ('"other"', False),
+])
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, '"abc"') is expected
+
+
+def test_cache_control():
+    assert cache_control(60, 300) == "public, max-age=60, stale-while-revalidate=300"
+    assert cache_control(60, 0) == "public, max-age=60"
+    assert cache_control(0, 300) == "no-cache"
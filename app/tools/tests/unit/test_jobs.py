@@ -0,0 +1,117 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.tools.base_logger import LogLevel
+from app.tools.jobs import FAILED, SUCCEEDED, JobRunner
+from app.tools.resilience import deadline, time_remaining
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def wait(job):
+    while not job.done:
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_join_the_running_job():
+    calls = 0
+    release = asyncio.Event()
+
+    async def check():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return True
+
+    runner = JobRunner(MagicMock())
+    first = runner.submit("notify-if-empty", check)
+    second = runner.submit("notify-if-empty", check)
+    release.set()
+    await wait(first)
+
+    assert second is first
+    assert calls == 1
+    assert first.status == SUCCEEDED and first.result is True
+    assert runner.get(first.id) is first
+
+
+@pytest.mark.asyncio
+async def test_successful_result_is_reused_until_it_expires():
+    clock = FakeClock()
+
+    async def check():
+        return True
+
+    runner = JobRunner(MagicMock(), result_ttl=5, clock=clock)
+    first = runner.submit("notify-if-empty", check)
+    await wait(first)
+
+    clock.now = 4
+    assert runner.submit("notify-if-empty", check) is first
+    clock.now = 6
+    assert runner.submit("notify-if-empty", check) is not first
+
+
+@pytest.mark.asyncio
+async def test_failed_attempts_are_retried():
+    results = [Exception("Publish failed"), True]
+
+    async def check():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    logger = MagicMock()
+    runner = JobRunner(logger, retry_base_delay=0.001)
+    job = runner.submit("notify-if-empty", check)
+    await asyncio.wait_for(wait(job), timeout=1)
+
+    assert job.status == SUCCEEDED
+    assert job.attempts == 2
+    assert job.error is None
+    assert logger.log.call_args_list[0].args[0] == LogLevel.WARNING
+
+
+@pytest.mark.asyncio
+async def test_job_fails_after_the_last_attempt():
+    error = Exception("Publish failed")
+
+    async def check():
+        raise error
+
+    logger = MagicMock()
+    runner = JobRunner(logger, max_attempts=2, retry_base_delay=0.001)
+    job = runner.submit("notify-if-empty", check)
+    await asyncio.wait_for(wait(job), timeout=1)
+
+    assert job.status == FAILED
+    assert job.attempts == 2
+    assert job.error == "Publish failed"
+    logger.log.assert_called_with(LogLevel.ERROR, "Job %s failed after %s attempts. Error: %s", "notify-if-empty",
+                                  2, error)
+    # Failed jobs are not reused
+    assert runner.submit("notify-if-empty", check) is not job
+    await runner.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_jobs_do_not_run_under_the_deadline_of_the_submitting_request():
+    async def check():
+        return time_remaining()
+
+    runner = JobRunner(MagicMock())
+    with deadline(0.001):
+        job = runner.submit("notify-if-empty", check)
+    await wait(job)
+
+    assert job.status == SUCCEEDED and job.result is None
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from app.tools.loader import DataLoader
+from app.tools.resilience import DeadlineExceededError, deadline, time_remaining
+
+
+def recording_loader(**kwargs):
+    batches = []
+
+    async def batch_load(keys):
+        batches.append(list(keys))
+        await asyncio.sleep(0)
+        return [key.upper() for key in keys]
+
+    return DataLoader("test", batch_load, **kwargs), batches
+
+
+@pytest.mark.asyncio
+async def test_loads_of_one_tick_are_batched_and_deduplicated():
+    loader, batches = recording_loader()
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"),
+                                   loader.load_many(["c", "b"]))
+
+    assert results == ["A", "B", "A", ["C", "B"]]
+    assert batches == [["a", "b", "c"]]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped():
+    loader, batches = recording_loader(max_batch_size=2)
+
+    assert await loader.load_many(["a", "b", "c"]) == ["A", "B", "C"]
+    assert batches == [["a", "b"], ["c"]]
+
+
+@pytest.mark.asyncio
+async def test_window_merges_loads_of_later_ticks():
+    loader, batches = recording_loader(window=0.01)
+
+    async def load_later(key):
+        await asyncio.sleep(0)
+        return await loader.load(key)
+
+    assert await asyncio.gather(loader.load("a"), load_later("b")) == ["A", "B"]
+    assert batches == [["a", "b"]]
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_are_not_kept():
+    calls = 0
+
+    async def batch_load(keys):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("unavailable")
+        return keys
+
+    loader = DataLoader("test-errors", batch_load)
+    results = await asyncio.gather(loader.load("a"), loader.load("a"), return_exceptions=True)
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert await loader.load("a") == "a"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    release = asyncio.Event()
+
+    async def batch_load(keys):
+        await release.wait()
+        return keys
+
+    loader = DataLoader("test-cancel", batch_load)
+    first = asyncio.ensure_future(loader.load("a"))
+    second = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "a"
+
+
+@pytest.mark.asyncio
+async def test_cleared_key_is_fetched_again():
+    batches = []
+    release = asyncio.Event()
+
+    async def batch_load(keys):
+        batches.append(list(keys))
+        await release.wait()
+        return [key.upper() for key in keys]
+
+    loader = DataLoader("test-clear", batch_load)
+    first = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0.01)
+    loader.clear("a")
+    second = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await asyncio.wait_for(asyncio.gather(first, second), timeout=1) == ["A", "A"]
+    assert batches == [["a"], ["a"]]
+
+
+@pytest.mark.asyncio
+async def test_key_cleared_while_queued_still_resolves():
+    loader, batches = recording_loader(window=0.01)
+
+    first = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0)
+    loader.clear("a")
+    second = asyncio.ensure_future(loader.load("a"))
+    third = asyncio.ensure_future(loader.load("b"))
+    await asyncio.sleep(0)
+    loader.clear("b")
+
+    assert await asyncio.wait_for(asyncio.gather(first, second, third), timeout=1) == ["A", "A", "B"]
+    assert batches == [["a", "b"]]
+
+
+@pytest.mark.asyncio
+async def test_fetches_are_not_bound_by_the_deadline_of_a_caller():
+    release = asyncio.Event()
+    deadlines = []
+
+    async def batch_load(keys):
+        deadlines.append(time_remaining())
+        await release.wait()
+        return [key.upper() for key in keys]
+
+    loader = DataLoader("test", batch_load)
+
+    async def load_with_deadline():
+        with deadline(0.001):
+            return await loader.load("a")
+
+    impatient = asyncio.ensure_future(load_with_deadline())
+    patient = asyncio.ensure_future(loader.load("a"))
+    with pytest.raises(DeadlineExceededError):
+        await impatient
+    release.set()
+
+    assert await patient == "A"
+    assert deadlines == [None]
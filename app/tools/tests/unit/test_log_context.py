@@ -0,0 +1,35 @@
+import pytest
+
+from app.tools.log_context import CorrelationIdMiddleware, correlation_id, request_id_from_headers
+
+
+def test_request_id_from_headers_accepts_safe_ids():
+    assert request_id_from_headers([(b"x-request-id", b"req-1.a_B")]) == "req-1.a_B"
+
+
+@pytest.mark.parametrize("value", [b"", b"a" * 65, b"bad id", b"id\r\nSet-Cookie: x"])
+def test_request_id_from_headers_replaces_invalid_ids(value):
+    request_id = request_id_from_headers([(b"x-request-id", value)])
+
+    assert request_id != value.decode("latin-1")
+    assert len(request_id) == 32
+
+
+@pytest.mark.asyncio
+async def test_middleware_binds_and_echoes_the_request_id():
+    seen = []
+    sent = []
+
+    async def app(scope, receive, send):
+        seen.append(correlation_id.get())
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"x-request-id", b"other")]})
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"x-request-id", b"req-1")]}
+    await CorrelationIdMiddleware(app)(scope, None, send)
+
+    assert seen == ["req-1"]
+    assert sent[0]["headers"] == [(b"x-request-id", b"req-1")]
+    assert correlation_id.get() is None
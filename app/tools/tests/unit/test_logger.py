@@ -0,0 +1,77 @@
+import logging
+
+import pytest
+
+from app.tools.base_logger import LogLevel
+from app.tools.log_context import correlation_id
+from app.tools.logger import APPLogger, parse_sample_rates
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def app_logger(monkeypatch):
+    handler = ListHandler()
+    monkeypatch.setenv("LOG_NAME", "test-app-logger")
+    monkeypatch.setenv("LOG_SAMPLE_RATES", "DEBUG=0")
+    monkeypatch.setattr(APPLogger, "_instance", None)
+    monkeypatch.setattr(APPLogger, "_create_sink", staticmethod(lambda: handler))
+    logger = APPLogger()
+    logger.logger.setLevel(logging.DEBUG)
+    yield logger, handler
+    logger.close()
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("DEBUG=0.01, info=0.5") == {LogLevel.DEBUG: 0.01, LogLevel.INFO: 0.5}
+    assert parse_sample_rates("") == {}
+
+
+def test_log_is_formatted_lazily_with_structured_fields(app_logger):
+    logger, handler = app_logger
+
+    class Expensive:
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    token = correlation_id.set("request-1")
+    logger.log(LogLevel.INFO, "Getting movie by id: %s", Expensive(), movie_id="tt1")
+    correlation_id.reset(token)
+    logger.log(LogLevel.DEBUG, "Sampled out: %s", Expensive())
+    logger.close()
+
+    assert [record.getMessage() for record in handler.records] == ["Getting movie by id: expensive"]
+    assert handler.records[0].json_fields == {"movie_id": "tt1", "correlation_id": "request-1"}
+    assert Expensive.formatted == 1, "Only the enabled record should be formatted."
+
+
+def test_log_drops_records_when_the_queue_is_full(app_logger, monkeypatch):
+    logger, handler = app_logger
+    logger.close()
+    monkeypatch.setattr(logger._records, "maxsize", 1)
+
+    logger.log(LogLevel.INFO, "first")
+    logger.log(LogLevel.INFO, "second")
+
+    assert logger.dropped == 1
+
+
+def test_log_snapshots_mutable_arguments(app_logger):
+    logger, handler = app_logger
+    movie = {"Title": "Alien"}
+
+    logger.log(LogLevel.INFO, "Creating movie: %s", movie)
+    movie["Title"] = "Aliens"
+    logger.close()
+
+    assert handler.records[0].getMessage() == "Creating movie: {'Title': 'Alien'}"
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from app.tools.metrics import MetricsRegistry, monitor_event_loop_lag
+
+
+def test_render_counters_gauges_and_histograms():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ["route"])
+    in_flight = registry.gauge("in_flight", "In flight.")
+    latency = registry.histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1))
+
+    requests.labels('/by-id/{"id"}').inc()
+    requests.labels('/by-id/{"id"}').inc(2)
+    in_flight.labels().inc()
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.labels("/").observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/by-id/{\\"id\\"}"} 3',
+        "# HELP in_flight In flight.",
+        "# TYPE in_flight gauge",
+        "in_flight 1",
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/",le="0.1"} 2',
+        'latency_seconds_bucket{route="/",le="1"} 3',
+        'latency_seconds_bucket{route="/",le="+Inf"} 4',
+        'latency_seconds_sum{route="/"} 3.65',
+        'latency_seconds_count{route="/"} 4',
+    ]
+
+
+def test_labels_must_match_the_label_names():
+    registry = MetricsRegistry()
+
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Requests.", ["route"]).labels()
+
+
+@pytest.mark.asyncio
+async def test_monitor_event_loop_lag_records_samples():
+    latency = MetricsRegistry().histogram("lag_seconds", "Lag.")
+
+    task = asyncio.ensure_future(monitor_event_loop_lag(0.001, latency))
+    await asyncio.sleep(0.02)
+    task.cancel()
+
+    assert sum(latency.labels().counts) > 0
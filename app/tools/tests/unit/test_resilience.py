@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from app.tools.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    LatencyWindow,
+    backoff_delay,
+    deadline,
+    no_deadline,
+    time_remaining,
+    within_deadline,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_deadline_can_only_be_shortened():
+    assert time_remaining() is None
+    with deadline(10):
+        assert 9 < time_remaining() <= 10
+        with deadline(1):
+            assert time_remaining() <= 1
+        with deadline(60):
+            assert time_remaining() <= 10
+        with deadline(0):
+            assert time_remaining() <= 10
+    assert time_remaining() is None
+
+
+@pytest.mark.asyncio
+async def test_tasks_started_without_deadline_do_not_inherit_it():
+    async def remaining():
+        return time_remaining()
+
+    with deadline(10):
+        with no_deadline():
+            task = asyncio.ensure_future(remaining())
+        assert time_remaining() is not None
+
+    assert await task is None
+
+
+@pytest.mark.asyncio
+async def test_waits_within_deadline_give_up_when_it_expires():
+    shared = asyncio.ensure_future(asyncio.sleep(0.01, result="done"))
+
+    with deadline(0.001):
+        with pytest.raises(DeadlineExceededError):
+            await within_deadline(asyncio.shield(shared))
+
+    assert await within_deadline(shared) == "done"
+
+
+def test_backoff_delay_grows_and_is_capped():
+    for attempt, expected in [(1, 0.1), (2, 0.2), (3, 0.4), (10, 2)]:
+        assert expected / 2 <= backoff_delay(attempt, 0.1, 2) <= expected
+
+
+def test_latency_window_quantile():
+    window = LatencyWindow(size=100, min_samples=10)
+    for _ in range(9):
+        window.observe(0.01)
+    assert window.quantile(0.95) is None
+
+    for latency in range(1, 101):
+        window.observe(latency / 1000)
+    assert window.quantile(0.95) == pytest.approx(0.096)
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test-opens", failure_threshold=3, reset_timeout=30, clock=FakeClock())
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_open_circuit_tells_when_to_retry():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test-retry-after", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock.now = 10
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.retry_after == 20
+
+
+def test_half_open_circuit_lets_a_single_trial_call_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test-half-open", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock.now = 30
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 60
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
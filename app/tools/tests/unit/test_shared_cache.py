@@ -0,0 +1,102 @@
+import struct
+
+import pytest
+
+from app.tools.shared_cache import SharedTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(path, clock=None, **kwargs) -> SharedTTLCache:
+    options = {"size": 64 * 1024, "ttl": 10, "slot_size": 256, "ways": 4, **kwargs}
+    return SharedTTLCache(str(path), encode=str.encode, decode=bytes.decode, clock=clock or FakeClock(),
+                          **options)
+
+
+def test_entries_are_shared_by_the_caches_mapping_the_same_file(tmp_path):
+    first = make_cache(tmp_path / "cache")
+    second = make_cache(tmp_path / "cache")
+
+    first.set("tt1", "Alien")
+    assert second.get("tt1") == "Alien"
+
+    second.delete("tt1")
+    assert first.get("tt1") is None
+    assert len(first) == 0
+
+
+def test_entries_expire_then_go_stale(tmp_path):
+    clock = FakeClock()
+    cache = make_cache(tmp_path / "cache", clock=clock, stale_ttl=5)
+    cache.set("tt1", "Alien")
+    cache.set("tt2", "Aliens", ttl=1)
+
+    clock.now = 2
+    assert cache.get("tt1") == "Alien"
+    assert cache.get("tt2") is None
+    assert cache.get_entry("tt2").value == "Aliens"
+
+    clock.now = 6
+    assert cache.get_entry("tt2") is None
+
+
+def test_least_recently_used_entry_of_a_full_bucket_is_evicted(tmp_path):
+    clock = FakeClock()
+    # A single bucket of two slots
+    cache = make_cache(tmp_path / "cache", clock=clock, size=64 + 2 * 256, ways=2)
+    cache.set("tt1", "Alien")
+    clock.now = 1
+    cache.set("tt2", "Aliens")
+    clock.now = 2
+    cache.get("tt1")
+    clock.now = 3
+    cache.set("tt3", "Alien 3")
+
+    assert cache.get("tt1") == "Alien"
+    assert cache.get("tt2") is None
+    assert cache.get("tt3") == "Alien 3"
+
+
+def test_oversized_values_are_not_cached_and_drop_the_previous_one(tmp_path):
+    cache = make_cache(tmp_path / "cache")
+    cache.set("tt1", "Alien")
+
+    cache.set("tt1", "x" * 1000)
+
+    assert cache.get("tt1") is None
+
+
+def test_entries_being_written_are_missed(tmp_path):
+    cache = make_cache(tmp_path / "cache")
+    cache.set("tt1", "Alien")
+    # Leave the slot holding tt1 as if another process were writing it
+    for offset in range(64, len(cache._map), 256):
+        if cache._map[offset + 48:offset + 51] == b"tt1":
+            struct.pack_into("<I", cache._map, offset + 8, 1)
+
+    assert cache.get("tt1") is None
+    cache.set("tt1", "Alien")
+    assert cache.get("tt1") == "Alien"
+
+
+def test_file_created_with_another_geometry_is_replaced(tmp_path):
+    old = make_cache(tmp_path / "cache")
+    old.set("tt1", "Alien")
+
+    new = make_cache(tmp_path / "cache", slot_size=512)
+
+    assert new.get("tt1") is None
+    assert old.get("tt1") == "Alien"
+    new.set("tt2", "Aliens")
+    assert make_cache(tmp_path / "cache", slot_size=512).get("tt2") == "Aliens"
+
+
+def test_cache_too_small_for_a_bucket_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        make_cache(tmp_path / "cache", size=256)
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+from app.tools.tracing import FileSpanExporter, InMemorySpanExporter, Tracer, current_span, parse_traceparent
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    tracer = Tracer()
+    tracer.configure(1, exporter)
+    return tracer
+
+
+@pytest.mark.asyncio
+async def test_child_spans_share_the_trace_of_their_parent(tracer, exporter):
+    async def query():
+        with tracer.start_as_current_span("FirestoreClient.get_paginated_documents") as span:
+            span.set_attribute("db.documents.count", 2)
+
+    with tracer.start_root_span("GET /v1/movies/") as root:
+        await asyncio.gather(query(), query())
+
+    children = exporter.get_finished_spans()[:2]
+    assert [span.name for span in exporter.get_finished_spans()][-1] == "GET /v1/movies/"
+    assert {span.trace_id for span in children} == {root.trace_id}
+    assert {span.parent_span_id for span in children} == {root.span_id}
+    assert children[0].attributes == {"db.documents.count": 2}
+    assert current_span().is_recording is False
+
+
+def test_unsampled_traces_record_nothing(exporter):
+    tracer = Tracer()
+    tracer.configure(0, exporter)
+
+    with tracer.start_root_span("GET /v1/movies/"):
+        with tracer.start_as_current_span("MovieService.get_all_movies") as span:
+            span.set_attribute("movies.count", 1)
+            assert span.is_recording is False
+
+    assert exporter.get_finished_spans() == []
+
+
+def test_incoming_sampling_decision_is_honoured(tracer, exporter):
+    traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00"
+    with tracer.start_root_span("GET /v1/movies/", traceparent=traceparent):
+        pass
+    with tracer.start_root_span("GET /v1/movies/", traceparent=traceparent[:-1] + "1"):
+        pass
+
+    [span] = exporter.get_finished_spans()
+    assert span.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert span.parent_span_id == "00f067aa0ba902b7"
+
+
+@pytest.mark.parametrize("value", [None, "", "00-abc-def-01", "00-" + "0" * 32 + "-00f067aa0ba902b7-01",
+                                   "00-4bf92f3577b34da6a3ce929d0e0e473z-00f067aa0ba902b7-01"])
+def test_invalid_traceparent_is_ignored(value):
+    assert parse_traceparent(value) is None
+
+
+def test_exception_marks_the_span_as_failed(tracer, exporter):
+    with pytest.raises(ValueError):
+        with tracer.start_root_span("job"):
+            raise ValueError("boom")
+
+    [span] = exporter.get_finished_spans()
+    assert (span.status, span.status_description) == ("ERROR", "ValueError: boom")
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer()
+    tracer.configure(1, FileSpanExporter(str(path)))
+
+    with tracer.start_root_span("job", {"page_size": 10}):
+        pass
+    tracer.shutdown()
+
+    [line] = path.read_text().splitlines()
+    span = json.loads(line)
+    assert span["name"] == "job"
+    assert span["attributes"] == {"page_size": 10}
+    assert span["endTimeUnixNano"] >= span["startTimeUnixNano"]
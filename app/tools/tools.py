@@ -1,6 +1,10 @@
+from functools import lru_cache
+
 from google.auth import default
 
 
+@lru_cache
 def get_project_id():
+    # google.auth.default() looks up credentials on every call, so every client shares one lookup
     _, project_id = default()
     return project_id
@@ -0,0 +1,302 @@
+import functools
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# Spans waiting for the file exporter thread; spans are dropped when the queue is full.
+FILE_EXPORT_QUEUE_SIZE = 10000
+
+
+class SpanExporter:
+    def export(self, span: "Span") -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    def __init__(self, max_spans: int = 1000) -> None:
+        """
+        Keeps the most recent finished spans in memory.
+
+        Args:
+            max_spans (int): Number of spans kept; the oldest are dropped first.
+        """
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: "Span") -> None:
+        self._spans.append(span)
+
+    def get_finished_spans(self, trace_id: Optional[str] = None) -> List["Span"]:
+        return [span for span in list(self._spans) if trace_id is None or span.trace_id == trace_id]
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    def __init__(self, path: str) -> None:
+        """
+        Appends finished spans to a file as JSON lines, from a background thread.
+
+        Args:
+            path (str): The file the spans are appended to.
+        """
+        self.path = path
+        self.dropped = 0
+        self._spans: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=FILE_EXPORT_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._write, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: "Span") -> None:
+        try:
+            self._spans.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self) -> None:
+        if self._thread.is_alive():
+            self._spans.put(None)
+            self._thread.join()
+
+    def _write(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                span = self._spans.get()
+                if span is None:
+                    return
+                file.write(json.dumps(span.to_dict(), default=str) + "\n")
+                if self._spans.empty():
+                    file.flush()
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "attributes", "start_time_ns", "end_time_ns",
+                 "status", "status_description", "_tracer", "_token")
+
+    is_recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_span_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]]) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.attributes = dict(attributes) if attributes else {}
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns = None
+        self.status = "UNSET"
+        self.status_description = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_status(self, status: str, description: Optional[str] = None) -> None:
+        """
+        Args:
+            status (str): "OK" or "ERROR". An exception leaving the span sets ERROR unless a status was set.
+            description (str, optional): Why the span failed.
+        """
+        self.status = status
+        self.status_description = description
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc is not None and self.status == "UNSET":
+            self.set_status("ERROR", f"{exc_type.__name__}: {exc}")
+        self.end_time_ns = time.time_ns()
+        _current_span.reset(self._token)
+        self._tracer.exporter.export(self)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_time_ns is None else (self.end_time_ns - self.start_time_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        # Field names follow the OTLP JSON encoding, so the output can be loaded by OpenTelemetry tooling.
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_time_ns,
+            "endTimeUnixNano": self.end_time_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_description or ""},
+        }
+
+
+class _NonRecordingSpan:
+    """
+    Stands for a trace that was not sampled: children see it as their parent and skip recording too.
+    """
+    __slots__ = ("_token",)
+
+    is_recording = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_status(self, status: str, description: Optional[str] = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NonRecordingSpan":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        _current_span.reset(self._token)
+
+
+class _NoopContext:
+    __slots__ = ("span",)
+
+    def __init__(self, span) -> None:
+        self.span = span
+
+    def __enter__(self):
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        pass
+
+
+_UNSAMPLED_CHILD = _NoopContext(_NonRecordingSpan())
+
+
+def create_span_exporter(kind: str, file_path: str = "traces.jsonl", max_spans: int = 1000) -> SpanExporter:
+    """
+    Create the span exporter named by the TRACE_EXPORTER setting.
+
+    Raises:
+        ValueError: If the exporter is not "memory" or "file".
+    """
+    if kind == "memory":
+        return InMemorySpanExporter(max_spans)
+    if kind == "file":
+        return FileSpanExporter(file_path)
+    raise ValueError(f"Unsupported trace exporter: {kind}")
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Parse a W3C traceparent header.
+
+    Returns:
+        Optional[Tuple[str, str, bool]]: The trace ID, the parent span ID and the sampled flag, or None
+                                         when the header is missing or malformed.
+    """
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class Tracer:
+    def __init__(self) -> None:
+        """
+        Creates spans with parent-based, trace-ID ratio head sampling.
+
+        The decision is taken once per trace, at its root span (or taken from the incoming traceparent),
+        so an unsampled trace costs a context variable lookup per span. Nothing is sampled until the
+        tracer is configured.
+        """
+        self.exporter: SpanExporter = SpanExporter()
+        self._sample_bound = 0
+
+    def configure(self, sample_rate: float, exporter: SpanExporter) -> None:
+        """
+        Args:
+            sample_rate (float): Fraction of traces recorded, from 0 to 1.
+            exporter (SpanExporter): Receives every finished span of the sampled traces.
+        """
+        self.exporter.shutdown()
+        self.exporter = exporter
+        self._sample_bound = int(max(0.0, min(1.0, sample_rate)) * (1 << 64))
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+        self.exporter = SpanExporter()
+        self._sample_bound = 0
+
+    def start_as_current_span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """
+        Start a span as a child of the current one. Use it as a context manager: the span is the current
+        span inside the block and ends (and is exported) when the block exits.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return self.start_root_span(name, attributes)
+        if not parent.is_recording:
+            return _UNSAMPLED_CHILD
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    def start_root_span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                        traceparent: Optional[str] = None):
+        """
+        Start the first span of a request, continuing the caller's trace when a valid traceparent is given.
+        """
+        if not self._sample_bound:
+            return _NonRecordingSpan()
+        remote = parse_traceparent(traceparent)
+        if remote is not None:
+            trace_id, parent_span_id, sampled = remote
+        else:
+            # Sampled on the random low half of the trace ID, like OpenTelemetry's TraceIdRatioBased sampler
+            low = random.getrandbits(64)
+            if low >= self._sample_bound:
+                return _NonRecordingSpan()
+            trace_id, parent_span_id, sampled = f"{random.getrandbits(64):016x}{low:016x}", None, True
+        if not sampled:
+            return _NonRecordingSpan()
+        return Span(self, name, trace_id, parent_span_id, attributes)
+
+
+def current_span():
+    """
+    Get the current span, to add attributes to it. Returns a non-recording span outside of a trace.
+    """
+    return _current_span.get() or _UNSAMPLED_CHILD.span
+
+
+tracer = Tracer()
+
+
+def traced(name: Optional[str] = None):
+    """
+    Run a coroutine function in a span named after it (or after name).
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def spans_to_dicts(spans: Iterable[Span]) -> List[dict]:
+    return [span.to_dict() for span in spans]
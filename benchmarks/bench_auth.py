@@ -0,0 +1,48 @@
+"""
+Per-request authentication overhead of get_current_user, before and after the verified-token cache.
+
+Usage:
+    python -m benchmarks.bench_auth [--requests 20000]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("TOKEN_SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("TOKEN_ALGORITHM", "HS256")
+
+from jose import jwt  # noqa: E402
+
+from app.auth.utils import create_access_token  # noqa: E402
+from app.routers.dependencies import get_current_user  # noqa: E402
+from app.tools.config import Config  # noqa: E402
+
+
+async def uncached_get_current_user(token: str) -> str:
+    # What get_current_user did before: read the key material and fully decode every request.
+    payload = jwt.decode(token, Config.TOKEN_SECRET_KEY(), algorithms=[Config.TOKEN_ALGORITHM()])
+    return payload.get("sub")
+
+
+async def measure(name: str, dependency, token: str, requests: int) -> float:
+    await dependency(token)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await dependency(token)
+    per_request = (time.perf_counter() - started) / requests * 1e6
+    print(f"{name:<10} {per_request:8.1f} us/request")
+    return per_request
+
+
+async def main(requests: int) -> None:
+    token = create_access_token({"sub": "user@example.com"})
+    before = await measure("before", uncached_get_current_user, token, requests)
+    after = await measure("after", get_current_user, token, requests)
+    print(f"speedup    {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,55 @@
+"""
+Catalog snapshot file (CATALOG_SNAPSHOT_PATH): time to write it, open it, look movies up by ID and read
+every movie back, as when an instance builds its indexes from it at startup.
+
+Usage:
+    python -m benchmarks.bench_catalog_snapshot [--movies 100000] [--lookups 10000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.indexes.catalog import CatalogSnapshot, SnapshotWriter
+from benchmarks.bench_responses import movie
+
+
+def main(movies: int, lookups: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog")
+        started = time.perf_counter()
+        writer = SnapshotWriter(path, time.time())
+        for number in range(movies):
+            data = movie(number)
+            del data["_content_hash"]  # Internal fields are not kept in the catalog
+            writer.add(data)
+        writer.commit().close()
+        written = time.perf_counter() - started
+
+        started = time.perf_counter()
+        snapshot = CatalogSnapshot(path)
+        opened = time.perf_counter() - started
+
+        keys = [f"tt{number:07d}" for number in random.Random(0).choices(range(movies), k=lookups)]
+        started = time.perf_counter()
+        for key in keys:
+            snapshot.get(key)
+        lookup = (time.perf_counter() - started) / lookups
+
+        started = time.perf_counter()
+        count = sum(1 for _ in snapshot)
+        iterated = time.perf_counter() - started
+        snapshot.close()
+
+        print(f"{movies} movies, {os.path.getsize(path) / 2 ** 20:.1f} MB")
+        print(f"write {written:.2f} s, open {opened * 1000:.2f} ms, lookup {lookup * 1e6:.1f} µs, "
+              f"read all {count} movies {iterated:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.movies, args.lookups)
@@ -0,0 +1,106 @@
+"""
+Memory held per movie when the whole catalog is kept in memory: as Movie models, as plain dicts (the
+documents as read from the database) and in the compact store (MOVIE_STORE_ENABLED), with the time the
+store takes to rebuild a movie.
+
+Movies are generated with OMDb-like fields: a few genres, languages and countries per movie drawn from
+small sets, a plot of 100 to 400 characters, and cast and crew drawn from a pool of names.
+
+Usage:
+    python -m benchmarks.bench_movie_store [--movies 100000] [--lookups 10000]
+"""
+import argparse
+import gc
+import random
+import string
+import time
+import tracemalloc
+from typing import Callable, List
+
+from app.indexes.store import CompactMovieStore
+from app.models.movies import Movie
+
+GENRES = ["Action", "Adventure", "Animation", "Biography", "Comedy", "Crime", "Documentary", "Drama", "Family",
+          "Fantasy", "History", "Horror", "Music", "Mystery", "Romance", "Sci-Fi", "Sport", "Thriller", "War",
+          "Western"]
+LANGUAGES = ["English", "French", "Spanish", "German", "Italian", "Japanese", "Hindi", "Korean", "Mandarin",
+             "Russian", "Portuguese", "Swedish"]
+COUNTRIES = ["United States", "United Kingdom", "France", "Germany", "Italy", "Japan", "India", "South Korea",
+             "China", "Canada", "Spain", "Australia"]
+RATED = ["G", "PG", "PG-13", "R", "NC-17", "Not Rated", "Unrated", "N/A"]
+TYPES = ["movie", "series", "episode"]
+WORDS = ["the", "a", "young", "man", "woman", "city", "war", "love", "family", "secret", "journey", "finds",
+         "must", "against", "world", "after", "before", "their", "life", "dark", "past", "new", "friend"]
+
+
+def make_movie(number: int, rng: random.Random, names: List[str]) -> dict:
+    def pick(values: List[str], most: int) -> str:
+        return ", ".join(rng.sample(values, rng.randint(1, most)))
+
+    plot = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80)))[:400]
+    votes = rng.randint(5, 2_000_000)
+    return {
+        "Title": " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 4))),
+        "Year": str(rng.randint(1920, 2024)), "Rated": rng.choice(RATED),
+        "Released": f"{rng.randint(1, 28):02d} {rng.choice(['Jan', 'Apr', 'Jul', 'Oct'])} {rng.randint(1920, 2024)}",
+        "Runtime": f"{rng.randint(70, 180)} min", "Genre": pick(GENRES, 3),
+        "Director": rng.choice(names), "Writer": ", ".join(rng.sample(names, 2)),
+        "Actors": ", ".join(rng.sample(names, 3)), "Plot": plot, "Language": pick(LANGUAGES, 2),
+        "Country": pick(COUNTRIES, 2), "Awards": f"{rng.randint(0, 20)} wins & {rng.randint(0, 40)} nominations",
+        "Poster": "https://m.media-amazon.com/images/M/" + "".join(rng.choices(string.ascii_letters, k=40)) + ".jpg",
+        "Ratings": [{"Source": "Internet Movie Database", "Value": f"{rng.randint(10, 99) / 10}/10"},
+                    {"Source": "Rotten Tomatoes", "Value": f"{rng.randint(0, 100)}%"}],
+        "Metascore": str(rng.randint(0, 100)), "imdbRating": f"{rng.randint(10, 99) / 10}",
+        "imdbVotes": f"{votes:,}", "imdbID": f"tt{number:07d}", "Type": rng.choice(TYPES), "DVD": "N/A",
+        "BoxOffice": f"${rng.randint(1000, 900_000_000):,}", "Production": "N/A", "Website": "N/A", "Response": True,
+    }
+
+
+def measure(movies: int, load: Callable[[dict], None], names: List[str]) -> int:
+    # The movies are generated inside the traced section and dropped once loaded, as database reads would be
+    rng = random.Random(0)
+    gc.collect()
+    tracemalloc.start()
+    for number in range(movies):
+        load(make_movie(number, rng, names))
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+
+def main(movies: int, lookups: int) -> None:
+    rng = random.Random(1)
+    names = [" ".join("".join(rng.choices(string.ascii_lowercase, k=length)).capitalize() for length in (6, 8))
+             for _ in range(20000)]
+    print(f"{movies} movies")
+    print(f"{'':<16} {'bytes/movie':>12} {'total MB':>9}")
+
+    models = {}
+    size = measure(movies, lambda movie: models.__setitem__(movie["imdbID"], Movie.from_dict(movie)), names)
+    print(f"{'Movie models':<16} {size / movies:12.0f} {size / 2 ** 20:9.1f}")
+    models.clear()
+
+    documents = {}
+    size = measure(movies, lambda movie: documents.__setitem__(movie["imdbID"], movie), names)
+    print(f"{'dicts':<16} {size / movies:12.0f} {size / 2 ** 20:9.1f}")
+    documents.clear()
+
+    store = CompactMovieStore()
+    size = measure(movies, store.add, names)
+    print(f"{'compact store':<16} {size / movies:12.0f} {size / 2 ** 20:9.1f}")
+
+    keys = [f"tt{number:07d}" for number in random.Random(2).choices(range(movies), k=lookups)]
+    for name, get in [("dict", store.get_data), ("Movie", store.get)]:
+        started = time.perf_counter()
+        for key in keys:
+            get(key)
+        print(f"rebuild a {name}: {(time.perf_counter() - started) / lookups * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.movies, args.lookups)
@@ -0,0 +1,115 @@
+"""
+Throughput of the movie read endpoints: by-id and a 100-movie page, before and after the encoded
+response path.
+
+"before" serves the same data the way the endpoints did before, through response_model validation and
+FastAPI's JSON encoding. The memory backend is used, so the numbers only include the application work.
+
+Usage:
+    python -m benchmarks.bench_responses [--requests 5000] [--movies 1000]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DB_BACKEND", "memory")
+os.environ.setdefault("LOG_SINK", "stdout")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("PAGE_TOKEN_SECRET", "benchmark-page-secret")
+os.environ.setdefault("TOKEN_SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("TOKEN_ALGORITHM", "HS256")
+
+from fastapi import APIRouter, Depends, Query  # noqa: E402
+
+import main as application  # noqa: E402
+from app.models.movies import Movie  # noqa: E402
+from app.models.pagination import Page  # noqa: E402
+from app.routers.dependencies import get_movie_service  # noqa: E402
+from app.services.movies.encoder import MSGPACK, MovieEncoder, msgpack  # noqa: E402
+from app.services.movies.service import MovieService  # noqa: E402
+
+before = APIRouter()
+
+
+@before.get("/by-id/{movie_id}/", response_model=Movie)
+async def get_movie_by_id(movie_id: str, movie_service: MovieService = Depends(get_movie_service)):
+    return (await movie_service.get_movie_by_id(movie_id)).to_dict()
+
+
+@before.get("/get-all-movies", response_model=Page[Movie])
+async def list_movies_paginated(page_size: int = Query(10), movie_service: MovieService = Depends(get_movie_service)):
+    movies, next_page_token = await movie_service.get_all_movies(page_size=page_size)
+    return Page(items=movies, next_page_token=next_page_token, page_size=len(movies))
+
+
+def movie(number: int) -> dict:
+    fields = {name: None for name in Movie.model_fields}
+    return {**fields, "Title": f"Movie {number}", "Year": str(1950 + number % 70), "imdbID": f"tt{number:07d}",
+            "Genre": "Drama, Comedy", "Director": "Some Director", "Actors": "First Actor, Second Actor",
+            "Plot": "A plot of about two hundred characters. " * 5, "imdbRating": "7.1", "imdbVotes": "12,345",
+            "Ratings": [{"Source": "Internet Movie Database", "Value": "7.1/10"}], "Type": "movie",
+            "Response": True, "_content_hash": "0" * 64}
+
+
+async def request(app, path: str, query: str = "", accept: bytes = b"application/json") -> int:
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    sent = []
+    response_complete = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # Like a server, only report the disconnect once the response was sent
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            response_complete.set()
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "headers": [(b"accept", accept)], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000),
+             "root_path": "", "app": app}
+    await app(scope, receive, send)
+    return sent[0]["status"]
+
+
+async def measure(name: str, path: str, query: str, requests: int, accept: bytes = b"application/json") -> float:
+    app = application.app
+    assert await request(app, path, query, accept) == 200
+    started = time.perf_counter()
+    for _ in range(requests):
+        await request(app, path, query, accept)
+    rate = requests / (time.perf_counter() - started)
+    print(f"{name:<34} {rate:10.0f} requests/s")
+    return rate
+
+
+async def run(requests: int, movies: int) -> None:
+    app = application.app
+    app.include_router(before, prefix="/before")
+    async with app.router.lifespan_context(app):
+        container = app.state.container
+        await container.movies_db.set_documents({f"tt{number:07d}": movie(number) for number in range(movies)})
+        for endpoint, path, query, count in [("by-id", "/by-id/tt0000001/", "", requests),
+                                             ("page of 100", "/get-all-movies", "page_size=100", requests // 10)]:
+            print(endpoint)
+            baseline = await measure("  before", "/before" + path, query, count)
+            container.__dict__["movie_encoder"] = MovieEncoder(max_size=0)
+            uncached = await measure("  after, encoded cache disabled", "/v1/movies" + path, query, count)
+            container.__dict__["movie_encoder"] = MovieEncoder()
+            cached = await measure("  after", "/v1/movies" + path, query, count)
+            if msgpack is not None:
+                await measure("  after, MessagePack", "/v1/movies" + path, query, count, MSGPACK.encode())
+            print(f"  speedup {uncached / baseline:.1f}x without the encoded cache, {cached / baseline:.1f}x with it")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--movies", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.movies))
@@ -0,0 +1,126 @@
+"""
+Hit rate and memory of the movie cache for several worker processes: one cache per process against
+the cache shared by the workers in a memory-mapped file (MOVIES_SHARED_CACHE_PATH).
+
+Each worker looks movies up by ID through CachedMovieRepository, with popularity following a Zipf
+law, in front of a repository that builds the movie on every miss. The load runs twice, the second
+time in new processes, as after a restart or a deploy. Memory is what the caches hold once the load
+ran: the Python objects they keep, traced in a separate run as tracing slows the lookups down, plus
+the pages of the shared file, counted once whatever the number of workers mapping them.
+
+Usage:
+    python -m benchmarks.bench_shared_cache [--workers 4] [--movies 20000] [--lookups 20000] [--cache-size 5000]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import accumulate
+
+from app.clients.memory.memory_db import MemoryDocumentSnapshot
+from app.repositories.movies.cached_repository import CachedMovieRepository
+from app.tools.base_logger import ILogger
+from benchmarks.bench_responses import movie
+
+SLOT_SIZE = 4096
+
+
+class NullLogger(ILogger):
+    def log(self, *args, **kwargs) -> None:
+        pass
+
+
+class MovieSource:
+    def __init__(self) -> None:
+        self.reads = 0
+
+    async def get_movie_by_id(self, movie_id: str, field_paths=None) -> MemoryDocumentSnapshot:
+        self.reads += 1
+        return MemoryDocumentSnapshot(movie_id, movie(int(movie_id[2:])), update_time=datetime.now(timezone.utc))
+
+
+def shared_pages_size(path: str) -> int:
+    # Proportional set size of the mapping: pages shared by n processes count for 1/n in each of them
+    size, in_mapping = 0, False
+    with open("/proc/self/smaps") as smaps:
+        for line in smaps:
+            if line[0] in "0123456789abcdef" and "-" in line.split(" ", 1)[0]:
+                in_mapping = line.rstrip().endswith(path)
+            elif in_mapping and line.startswith("Pss:"):
+                size += int(line.split()[1]) * 1024
+    return size
+
+
+def worker(seed: int, movies: int, lookups: int, cache_size: int, shared_path: str, trace: bool, start,
+           results) -> None:
+    weights = list(accumulate(1 / rank for rank in range(1, movies + 1)))
+    keys = [f"tt{number:07d}" for number in random.Random(seed).choices(range(movies), cum_weights=weights,
+                                                                          k=lookups)]
+    source = MovieSource()
+    if trace:
+        tracemalloc.start()
+    repository = CachedMovieRepository(source, NullLogger(), max_size=cache_size, ttl=3600,
+                                       shared_cache_path=shared_path or None,
+                                       shared_cache_size=cache_size * SLOT_SIZE + 64,
+                                       shared_cache_slot_size=SLOT_SIZE)
+
+    async def run() -> float:
+        started = time.perf_counter()
+        for key in keys:
+            await repository.get_movie_by_id(key)
+        return time.perf_counter() - started
+
+    start.wait()
+    elapsed = asyncio.run(run())
+    objects = tracemalloc.get_traced_memory()[0] if trace else 0
+    start.wait()  # Every worker still maps the file, so its pages are split between all of them
+    results.put((source.reads, elapsed, objects + (shared_pages_size(shared_path) if shared_path else 0)))
+
+
+def run_workers(workers: int, movies: int, lookups: int, cache_size: int, shared_path: str, seed: int,
+                trace: bool = False):
+    context = multiprocessing.get_context("fork")
+    start = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(seed + number, movies, lookups, cache_size, shared_path,
+                                                      trace, start, results))
+                 for number in range(workers)]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    reads = sum(reads for reads, _, _ in outcomes)
+    elapsed = max(elapsed for _, elapsed, _ in outcomes)
+    memory = sum(memory for _, _, memory in outcomes)
+    return 1 - reads / (workers * lookups), workers * lookups / elapsed, memory
+
+
+def main(workers: int, movies: int, lookups: int, cache_size: int) -> None:
+    print(f"{workers} workers, {movies} movies, {lookups} lookups per worker, {cache_size} cached movies")
+    print(f"{'':<34} {'hit rate':>9} {'lookups/s':>10} {'memory MB':>10}")
+    with tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as directory:
+        for name, shared_path in [("per-process caches", ""),
+                                  ("shared cache", os.path.join(directory, "movies-cache"))]:
+            for run in ["first run", "after restart"]:
+                seed = 0 if run == "first run" else 1000
+                hit_rate, rate, _ = run_workers(workers, movies, lookups, cache_size, shared_path, seed)
+                if shared_path and run == "first run":
+                    os.remove(shared_path)  # The memory run starts cold as well
+                _, _, memory = run_workers(workers, movies, lookups, cache_size, shared_path, seed, trace=True)
+                print(f"{name + ', ' + run:<34} {hit_rate:9.1%} {rate:10.0f} {memory / 2 ** 20:10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--cache-size", type=int, default=5000)
+    args = parser.parse_args()
+    main(args.workers, args.movies, args.lookups, args.cache_size)
@@ -0,0 +1,94 @@
+"""
+Cold start of the API: time to import the application, run its startup, and serve the first request.
+
+Every run happens in a fresh interpreter, so module imports are not cached between runs. The memory
+backends are used by default so the benchmark runs without GCP credentials.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--db-backend memory] [--warm-up]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = """
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+
+async def request(app, path):
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    sent = []
+    response_complete = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # Like a server, only report the disconnect once the response was sent
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            response_complete.set()
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "headers": [],
+             "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000), "root_path": "", "app": app}
+    await app(scope, receive, send)
+    return sent[0]["status"]
+
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        await request(main.app, "/v1/movies/by-id/tt0000001/")
+        served = time.perf_counter()
+    return ready, served
+
+
+ready, served = asyncio.run(run())
+google_modules = sorted({name.split(".")[2] for name in sys.modules
+                         if name.startswith("google.cloud.") and name.count(".") >= 2})
+print(json.dumps({"import": imported - started, "startup": ready - imported, "first_request": served - ready,
+                  "google_cloud_modules": google_modules}))
+"""
+
+
+def run_once(env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", CHILD], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs: int, db_backend: str, warm_up: bool) -> None:
+    env = {
+        **os.environ,
+        "DB_BACKEND": db_backend,
+        "WARM_UP_ENABLED": str(warm_up).lower(),
+        "LOG_SINK": os.environ.get("LOG_SINK", "stdout"),
+        "LOG_LEVEL": "WARNING",
+        "PAGE_TOKEN_SECRET": os.environ.get("PAGE_TOKEN_SECRET", "benchmark-page-secret"),
+        "TOKEN_SECRET_KEY": os.environ.get("TOKEN_SECRET_KEY", "benchmark-secret"),
+        "TOKEN_ALGORITHM": os.environ.get("TOKEN_ALGORITHM", "HS256"),
+    }
+    results = [run_once(env) for _ in range(runs)]
+    for phase in ("import", "startup", "first_request"):
+        print(f"{phase:<14} {statistics.median(result[phase] for result in results) * 1000:8.1f} ms (median)")
+    print(f"google.cloud modules loaded: {', '.join(results[-1]['google_cloud_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--db-backend", default="memory", choices=["memory", "firestore"])
+    parser.add_argument("--warm-up", action="store_true")
+    args = parser.parse_args()
+    main(args.runs, args.db_backend, args.warm_up)
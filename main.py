@@ -1,13 +1,33 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 
+from app.container import Container
 from app.routers.movies import router as movies_router
 from app.routers.auth import router as auth_router
+from app.routers.metrics import router as metrics_router
+from app.tools.log_context import CorrelationIdMiddleware
+from app.tools.settings import get_settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clients are created per process here, never at import time, so forking servers get their own
+    container = Container(get_settings())
+    app.state.container = container
+    await container.startup()
+    yield
+    await container.shutdown()
 
-app = FastAPI(title="Movies API")
+
+app = FastAPI(title="Movies API", lifespan=lifespan)
 
 app.include_router(movies_router, prefix="/v1/movies", tags=["movies"])
 app.include_router(auth_router, prefix="/v1/movies", tags=["auths"])
+app.include_router(metrics_router)
+app.add_middleware(CorrelationIdMiddleware)
+
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)